@@ -0,0 +1,386 @@
+"""
+Batched battle engine for the Pokemon Battle Simulator
+Advances many independent battles in lockstep on NumPy arrays, following the
+rules of BattleEngine.play_turn and the built-in AI used by heuristic_policy
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+from battle.damage import CATEGORY_IDS, MOVE_SLOTS, calculate_damage_batch
+from battle.events import AI, PLAYER
+from battle.simulation import DEFAULT_MAX_TURNS, BattleResult, SimulationSummary
+from battle.type_chart import EFFECTIVENESS, PAIR_COUNT, TYPE_IDS, defending_key
+from models.team import PokemonTeam
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed when a batch is built
+    np = None
+
+TEAM_SLOTS = 6
+
+# Category codes in the move arrays; EMPTY pads movesets shorter than MOVE_SLOTS
+EMPTY = -1
+STATUS = CATEGORY_IDS["status"]
+PHYSICAL = CATEGORY_IDS["physical"]
+SPECIAL = CATEGORY_IDS["special"]
+
+# Stat columns of the stats array
+HP, ATTACK, DEFENSE, SPECIAL_ATTACK, SPECIAL_DEFENSE, SPEED = range(6)
+_STAT_NAMES = ["hp", "attack", "defense", "special-attack", "special-defense", "speed"]
+
+# Winner codes, as in battle.replay
+DRAW, PLAYER_WINS, AI_WINS = 0, 1, 2
+WINNERS = {DRAW: None, PLAYER_WINS: "Player", AI_WINS: "AI"}
+
+# No switch / no move in an action array
+NONE = -1
+
+
+def _team_arrays(team: PokemonTeam) -> Tuple:
+    """Per-slot arrays describing one team, padded to TEAM_SLOTS Pokemon and MOVE_SLOTS moves."""
+    size = len(team.pokemon)
+    stats = np.ones((TEAM_SLOTS, 6), dtype=np.int64)
+    hp = np.zeros(TEAM_SLOTS, dtype=np.int64)
+    levels = np.ones(TEAM_SLOTS, dtype=np.int64)
+    keys = np.zeros(TEAM_SLOTS, dtype=np.int64)
+    move_types = np.full((TEAM_SLOTS, MOVE_SLOTS), -1, dtype=np.int64)
+    categories = np.full((TEAM_SLOTS, MOVE_SLOTS), EMPTY, dtype=np.int64)
+    powers = np.zeros((TEAM_SLOTS, MOVE_SLOTS), dtype=np.int64)
+    accuracy = np.zeros((TEAM_SLOTS, MOVE_SLOTS), dtype=np.float64)
+    pp = np.zeros((TEAM_SLOTS, MOVE_SLOTS), dtype=np.int64)
+    stab = np.zeros((TEAM_SLOTS, MOVE_SLOTS), dtype=bool)
+
+    for slot, pokemon in enumerate(team.pokemon):
+        stats[slot] = [pokemon.stats[name] for name in _STAT_NAMES]
+        hp[slot] = pokemon.current_hp
+        levels[slot] = pokemon.level
+        keys[slot] = defending_key(pokemon.types)
+        for index, move in enumerate(pokemon.moves[:MOVE_SLOTS]):
+            move_types[slot, index] = TYPE_IDS.get(move.type, -1)
+            categories[slot, index] = CATEGORY_IDS.get(move.category, STATUS)
+            powers[slot, index] = move.power
+            accuracy[slot, index] = move.accuracy
+            pp[slot, index] = move.current_pp
+            stab[slot, index] = move.type in pokemon.types
+
+    return size, stats, hp, levels, keys, move_types, categories, powers, accuracy, pp, stab
+
+
+class BatchedBattles:
+    """Many battles between pairs of teams, stored as arrays and played turn by turn together.
+
+    Arrays are indexed [battle, side] with side PLAYER or AI, then by team slot and
+    move slot; uses counts how often each move was used, hit or miss. A turn
+    resolves exactly like BattleEngine.play_turn: switches first, then moves in
+    speed order (the player wins ties), with the AI replacing a fainted Pokemon at
+    once and the player replacing theirs on the next turn.
+    Random rolls come from a NumPy generator, so individual battles differ from the
+    scalar engine's, but the distribution of outcomes is the same.
+    """
+
+    def __init__(self, pairs: Sequence[Tuple[PokemonTeam, PokemonTeam]], rng=None):
+        """Copy the current state of each (player team, AI team) pair; rng is a numpy.random.Generator or seed."""
+        if np is None:
+            raise ImportError("NumPy is required for batched battles")
+        self.rng = rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+
+        # Each distinct team is converted once, then gathered into [battle, side] order
+        slots: Dict[int, int] = {}
+        self.teams: List[PokemonTeam] = []
+        for team in (team for pair in pairs for team in pair):
+            if id(team) not in slots:
+                slots[id(team)] = len(self.teams)
+                self.teams.append(team)
+        # team_order[battle, side] indexes self.teams
+        self.team_order = np.array([[slots[id(player_team)], slots[id(ai_team)]] for player_team, ai_team in pairs],
+                                   dtype=np.int64).reshape(len(pairs), 2)
+        teams = [_team_arrays(team) for team in self.teams]
+        fields = [np.array([team[field] for team in teams])[self.team_order] for field in range(len(teams[0]))]
+        (self.sizes, self.stats, self.hp, self.levels, self.keys, self.move_types, self.categories,
+         self.powers, self.accuracy, self.pp, self.stab) = fields
+
+        count = len(pairs)
+        self.count = count
+        self.battles = np.arange(count)
+        self.active = np.array([[player_team.active_pokemon_index, ai_team.active_pokemon_index]
+                                for player_team, ai_team in pairs], dtype=np.int64).reshape(count, 2)
+        self.turns = np.zeros(count, dtype=np.int64)
+        self.uses = np.zeros(self.pp.shape, dtype=np.int64)
+        self.slots = np.arange(TEAM_SLOTS)
+        self.real_slots = self.slots[None, None, :] < self.sizes[:, :, None]
+        self._static_scores = self._build_static_scores()
+
+    @classmethod
+    def from_matchup(cls, player_team: PokemonTeam, ai_team: PokemonTeam, count: int, rng=None) -> "BatchedBattles":
+        """count fresh battles between the same two teams (both are copied at full HP and PP)."""
+        player_team = player_team.clone()
+        ai_team = ai_team.clone()
+        player_team.reset()
+        ai_team.reset()
+        return cls([(player_team, ai_team)] * count, rng)
+
+    def _effectiveness(self, move_types, defender_keys):
+        table = np.frombuffer(EFFECTIVENESS, dtype=np.float64)
+        return np.where(move_types >= 0, table[np.maximum(move_types, 0) * PAIR_COUNT + defender_keys], 1.0)
+
+    def _build_static_scores(self):
+        """Type and speed parts of the matchup score for every (side, own slot, opponent slot)."""
+        damaging = (self.categories == PHYSICAL) | (self.categories == SPECIAL)
+        # offense[n, side, i, j]: the type terms of side's Pokemon i attacking the other side's Pokemon j
+        opponent_keys = self.keys[:, ::-1][:, :, None, :, None]
+        effectiveness = self._effectiveness(self.move_types[:, :, :, None, :], opponent_keys)
+        terms = np.where(damaging[:, :, :, None, :], (effectiveness - 1) * 100, 0.0)
+
+        # Accumulate move by move, like the scalar loop, so the sums match bit for bit
+        offense = np.zeros(terms.shape[:-1])
+        for move in range(MOVE_SLOTS):
+            offense = offense + terms[..., move]
+        defense_terms = terms[:, ::-1].transpose(0, 1, 3, 2, 4)
+        scores = offense
+        for move in range(MOVE_SLOTS):
+            scores = scores - defense_terms[..., move]
+
+        speeds = self.stats[..., SPEED]
+        faster = speeds[:, :, :, None] > speeds[:, ::-1][:, :, None, :]
+        return scores, np.where(faster, 30, -30)
+
+    def _matchup_scores(self, side: int, battles):
+        """Matchup score of each of side's slots against the opposing active Pokemon, shaped (battles, slots)."""
+        type_scores, speed_scores = self._static_scores
+        opponent_active = self.active[battles, 1 - side]
+        hp_fraction = self.hp[battles, side] / self.stats[battles, side, :, HP]
+        scores = type_scores[battles, side, :, opponent_active] + hp_fraction * 50
+        return scores + speed_scores[battles, side, :, opponent_active]
+
+    def alive(self, side: int):
+        """Mask of slots that still have HP, shaped (battles, slots)."""
+        return (self.hp[:, side] > 0) & self.real_slots[:, side]
+
+    def first_non_fainted(self, side: int):
+        """First slot with HP left per battle, or -1."""
+        alive = self.alive(side)
+        return np.where(alive.any(axis=1), alive.argmax(axis=1), -1)
+
+    def is_over(self):
+        """Mask of battles where a team has been defeated."""
+        return ~self.alive(PLAYER).any(axis=1) | ~self.alive(AI).any(axis=1)
+
+    def winners(self):
+        """Winner code per battle (DRAW while a battle is still running)."""
+        return np.where(~self.alive(PLAYER).any(axis=1), AI_WINS,
+                        np.where(~self.alive(AI).any(axis=1), PLAYER_WINS, DRAW))
+
+    def heuristic_actions(self, side: int, battles=None) -> Tuple:
+        """(switch, move) arrays chosen by the built-in AI for side, as in BattleEngine._ai_choose_action."""
+        battles = self.battles if battles is None else battles
+        count = len(battles)
+        active = self.active[battles, side]
+        switch = np.full(count, NONE, dtype=np.int64)
+        move = np.full(count, NONE, dtype=np.int64)
+
+        hp = self.hp[battles, side]
+        active_hp = hp[np.arange(count), active]
+        fainted = active_hp <= 0
+        switch[fainted] = self.first_non_fainted(side)[battles][fainted]
+
+        # Switch decision: only below 30% HP, to a teammate scoring over 50 more than the active one
+        max_hp = self.stats[battles, side, :, HP][np.arange(count), active]
+        considering = ~fainted & ~(active_hp > max_hp * 0.3)
+        if considering.any():
+            rows = np.flatnonzero(considering)
+            scores = self._matchup_scores(side, battles[rows])
+            current = scores[np.arange(len(rows)), active[rows]]
+            alive = (hp[rows] > 0) & self.real_slots[battles[rows], side]
+            best = np.full(len(rows), -1000.0)
+            best_index = np.full(len(rows), NONE, dtype=np.int64)
+            for slot in range(TEAM_SLOTS):
+                better = ((slot != active[rows]) & alive[:, slot]
+                          & (scores[:, slot] > current + 50) & (scores[:, slot] > best))
+                best = np.where(better, scores[:, slot], best)
+                best_index = np.where(better, slot, best_index)
+            switch[rows] = best_index
+
+        # Move selection for everyone who isn't switching
+        choosing = switch == NONE
+        if choosing.any():
+            move[choosing] = self._select_moves(side, battles[choosing])
+        return switch, move
+
+    def _select_moves(self, side: int, battles):
+        """Best move per battle, as in BattleEngine._ai_select_move."""
+        rows = np.arange(len(battles))
+        active = self.active[battles, side]
+        defender_keys = self.keys[battles, 1 - side, self.active[battles, 1 - side]]
+        move_types = self.move_types[battles, side, active]
+        categories = self.categories[battles, side, active]
+        expected = self.powers[battles, side, active] * self._effectiveness(move_types, defender_keys[:, None])
+        expected = np.where(self.stab[battles, side, active], expected * 1.5, expected)
+        usable = self.pp[battles, side, active] > 0
+
+        best = np.full(len(rows), -1.0)
+        best_index = np.zeros(len(rows), dtype=np.int64)
+        for slot in range(MOVE_SLOTS):
+            damaging = usable[:, slot] & ((categories[:, slot] == PHYSICAL) | (categories[:, slot] == SPECIAL))
+            status = usable[:, slot] & (categories[:, slot] == STATUS)
+            better = damaging & (expected[:, slot] > best)
+            settle = status & (best < 20)
+            best = np.where(better, expected[:, slot], np.where(settle, 20.0, best))
+            best_index = np.where(better | settle, slot, best_index)
+        return best_index
+
+    def _switch(self, side: int, battles, targets):
+        """Switch where the target slot exists and isn't fainted; returns which switches happened."""
+        in_range = (targets >= 0) & (targets < self.sizes[battles, side])
+        safe_targets = np.where(in_range, targets, 0)
+        valid = in_range & (self.hp[battles, side, safe_targets] > 0)
+        self.active[battles[valid], side] = targets[valid]
+        return valid
+
+    def _attack(self, side: int, battles, moves, hit_rolls, damage_rolls):
+        """side's active Pokemon uses moves; returns the mask of battles where the defender fainted."""
+        defending = 1 - side
+        attacker = self.active[battles, side]
+        defender = self.active[battles, defending]
+
+        self.uses[battles, side, attacker, moves] += 1
+        hit = hit_rolls <= self.accuracy[battles, side, attacker, moves]
+        hitting = battles[hit]
+        self.pp[hitting, side, attacker[hit], moves[hit]] -= 1
+
+        categories = self.categories[battles, side, attacker, moves]
+        damaging = hit & ((categories == PHYSICAL) | (categories == SPECIAL))
+        if damaging.any():
+            rows = battles[damaging]
+            attacking_slot = attacker[damaging]
+            defending_slot = defender[damaging]
+            move_slot = moves[damaging]
+            physical = categories[damaging] == PHYSICAL
+            attack_stats = np.where(physical, self.stats[rows, side, attacking_slot, ATTACK],
+                                    self.stats[rows, side, attacking_slot, SPECIAL_ATTACK])
+            defense_stats = np.where(physical, self.stats[rows, defending, defending_slot, DEFENSE],
+                                     self.stats[rows, defending, defending_slot, SPECIAL_DEFENSE])
+            damage = calculate_damage_batch(
+                self.levels[rows, side, attacking_slot],
+                self.powers[rows, side, attacking_slot, move_slot],
+                attack_stats,
+                defense_stats,
+                self.stab[rows, side, attacking_slot, move_slot],
+                self.move_types[rows, side, attacking_slot, move_slot],
+                self.keys[rows, defending, defending_slot],
+                categories[damaging],
+                damage_rolls[damaging]
+            )
+            self.hp[rows, defending, defending_slot] = np.maximum(0, self.hp[rows, defending, defending_slot] - damage)
+
+        fainted = self.hp[battles, defending, defender] <= 0
+        if defending == AI and fainted.any():
+            # The AI sends out its next Pokemon straight away
+            rows = battles[fainted]
+            replacement = self.first_non_fainted(AI)[rows]
+            sent = replacement >= 0
+            self.active[rows[sent], AI] = replacement[sent]
+        return fainted
+
+    def _draw_rolls(self, count: int) -> Tuple:
+        """Accuracy rolls (0-100) and damage factors (85-100%) for both sides, shaped (count, 2)."""
+        hit_rolls = self.rng.random((count, 2)) * 100
+        damage_rolls = 0.85 + self.rng.random((count, 2)) * 0.15
+        return hit_rolls, damage_rolls
+
+    def step(self, player_actions: Tuple, ai_actions: Tuple, battles=None):
+        """Resolve one turn for the given battles (default all) from (switch, move) arrays; NONE marks no choice."""
+        battles = self.battles if battles is None else battles
+        player_switch, player_move = player_actions
+        ai_switch, ai_move = ai_actions
+        self.turns[battles] += 1
+        hit_rolls, damage_rolls = self._draw_rolls(len(battles))
+
+        # A refused player switch ends the turn before anything else happens
+        going_on = np.ones(len(battles), dtype=bool)
+        switching = player_switch != NONE
+        if switching.any():
+            rows = np.flatnonzero(switching)
+            going_on[rows] = self._switch(PLAYER, battles[rows], player_switch[rows])
+
+        switching = going_on & (ai_switch != NONE)
+        if switching.any():
+            rows = np.flatnonzero(switching)
+            self._switch(AI, battles[rows], ai_switch[rows])
+
+        player_moves = going_on & (player_move != NONE)
+        ai_moves = going_on & (ai_move != NONE)
+        both = player_moves & ai_moves
+        player_speed = self.stats[battles, PLAYER, self.active[battles, PLAYER], SPEED]
+        ai_speed = self.stats[battles, AI, self.active[battles, AI], SPEED]
+        player_first = both & (player_speed >= ai_speed)
+        ai_first = both & ~player_first
+
+        # First attacks: the faster side when both move, otherwise whoever moves
+        first_player = player_first | (player_moves & ~ai_moves)
+        first_ai = ai_first | (ai_moves & ~player_moves)
+        player_fainted = np.zeros(len(battles), dtype=bool)
+        ai_fainted = np.zeros(len(battles), dtype=bool)
+        if first_player.any():
+            rows = np.flatnonzero(first_player)
+            ai_fainted[rows] = self._attack(PLAYER, battles[rows], player_move[rows],
+                                            hit_rolls[rows, PLAYER], damage_rolls[rows, PLAYER])
+        if first_ai.any():
+            rows = np.flatnonzero(first_ai)
+            player_fainted[rows] = self._attack(AI, battles[rows], ai_move[rows],
+                                                hit_rolls[rows, AI], damage_rolls[rows, AI])
+
+        # Second attacks, only if the first one didn't knock the defender out
+        second_ai = player_first & ~ai_fainted
+        second_player = ai_first & ~player_fainted
+        if second_ai.any():
+            rows = np.flatnonzero(second_ai)
+            self._attack(AI, battles[rows], ai_move[rows], hit_rolls[rows, AI], damage_rolls[rows, AI])
+        if second_player.any():
+            rows = np.flatnonzero(second_player)
+            self._attack(PLAYER, battles[rows], player_move[rows], hit_rolls[rows, PLAYER], damage_rolls[rows, PLAYER])
+
+    def run(self, max_turns: int = DEFAULT_MAX_TURNS):
+        """Play every battle with the built-in AI on both sides until it ends or reaches max_turns."""
+        while True:
+            running = np.flatnonzero(~self.is_over() & (self.turns < max_turns))
+            if len(running) == 0:
+                return
+            player_actions = self.heuristic_actions(PLAYER, running)
+            ai_actions = self.heuristic_actions(AI, running)
+            self.step(player_actions, ai_actions, running)
+
+    def remaining_hp_fraction(self, side: int):
+        """Fraction of each team's total max HP that is left."""
+        real = self.real_slots[:, side]
+        max_hp = np.where(real, self.stats[:, side, :, HP], 0).sum(axis=1)
+        return np.where(real, self.hp[:, side], 0).sum(axis=1) / np.maximum(max_hp, 1)
+
+    def results(self) -> List[BattleResult]:
+        """Outcome of every battle, like simulation.run_battle."""
+        winners = self.winners()
+        player_hp = self.remaining_hp_fraction(PLAYER)
+        ai_hp = self.remaining_hp_fraction(AI)
+        return [BattleResult(WINNERS[int(winner)], int(turns), float(player), float(ai))
+                for winner, turns, player, ai in zip(winners, self.turns, player_hp, ai_hp)]
+
+
+def simulate_matchup_batched(player_team: PokemonTeam,
+                             ai_team: PokemonTeam,
+                             games: int,
+                             seed: Optional[int] = None,
+                             max_turns: int = DEFAULT_MAX_TURNS,
+                             batch_size: int = 100000,
+                             result_writer=None) -> SimulationSummary:
+    """Batched counterpart of simulate_matchup with the built-in AI on both sides.
+
+    A battle.results.ResultWriter stores every game's outcome and move usage.
+    """
+    rng = np.random.default_rng(seed) if np is not None else None
+    summary = SimulationSummary()
+    for start in range(0, games, batch_size):
+        battles = BatchedBattles.from_matchup(player_team, ai_team, min(batch_size, games - start), rng)
+        battles.run(max_turns)
+        if result_writer is not None:
+            result_writer.add_batch(battles)
+        for result in battles.results():
+            summary.add(result)
+    return summary
@@ -3,29 +3,154 @@ Battle Engine for Pokemon Battle Simulator
 Handles battle mechanics, damage calculation, and turn processing
 """
 import random
-from typing import Dict, List, Optional, Tuple, Union
-from battle.type_chart import TYPE_CHART
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from battle.damage import calculate_damage
+from battle.events import (AI, PLAYER, AwaitSwitchEvent, BattleEndEvent, EventSink, FaintEvent,
+                           InvalidChoiceEvent, MissEvent, MoveEvent, SwitchEvent, SwitchFailedEvent)
+from battle.formatter import TextFormatter
+from battle.type_chart import EFFECTIVENESS, PAIR_COUNT, TYPE_IDS, defending_key, type_effectiveness
 from models.pokemon import Pokemon
 from models.team import PokemonTeam
 
+# A side's choice for a turn: (switch_index, move_index), exactly one of them set
+Action = Tuple[Optional[int], Optional[int]]
+
+# Mutable battle state: (turn_count, player team state, AI team state); hashable
+BattleSnapshot = Tuple[int, Tuple, Tuple]
+
+def _snapshot_team(team: PokemonTeam) -> Tuple:
+    """Capture a team's active index, HP, status and PP."""
+    return (
+        team.active_pokemon_index,
+        tuple((p.current_hp, p.status, tuple(move.current_pp for move in p.moves)) for p in team.pokemon)
+    )
+
+def _matchup_key(pokemon: Pokemon) -> Tuple:
+    """Identify a Pokemon by species and moveset for the matchup cache."""
+    return pokemon.id, tuple(move.id for move in pokemon.moves)
+
+def _restore_team(team: PokemonTeam, snapshot: Tuple):
+    """Put a team back into a state captured by _snapshot_team."""
+    team.active_pokemon_index, members = snapshot
+    for pokemon, (hp, status, pps) in zip(team.pokemon, members):
+        pokemon.current_hp = hp
+        pokemon.status = status
+        for move, pp in zip(pokemon.moves, pps):
+            move.current_pp = pp
+
+class MoveValueIndex:
+    """The AI's view of one Pokemon's moves against every defending type combination.
+
+    expected_damage and type_scores hold one entry per move: None for moves that
+    don't deal damage, otherwise a tuple indexed by battle.type_chart.defending_key
+    with the value _ai_select_move and _static_matchup_score would compute.
+    """
+
+    __slots__ = ("defending_key", "expected_damage", "type_scores")
+
+    def __init__(self, defending_key: int, expected_damage: Tuple, type_scores: Tuple):
+        """Initialize with the Pokemon's own defending key and the per-move tables."""
+        self.defending_key = defending_key
+        self.expected_damage = expected_damage
+        self.type_scores = type_scores
+
+# Move-value indexes keyed on species + moveset like the matchup cache, shared by every engine
+_move_value_indexes: Dict[Tuple, MoveValueIndex] = {}
+MOVE_VALUE_INDEX_LIMIT = 4096
+
+def move_value_index(pokemon: Pokemon) -> MoveValueIndex:
+    """The Pokemon's move-value index, built on first sight.
+
+    Raises ValueError for a Pokemon with more than two types, which the type chart can't index.
+    """
+    key = _matchup_key(pokemon)
+    try:
+        return _move_value_indexes[key]
+    except KeyError:
+        pass
+    if len(_move_value_indexes) >= MOVE_VALUE_INDEX_LIMIT:
+        _move_value_indexes.clear()
+    index = _build_move_value_index(pokemon.types, pokemon.moves)
+    _move_value_indexes[key] = index
+    return index
+
+def _build_move_value_index(types: List[str], moves: List) -> MoveValueIndex:
+    own_key = defending_key(types)
+    expected_damage = []
+    type_scores = []
+    for move in moves:
+        if move.category not in ["physical", "special"]:
+            expected_damage.append(None)
+            type_scores.append(None)
+            continue
+
+        # Same arithmetic as the AI, done once per distinct multiplier
+        attack_id = TYPE_IDS.get(move.type)
+        stab = move.type in types
+        values = {}
+        damage_row = []
+        score_row = []
+        for key in range(PAIR_COUNT):
+            effectiveness = 1.0 if attack_id is None else EFFECTIVENESS[attack_id * PAIR_COUNT + key]
+            if effectiveness not in values:
+                damage = move.power * effectiveness
+                if stab:
+                    damage *= 1.5
+                values[effectiveness] = damage, (effectiveness - 1) * 100
+            damage_row.append(values[effectiveness][0])
+            score_row.append(values[effectiveness][1])
+        expected_damage.append(tuple(damage_row))
+        type_scores.append(tuple(score_row))
+
+    return MoveValueIndex(own_key, tuple(expected_damage), tuple(type_scores))
+
 class BattleEngine:
     """Engine that handles Pokemon battles."""
 
-    def __init__(self, player_team: PokemonTeam, ai_team: PokemonTeam):
-        """Initialize battle engine with player and AI teams."""
+    def __init__(self, player_team: PokemonTeam, ai_team: PokemonTeam, rng: Optional[random.Random] = None,
+                 ai_policy: Optional[Callable[["BattleEngine", PokemonTeam, PokemonTeam], Action]] = None,
+                 event_sink: Optional[EventSink] = None,
+                 log_turns: bool = True,
+                 replay_writer=None,
+                 metrics=None):
+        """Initialize battle engine with player and AI teams.
+
+        Teams may also be compact TeamState objects (models.battle_state), which the engine treats the same way.
+        rng is the random stream used for accuracy and damage rolls; it defaults to the global random module.
+        ai_policy replaces the built-in AI opponent, e.g. with battle.search.SearchAI.
+        event_sink receives every battle event (battle.events); with log_turns off
+        process_turn still returns the turn's messages but battle_log stays empty.
+        replay_writer (battle.replay.ReplayWriter) records the actions of every turn.
+        metrics (battle.metrics.BattleMetrics) times and counts what the engine does; clones are not measured.
+        """
         self.player_team = player_team
         self.ai_team = ai_team
+        self.rng = rng if rng is not None else random
+        self.ai_policy = ai_policy
+        self.event_sink = event_sink
+        self.log_turns = log_turns
+        self.replay_writer = replay_writer
+        self.formatter = TextFormatter()
+
+        # Static matchup parts keyed on (species + moveset) pairs; shared with clones
+        self._matchup_cache: Dict[Tuple, Tuple[float, int]] = {}
+        self._index_team(player_team)
+        self._index_team(ai_team)
         self.turn_count = 0
         self.battle_log = []
 
+        self.metrics = None
+        if metrics is not None:
+            metrics.attach(self)
+
     def _calculate_type_effectiveness(self, move_type: str, defender_types: List[str]) -> float:
         """Calculate type effectiveness multiplier."""
-        multiplier = 1.0
-        for def_type in defender_types:
-            # Get effectiveness from type chart
-            if move_type in TYPE_CHART and def_type in TYPE_CHART[move_type]:
-                multiplier *= TYPE_CHART[move_type][def_type]
-        return multiplier
+        return type_effectiveness(move_type, defender_types)
+
+    def _index_team(self, team: PokemonTeam):
+        """Make sure every member of a team entering the battle has a move-value index."""
+        for pokemon in team.pokemon:
+            move_value_index(pokemon)
 
     def _calculate_damage(self, attacker: Pokemon, defender: Pokemon, move_index: int) -> int:
         """Calculate damage for a move."""
@@ -35,12 +160,6 @@ class BattleEngine:
         if move.category == "status":
             return 0
 
-        # Base damage formula
-        # ((2 * Level / 5 + 2) * Power * A/D / 50) + 2
-
-        level = attacker.level
-        power = move.power
-
         # Select the appropriate attack and defense stats based on move category
         if move.category == "physical":
             attack_stat = attacker.stats["attack"]
@@ -49,31 +168,38 @@ class BattleEngine:
             attack_stat = attacker.stats["special-attack"]
             defense_stat = defender.stats["special-defense"]
 
-        # Calculate base damage
-        damage = ((2 * level / 5 + 2) * power * (attack_stat / defense_stat)) / 50 + 2
-
-        # Apply STAB (Same Type Attack Bonus)
-        if move.type in attacker.types:
-            damage *= 1.5
-
-        # Apply type effectiveness
-        type_effectiveness = self._calculate_type_effectiveness(move.type, defender.types)
-        damage *= type_effectiveness
-
-        # Apply random factor (85-100%)
-        damage *= random.uniform(0.85, 1.0)
-
-        # Return integer damage (minimum 1)
-        return max(1, int(damage))
-
-    def _apply_move(self, attacker: Pokemon, defender: Pokemon, move_index: int) -> Tuple[int, str, float]:
-        """Apply a move from attacker to defender."""
+        return calculate_damage(
+            attacker.level,
+            move.power,
+            attack_stat,
+            defense_stat,
+            move.type in attacker.types,
+            self._calculate_type_effectiveness(move.type, defender.types),
+            self._roll_damage_modifier()
+        )
+
+    def _roll_hit(self, move) -> bool:
+        """Roll whether a move hits."""
+        accuracy_check = self.rng.uniform(0, 100)
+        return accuracy_check <= move.accuracy
+
+    def _roll_damage_modifier(self) -> float:
+        """Roll the random damage factor (85-100%)."""
+        return self.rng.uniform(0.85, 1.0)
+
+    def _apply_move(self, attacker: Pokemon, defender: Pokemon, move_index: int,
+                    side: int = PLAYER, events: Optional[List] = None) -> Tuple[int, float]:
+        """Apply a move from attacker to defender, recording what happened in events if given.
+
+        Returns the damage dealt and the type effectiveness (0.0 on a miss).
+        """
         move = attacker.moves[move_index]
 
         # Check if move hits
-        accuracy_check = random.uniform(0, 100)
-        if accuracy_check > move.accuracy:
-            return 0, f"{attacker.name}'s {move.name} missed!", 0.0
+        if not self._roll_hit(move):
+            if events is not None:
+                events.append(MissEvent(side, attacker, move))
+            return 0, 0.0
 
         # Reduce PP
         move.current_pp -= 1
@@ -84,51 +210,32 @@ class BattleEngine:
             damage = self._calculate_damage(attacker, defender, move_index)
             defender.current_hp = max(0, defender.current_hp - damage)
 
-            # Determine effectiveness message
             effectiveness = self._calculate_type_effectiveness(move.type, defender.types)
-
-            if effectiveness > 1.5:
-                effect_msg = "It's super effective!"
-            elif effectiveness < 0.5:
-                effect_msg = "It's not very effective..."
-            elif effectiveness == 0:
-                effect_msg = "It has no effect..."
-            else:
-                effect_msg = ""
-
-            message = f"{attacker.name} used {move.name}!"
-            if effect_msg:
-                message += f" {effect_msg}"
-
-            if damage > 0:
-                message += f" {defender.name} lost {damage} HP!"
-
-            return damage, message, effectiveness
+            if events is not None:
+                events.append(MoveEvent(side, attacker, move, defender, damage, effectiveness))
+            return damage, effectiveness
 
         # Status moves could be implemented here
-        # For now, just return a simple message
-        return 0, f"{attacker.name} used {move.name}!", 1.0
+        if events is not None:
+            events.append(MoveEvent(side, attacker, move, defender, 0, 1.0))
+        return 0, 1.0
 
     def _ai_select_move(self, ai_pokemon: Pokemon, player_pokemon: Pokemon) -> int:
         """AI selects the best move to use."""
+        index = move_value_index(ai_pokemon)
+        defender_key = move_value_index(player_pokemon).defending_key
+
         best_damage = -1
         best_move_index = 0
 
-        # Check each move
-        for i, move in enumerate(ai_pokemon.moves):
+        # Check each move; expected damage (power x effectiveness x STAB) is looked up
+        for i, (move, expected) in enumerate(zip(ai_pokemon.moves, index.expected_damage)):
             if move.current_pp <= 0:
                 continue  # Skip moves with no PP
 
-            # For damage moves, estimate damage
-            if move.category in ["physical", "special"]:
+            if expected is not None:
                 # Simple heuristic: choose move with highest expected damage
-                effectiveness = self._calculate_type_effectiveness(move.type, player_pokemon.types)
-                expected_damage = move.power * effectiveness
-
-                # Consider STAB
-                if move.type in ai_pokemon.types:
-                    expected_damage *= 1.5
-
+                expected_damage = expected[defender_key]
                 if expected_damage > best_damage:
                     best_damage = expected_damage
                     best_move_index = i
@@ -140,10 +247,26 @@ class BattleEngine:
 
         return best_move_index
 
-    def _ai_decide_switch(self) -> Optional[int]:
-        """AI decides whether to switch Pokemon."""
-        current_pokemon = self.ai_team.get_active_pokemon()
-        player_pokemon = self.player_team.get_active_pokemon()
+    def _ai_choose_action(self, team: PokemonTeam, opponent_team: PokemonTeam) -> Action:
+        """Pick a (switch_index, move_index) action for team using the built-in AI."""
+        current_pokemon = team.get_active_pokemon()
+
+        # A fainted Pokemon must be replaced before anything else
+        if current_pokemon.is_fainted():
+            return team.get_first_non_fainted(), None
+
+        switch_index = self._ai_decide_switch(team, opponent_team)
+        if switch_index is not None:
+            return switch_index, None
+        return None, self._ai_select_move(current_pokemon, opponent_team.get_active_pokemon())
+
+    def _ai_decide_switch(self, team: Optional[PokemonTeam] = None,
+                          opponent_team: Optional[PokemonTeam] = None) -> Optional[int]:
+        """AI decides whether to switch Pokemon (defaults to the AI's side)."""
+        team = team if team is not None else self.ai_team
+        opponent_team = opponent_team if opponent_team is not None else self.player_team
+        current_pokemon = team.get_active_pokemon()
+        player_pokemon = opponent_team.get_active_pokemon()
 
         # Don't switch if current Pokemon is in good shape
         if current_pokemon.current_hp > current_pokemon.stats["hp"] * 0.3:
@@ -155,8 +278,8 @@ class BattleEngine:
 
         current_score = self._calculate_matchup_score(current_pokemon, player_pokemon)
 
-        for i, pokemon in enumerate(self.ai_team.pokemon):
-            if i == self.ai_team.active_pokemon_index or pokemon.is_fainted():
+        for i, pokemon in enumerate(team.pokemon):
+            if i == team.active_pokemon_index or pokemon.is_fainted():
                 continue
 
             score = self._calculate_matchup_score(pokemon, player_pokemon)
@@ -171,38 +294,68 @@ class BattleEngine:
     def _calculate_matchup_score(self, pokemon1: Pokemon, pokemon2: Pokemon) -> float:
         """Calculate a matchup score between two Pokemon."""
         # Higher is better for pokemon1
-        score = 0
-
-        # Consider type effectiveness
-        for move in pokemon1.moves:
-            if move.category in ["physical", "special"]:
-                effectiveness = self._calculate_type_effectiveness(move.type, pokemon2.types)
-                score += (effectiveness - 1) * 100
-
-        # Consider defensive typing
-        for move in pokemon2.moves:
-            if move.category in ["physical", "special"]:
-                effectiveness = self._calculate_type_effectiveness(move.type, pokemon1.types)
-                score -= (effectiveness - 1) * 100
+        type_score, speed_score = self._static_matchup_score(pokemon1, pokemon2)
 
         # Consider HP percentage
-        score += (pokemon1.current_hp / pokemon1.stats["hp"]) * 50
+        score = type_score + (pokemon1.current_hp / pokemon1.stats["hp"]) * 50
 
         # Consider speed (being faster is an advantage)
-        if pokemon1.stats["speed"] > pokemon2.stats["speed"]:
-            score += 30
-        else:
-            score -= 30
+        score += speed_score
 
         return score
 
+    def _static_matchup_score(self, pokemon1: Pokemon, pokemon2: Pokemon) -> Tuple[float, int]:
+        """Type and speed parts of the matchup score, which don't change during a battle."""
+        key = (_matchup_key(pokemon1), _matchup_key(pokemon2))
+        cached = self._matchup_cache.get(key)
+        if cached is not None:
+            return cached
+
+        index1 = move_value_index(pokemon1)
+        index2 = move_value_index(pokemon2)
+        score = 0
+        # Consider type effectiveness, then defensive typing
+        for type_scores in index1.type_scores:
+            if type_scores is not None:
+                score += type_scores[index2.defending_key]
+        for type_scores in index2.type_scores:
+            if type_scores is not None:
+                score -= type_scores[index1.defending_key]
+
+        # Being faster is an advantage
+        speed_score = 30 if pokemon1.stats["speed"] > pokemon2.stats["speed"] else -30
+
+        self._matchup_cache[key] = (score, speed_score)
+        return score, speed_score
+
+    def get_matchup_matrix(self, team: Optional[PokemonTeam] = None,
+                           opponent_team: Optional[PokemonTeam] = None,
+                           include_hp: bool = True) -> List[List[float]]:
+        """Matchup scores of every member of team (rows) against every member of opponent_team.
+
+        Defaults to the AI's team against the player's. Without include_hp only the
+        static type and speed parts are returned, which is what team builders need.
+        """
+        team = team if team is not None else self.ai_team
+        opponent_team = opponent_team if opponent_team is not None else self.player_team
+
+        matrix = []
+        for pokemon in team.pokemon:
+            row = []
+            for opponent in opponent_team.pokemon:
+                if include_hp:
+                    row.append(self._calculate_matchup_score(pokemon, opponent))
+                else:
+                    type_score, speed_score = self._static_matchup_score(pokemon, opponent)
+                    row.append(type_score + speed_score)
+            matrix.append(row)
+        return matrix
+
     def process_turn(self, player_choice: str, player_move_index: Optional[int] = None) -> List[str]:
         """Process a single turn of battle."""
         self.turn_count += 1
-        turn_log = []
 
         player_pokemon = self.player_team.get_active_pokemon()
-        ai_pokemon = self.ai_team.get_active_pokemon()
 
         # Handle player's decision
         player_switch = None
@@ -212,147 +365,170 @@ class BattleEngine:
             try:
                 player_switch = int(player_choice.split()[1])
                 if player_switch < 0 or player_switch >= len(self.player_team.pokemon):
-                    turn_log.append("Invalid switch index!")
-                    return turn_log
+                    return self._reject_choice("Invalid switch index!")
             except (IndexError, ValueError):
-                turn_log.append("Invalid switch command!")
-                return turn_log
+                return self._reject_choice("Invalid switch command!")
         else:
             # It's a move
             try:
                 player_move_index = int(player_choice) - 1  # 1-indexed for user, 0-indexed internally
                 if player_move_index < 0 or player_move_index >= len(player_pokemon.moves):
-                    turn_log.append("Invalid move selection!")
-                    return turn_log
+                    return self._reject_choice("Invalid move selection!")
             except ValueError:
-                turn_log.append("Invalid command! Enter a move number or 'switch X'")
-                return turn_log
+                return self._reject_choice("Invalid command! Enter a move number or 'switch X'")
 
         # AI decision
-        ai_switch_index = self._ai_decide_switch()
-        ai_move_index = None
-        if ai_switch_index is None:
-            ai_move_index = self._ai_select_move(ai_pokemon, player_pokemon)
+        if self.ai_policy is not None:
+            ai_switch_index, ai_move_index = self.ai_policy(self, self.ai_team, self.player_team)
+        else:
+            ai_switch_index, ai_move_index = self._ai_choose_action(self.ai_team, self.player_team)
+
+        if self.replay_writer is not None:
+            self.replay_writer.record_turn((player_switch, player_move_index), (ai_switch_index, ai_move_index))
 
+        events = []
+        self._execute_turn(player_switch, player_move_index, ai_switch_index, ai_move_index, events)
+        return self._report(events)
+
+    def _reject_choice(self, reason: str) -> List[str]:
+        """Report an unusable player command; the turn passes without any action."""
+        if self.replay_writer is not None:
+            self.replay_writer.record_turn(None, None)
+        return self._report([InvalidChoiceEvent(reason)], log=False)
+
+    def _report(self, events: List, log: bool = True) -> List[str]:
+        """Send a turn's events to the sink and render them as messages for the battle log."""
+        if self.event_sink is not None:
+            for event in events:
+                self.event_sink(event)
+
+        turn_log = self.formatter.format_all(events)
+
+        # Add to battle log
+        if log and self.log_turns:
+            self.battle_log.extend(turn_log)
+        return turn_log
+
+    def play_turn(self, player_action: Action, ai_action: Action):
+        """Resolve a turn from already chosen (switch_index, move_index) actions.
+
+        No text is built; events are only created when an event sink is attached.
+        """
+        self.turn_count += 1
+        if self.replay_writer is not None:
+            self.replay_writer.record_turn(player_action, ai_action)
+
+        if self.event_sink is None:
+            self._execute_turn(player_action[0], player_action[1], ai_action[0], ai_action[1], None)
+            return
+
+        events = []
+        self._execute_turn(player_action[0], player_action[1], ai_action[0], ai_action[1], events)
+        for event in events:
+            self.event_sink(event)
+
+    def _execute_turn(self,
+                      player_switch: Optional[int],
+                      player_move_index: Optional[int],
+                      ai_switch_index: Optional[int],
+                      ai_move_index: Optional[int],
+                      events: Optional[List]):
+        """Resolve switches and moves for a turn; events are only recorded when a list is given."""
         # Handle switches first
         if player_switch is not None:
             if not self.player_team.switch_pokemon(player_switch):
-                turn_log.append("Can't switch to that Pokemon!")
-                return turn_log
-            player_pokemon = self.player_team.get_active_pokemon()
-            turn_log.append(f"You switched to {player_pokemon.name}!")
+                if events is not None:
+                    events.append(SwitchFailedEvent(PLAYER))
+                return
+            if events is not None:
+                events.append(SwitchEvent(PLAYER, self.player_team.get_active_pokemon(), False))
 
         if ai_switch_index is not None:
             self.ai_team.switch_pokemon(ai_switch_index)
-            ai_pokemon = self.ai_team.get_active_pokemon()
-            turn_log.append(f"Opponent switched to {ai_pokemon.name}!")
+            if events is not None:
+                events.append(SwitchEvent(AI, self.ai_team.get_active_pokemon(), False))
 
         # If both used moves, determine order
         if player_move_index is not None and ai_move_index is not None:
             # Check who goes first (higher speed)
-            if player_pokemon.stats["speed"] >= ai_pokemon.stats["speed"]:
-                # Player goes first
-                damage, message, _ = self._apply_move(player_pokemon, ai_pokemon, player_move_index)
-                turn_log.append(message)
-
-                # Check if AI Pokemon fainted
-                if ai_pokemon.is_fainted():
-                    turn_log.append(f"{ai_pokemon.name} fainted!")
-
-                    # AI sends out next Pokemon
-                    next_pokemon_index = self.ai_team.get_first_non_fainted()
-                    if next_pokemon_index >= 0:
-                        self.ai_team.switch_pokemon(next_pokemon_index)
-                        ai_pokemon = self.ai_team.get_active_pokemon()
-                        turn_log.append(f"Opponent sent out {ai_pokemon.name}!")
-                    else:
-                        turn_log.append("You defeated all of the opponent's Pokemon! You win!")
-                        return turn_log
-                else:
-                    # AI Pokemon attacks
-                    damage, message, _ = self._apply_move(ai_pokemon, player_pokemon, ai_move_index)
-                    turn_log.append(message)
-
-                    # Check if player Pokemon fainted
-                    if player_pokemon.is_fainted():
-                        turn_log.append(f"{player_pokemon.name} fainted!")
-
-                        # Check if player has more Pokemon
-                        next_pokemon_index = self.player_team.get_first_non_fainted()
-                        if next_pokemon_index >= 0:
-                            turn_log.append("Choose your next Pokemon!")
-                        else:
-                            turn_log.append("All your Pokemon have fainted! You lose!")
+            player_speed = self.player_team.get_active_pokemon().stats["speed"]
+            ai_speed = self.ai_team.get_active_pokemon().stats["speed"]
+            if player_speed >= ai_speed:
+                # Player goes first; the AI only attacks if its Pokemon survived
+                if not self._attack(PLAYER, player_move_index, events):
+                    self._attack(AI, ai_move_index, events)
             else:
-                # AI goes first
-                damage, message, _ = self._apply_move(ai_pokemon, player_pokemon, ai_move_index)
-                turn_log.append(message)
-
-                # Check if player Pokemon fainted
-                if player_pokemon.is_fainted():
-                    turn_log.append(f"{player_pokemon.name} fainted!")
-
-                    # Check if player has more Pokemon
-                    next_pokemon_index = self.player_team.get_first_non_fainted()
-                    if next_pokemon_index >= 0:
-                        turn_log.append("Choose your next Pokemon!")
-                    else:
-                        turn_log.append("All your Pokemon have fainted! You lose!")
-                        return turn_log
-                else:
-                    # Player Pokemon attacks
-                    damage, message, _ = self._apply_move(player_pokemon, ai_pokemon, player_move_index)
-                    turn_log.append(message)
-
-                    # Check if AI Pokemon fainted
-                    if ai_pokemon.is_fainted():
-                        turn_log.append(f"{ai_pokemon.name} fainted!")
-
-                        # AI sends out next Pokemon
-                        next_pokemon_index = self.ai_team.get_first_non_fainted()
-                        if next_pokemon_index >= 0:
-                            self.ai_team.switch_pokemon(next_pokemon_index)
-                            ai_pokemon = self.ai_team.get_active_pokemon()
-                            turn_log.append(f"Opponent sent out {ai_pokemon.name}!")
-                        else:
-                            turn_log.append("You defeated all of the opponent's Pokemon! You win!")
+                # AI goes first; the player only attacks if their Pokemon survived
+                if not self._attack(AI, ai_move_index, events):
+                    self._attack(PLAYER, player_move_index, events)
 
         # If only one side used a move (due to switching)
         elif player_move_index is not None:
-            damage, message, _ = self._apply_move(player_pokemon, ai_pokemon, player_move_index)
-            turn_log.append(message)
-
-            # Check if AI Pokemon fainted
-            if ai_pokemon.is_fainted():
-                turn_log.append(f"{ai_pokemon.name} fainted!")
-
-                # AI sends out next Pokemon
-                next_pokemon_index = self.ai_team.get_first_non_fainted()
-                if next_pokemon_index >= 0:
-                    self.ai_team.switch_pokemon(next_pokemon_index)
-                    ai_pokemon = self.ai_team.get_active_pokemon()
-                    turn_log.append(f"Opponent sent out {ai_pokemon.name}!")
-                else:
-                    turn_log.append("You defeated all of the opponent's Pokemon! You win!")
+            self._attack(PLAYER, player_move_index, events)
 
         elif ai_move_index is not None:
-            damage, message, _ = self._apply_move(ai_pokemon, player_pokemon, ai_move_index)
-            turn_log.append(message)
+            self._attack(AI, ai_move_index, events)
 
-            # Check if player Pokemon fainted
-            if player_pokemon.is_fainted():
-                turn_log.append(f"{player_pokemon.name} fainted!")
-
-                # Check if player has more Pokemon
-                next_pokemon_index = self.player_team.get_first_non_fainted()
-                if next_pokemon_index >= 0:
-                    turn_log.append("Choose your next Pokemon!")
-                else:
-                    turn_log.append("All your Pokemon have fainted! You lose!")
-
-        # Add to battle log
-        self.battle_log.extend(turn_log)
-        return turn_log
+    def _attack(self, side: int, move_index: int, events: Optional[List]) -> bool:
+        """The side's active Pokemon attacks. Returns True if the defending Pokemon fainted."""
+        if side == PLAYER:
+            attacking_team, defending_team = self.player_team, self.ai_team
+        else:
+            attacking_team, defending_team = self.ai_team, self.player_team
+        defender = defending_team.get_active_pokemon()
+
+        self._apply_move(attacking_team.get_active_pokemon(), defender, move_index, side, events)
+
+        # Check if the defending Pokemon fainted
+        if not defender.is_fainted():
+            return False
+
+        if events is not None:
+            events.append(FaintEvent(1 - side, defender))
+
+        next_pokemon_index = defending_team.get_first_non_fainted()
+        if next_pokemon_index < 0:
+            if events is not None:
+                events.append(BattleEndEvent("Player" if side == PLAYER else "AI"))
+        elif defending_team is self.ai_team:
+            # AI sends out next Pokemon
+            self.ai_team.switch_pokemon(next_pokemon_index)
+            if events is not None:
+                events.append(SwitchEvent(AI, self.ai_team.get_active_pokemon(), True))
+        elif events is not None:
+            # The player picks their next Pokemon on the following turn
+            events.append(AwaitSwitchEvent(PLAYER))
+        return True
+
+    def snapshot(self) -> BattleSnapshot:
+        """Capture the mutable battle state (turn count, active Pokemon, HP, status and PP).
+
+        The battle log and the random stream are not part of the snapshot.
+        """
+        return self.turn_count, _snapshot_team(self.player_team), _snapshot_team(self.ai_team)
+
+    def restore(self, snapshot: BattleSnapshot):
+        """Return the battle to a state captured by snapshot()."""
+        self.turn_count = snapshot[0]
+        _restore_team(self.player_team, snapshot[1])
+        _restore_team(self.ai_team, snapshot[2])
+
+    def clone(self, rng: Optional[random.Random] = None) -> "BattleEngine":
+        """Copy the battle, sharing species and move data but not HP, PP, the battle log or the event sink.
+
+        Without an explicit rng the clone continues from a copy of this engine's random stream.
+        """
+        if rng is None:
+            rng = self.rng
+            if isinstance(rng, random.Random):
+                rng = random.Random()
+                rng.setstate(self.rng.getstate())
+
+        clone = BattleEngine(self.player_team.clone(), self.ai_team.clone(), rng, self.ai_policy,
+                             log_turns=self.log_turns)
+        clone.turn_count = self.turn_count
+        clone._matchup_cache = self._matchup_cache
+        return clone
 
     def get_battle_status(self) -> Dict:
         """Get the current status of the battle."""
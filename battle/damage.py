@@ -0,0 +1,124 @@
+"""
+Damage calculation for the Pokemon Battle Simulator
+Scalar formula used by the battle engine plus a NumPy batch version for damage tables
+"""
+from typing import List, Sequence
+from battle.type_chart import EFFECTIVENESS, PAIR_COUNT, TYPE_IDS, defending_key
+from models.pokemon import Pokemon
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for the batch functions
+    np = None
+
+CATEGORY_IDS = {"status": 0, "physical": 1, "special": 2}
+
+# Move slots per Pokemon in damage tables; shorter movesets are padded with status moves
+MOVE_SLOTS = 4
+
+
+def calculate_damage(level: int, power: int, attack_stat: int, defense_stat: int,
+                     stab: bool, effectiveness: float, roll: float) -> int:
+    """Damage of a single damaging hit."""
+    # Base damage formula
+    # ((2 * Level / 5 + 2) * Power * A/D / 50) + 2
+    damage = ((2 * level / 5 + 2) * power * (attack_stat / defense_stat)) / 50 + 2
+
+    # Apply STAB (Same Type Attack Bonus)
+    if stab:
+        damage *= 1.5
+
+    # Apply type effectiveness and the random factor (85-100%)
+    damage *= effectiveness
+    damage *= roll
+
+    # Return integer damage (minimum 1)
+    return max(1, int(damage))
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for batch damage calculations")
+
+
+def calculate_damage_batch(levels, powers, attack_stats, defense_stats, stab,
+                           move_type_ids, defender_keys, categories, rolls,
+                           exact: bool = True):
+    """Damage for many hits at once.
+
+    All arguments are broadcastable arrays: move_type_ids index TYPES (-1 for an
+    unknown type), defender_keys come from defending_key and categories from
+    CATEGORY_IDS. With exact set the arithmetic runs in float64 in the same order
+    as calculate_damage, so every value matches the scalar path; otherwise float32
+    is used, which is faster but may be one point off at rounding boundaries.
+    """
+    _require_numpy()
+    dtype = np.float64 if exact else np.float32
+
+    move_type_ids = np.asarray(move_type_ids)
+    table = np.frombuffer(EFFECTIVENESS, dtype=np.float64).astype(dtype, copy=False)
+    effectiveness = np.where(
+        move_type_ids >= 0,
+        table[np.maximum(move_type_ids, 0) * PAIR_COUNT + np.asarray(defender_keys)],
+        dtype(1.0)
+    )
+
+    levels = np.asarray(levels, dtype=dtype)
+    damage = ((2 * levels / 5 + 2) * np.asarray(powers, dtype=dtype)
+              * (np.asarray(attack_stats, dtype=dtype) / np.asarray(defense_stats, dtype=dtype))) / 50 + 2
+    damage = np.where(np.asarray(stab, dtype=bool), damage * dtype(1.5), damage)
+    damage = damage * effectiveness
+    damage = damage * np.asarray(rolls, dtype=dtype)
+
+    damage = np.maximum(1, damage.astype(np.int64))
+    return np.where(np.asarray(categories) == CATEGORY_IDS["status"], 0, damage)
+
+
+def damage_table(attackers: List[Pokemon], defenders: List[Pokemon],
+                 rolls: Sequence[float] = (0.85, 1.0), exact: bool = True):
+    """Damage of every attacker move against every defender for each roll.
+
+    Returns an int64 array shaped (attackers, MOVE_SLOTS, defenders, rolls).
+    """
+    _require_numpy()
+    attacker_count = len(attackers)
+
+    levels = np.empty(attacker_count)
+    powers = np.zeros((attacker_count, MOVE_SLOTS))
+    move_types = np.full((attacker_count, MOVE_SLOTS), -1)
+    categories = np.zeros((attacker_count, MOVE_SLOTS), dtype=np.int64)
+    stab = np.zeros((attacker_count, MOVE_SLOTS), dtype=bool)
+    physical_attack = np.empty(attacker_count)
+    special_attack = np.empty(attacker_count)
+
+    for i, attacker in enumerate(attackers):
+        levels[i] = attacker.level
+        physical_attack[i] = attacker.stats["attack"]
+        special_attack[i] = attacker.stats["special-attack"]
+        for j, move in enumerate(attacker.moves[:MOVE_SLOTS]):
+            powers[i, j] = move.power
+            move_types[i, j] = TYPE_IDS.get(move.type, -1)
+            categories[i, j] = CATEGORY_IDS.get(move.category, 0)
+            stab[i, j] = move.type in attacker.types
+
+    defender_keys = np.array([defending_key(defender.types) for defender in defenders])
+    physical_defense = np.array([defender.stats["defense"] for defender in defenders], dtype=float)
+    special_defense = np.array([defender.stats["special-defense"] for defender in defenders], dtype=float)
+
+    # Broadcast to (attacker, move, defender, roll)
+    physical = (categories == CATEGORY_IDS["physical"])[:, :, None, None]
+    attack_stats = np.where(physical, physical_attack[:, None, None, None], special_attack[:, None, None, None])
+    defense_stats = np.where(physical, physical_defense[None, None, :, None], special_defense[None, None, :, None])
+
+    return calculate_damage_batch(
+        levels[:, None, None, None],
+        powers[:, :, None, None],
+        attack_stats,
+        defense_stats,
+        stab[:, :, None, None],
+        move_types[:, :, None, None],
+        defender_keys[None, None, :, None],
+        categories[:, :, None, None],
+        np.asarray(rolls, dtype=float)[None, None, None, :],
+        exact=exact
+    )
@@ -0,0 +1,84 @@
+"""
+Battle events for the Pokemon Battle Simulator
+Typed records of what happened in a turn, emitted by BattleEngine instead of text
+"""
+from typing import Callable, List, NamedTuple, Optional
+from models.move import Move
+from models.pokemon import Pokemon
+
+# Sides of the battle
+PLAYER = 0
+AI = 1
+
+
+class InvalidChoiceEvent(NamedTuple):
+    """The player's command could not be used."""
+    reason: str
+
+
+class SwitchEvent(NamedTuple):
+    """A side brought in another Pokemon; forced is set when it replaced a fainted one."""
+    side: int
+    pokemon: Pokemon
+    forced: bool
+
+
+class SwitchFailedEvent(NamedTuple):
+    """A switch was refused (e.g. the target has fainted)."""
+    side: int
+
+
+class MoveEvent(NamedTuple):
+    """A move hit; damage is 0 for status moves."""
+    side: int
+    attacker: Pokemon
+    move: Move
+    defender: Pokemon
+    damage: int
+    effectiveness: float
+
+
+class MissEvent(NamedTuple):
+    """A move missed."""
+    side: int
+    attacker: Pokemon
+    move: Move
+
+
+class FaintEvent(NamedTuple):
+    """A Pokemon fainted."""
+    side: int
+    pokemon: Pokemon
+
+
+class AwaitSwitchEvent(NamedTuple):
+    """The side must choose its next Pokemon."""
+    side: int
+
+
+class BattleEndEvent(NamedTuple):
+    """The battle is over; winner is "Player" or "AI"."""
+    winner: str
+
+
+# A sink receives every event as it is emitted
+EventSink = Callable[[NamedTuple], None]
+
+
+class ListSink:
+    """Event sink that keeps every event in a list, optionally bounded to the most recent ones."""
+
+    def __init__(self, max_events: Optional[int] = None):
+        """Initialize an empty sink."""
+        self.events: List[NamedTuple] = []
+        self.max_events = max_events
+
+    def __call__(self, event: NamedTuple):
+        """Record an event."""
+        self.events.append(event)
+        if self.max_events is not None and len(self.events) > self.max_events:
+            del self.events[:len(self.events) - self.max_events]
+
+    def clear(self):
+        """Forget all recorded events."""
+        self.events.clear()
@@ -0,0 +1,67 @@
+"""
+Text rendering of battle events for the Pokemon Battle Simulator
+"""
+from typing import Iterable, List, NamedTuple
+from battle.events import (PLAYER, AwaitSwitchEvent, BattleEndEvent, FaintEvent, InvalidChoiceEvent,
+                           MissEvent, MoveEvent, SwitchEvent, SwitchFailedEvent)
+
+
+class TextFormatter:
+    """Renders battle events as the messages shown to the player."""
+
+    def format(self, event: NamedTuple) -> str:
+        """Render a single event."""
+        if isinstance(event, MoveEvent):
+            return self._format_move(event)
+        if isinstance(event, MissEvent):
+            return f"{event.attacker.name}'s {event.move.name} missed!"
+        if isinstance(event, FaintEvent):
+            return f"{event.pokemon.name} fainted!"
+        if isinstance(event, SwitchEvent):
+            if event.side == PLAYER:
+                return f"You switched to {event.pokemon.name}!"
+            if event.forced:
+                return f"Opponent sent out {event.pokemon.name}!"
+            return f"Opponent switched to {event.pokemon.name}!"
+        if isinstance(event, AwaitSwitchEvent):
+            return "Choose your next Pokemon!"
+        if isinstance(event, BattleEndEvent):
+            if event.winner == "Player":
+                return "You defeated all of the opponent's Pokemon! You win!"
+            return "All your Pokemon have fainted! You lose!"
+        if isinstance(event, SwitchFailedEvent):
+            return "Can't switch to that Pokemon!"
+        if isinstance(event, InvalidChoiceEvent):
+            return event.reason
+        raise ValueError(f"Unknown battle event: {event!r}")
+
+    def format_all(self, events: Iterable[NamedTuple]) -> List[str]:
+        """Render a sequence of events."""
+        return [self.format(event) for event in events]
+
+    @staticmethod
+    def _format_move(event: MoveEvent) -> str:
+        message = f"{event.attacker.name} used {event.move.name}!"
+
+        # Status moves only announce themselves
+        if event.move.category not in ["physical", "special"]:
+            return message
+
+        # Determine effectiveness message
+        effectiveness = event.effectiveness
+        if effectiveness > 1.5:
+            effect_msg = "It's super effective!"
+        elif effectiveness < 0.5:
+            effect_msg = "It's not very effective..."
+        elif effectiveness == 0:
+            effect_msg = "It has no effect..."
+        else:
+            effect_msg = ""
+
+        if effect_msg:
+            message += f" {effect_msg}"
+
+        if event.damage > 0:
+            message += f" {event.defender.name} lost {event.damage} HP!"
+
+        return message
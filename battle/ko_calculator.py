@@ -0,0 +1,183 @@
+"""
+KO calculator for the Pokemon Battle Simulator
+Exact damage distributions, hit chances and multi-turn KO probabilities for the
+damage formula in battle.damage, without sampling
+"""
+import argparse
+import math
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+from battle.type_chart import type_effectiveness
+from models.pokemon import Pokemon
+
+# The damage roll is uniform on [ROLL_MIN, ROLL_MAX), as random.uniform draws it
+ROLL_MIN = 0.85
+ROLL_MAX = 1.0
+
+# (damage, probability) pairs in increasing damage order
+Distribution = Tuple[Tuple[int, float], ...]
+
+
+@lru_cache(maxsize=65536)
+def roll_distribution(level: int, power: int, attack_stat: int, defense_stat: int,
+                      stab: bool, effectiveness: float) -> Distribution:
+    """Distribution of calculate_damage over the damage roll, for a hit that lands.
+
+    int(base * roll) equals k for rolls in [k / base, (k + 1) / base), so each
+    damage value's probability is the length of that interval inside the roll
+    range. Results are memoized, since whole tables repeat the same stat lines.
+    """
+    # Same operations and order as calculate_damage, without the roll
+    base = ((2 * level / 5 + 2) * power * (attack_stat / defense_stat)) / 50 + 2
+    if stab:
+        base *= 1.5
+    base *= effectiveness
+    if base <= 0:
+        return ((1, 1.0),)
+
+    width = ROLL_MAX - ROLL_MIN
+    probabilities = {}
+    for k in range(int(base * ROLL_MIN), math.ceil(base * ROLL_MAX)):
+        low = max(ROLL_MIN, k / base)
+        high = min(ROLL_MAX, (k + 1) / base)
+        if high > low:
+            damage = max(1, k)
+            probabilities[damage] = probabilities.get(damage, 0.0) + (high - low) / width
+    return tuple(sorted(probabilities.items()))
+
+
+def hit_chance(accuracy: float) -> float:
+    """Chance that a move with the given accuracy hits (the engine rolls uniformly on 0-100)."""
+    return min(max(accuracy, 0), 100) / 100
+
+
+@lru_cache(maxsize=65536)
+def _ko_chances(distribution: Distribution, hit: float, hp: int, uses: int) -> Tuple[float, ...]:
+    # alive[d]: chance the defender is still standing with d damage taken
+    alive = [0.0] * hp
+    alive[0] = 1.0
+    chances = []
+    knocked_out = 0.0
+    for _ in range(uses):
+        after = [probability * (1 - hit) for probability in alive]
+        for taken, probability in enumerate(alive):
+            if probability == 0.0:
+                continue
+            for damage, damage_probability in distribution:
+                chance = probability * hit * damage_probability
+                if taken + damage >= hp:
+                    knocked_out += chance
+                else:
+                    after[taken + damage] += chance
+        alive = after
+        chances.append(min(1.0, knocked_out))
+    return tuple(chances)
+
+
+class DamageOdds:
+    """Damage distribution and KO chances of one move against one defender."""
+
+    __slots__ = ("move", "distribution", "hit_chance", "hp", "max_hp", "ko_chances")
+
+    def __init__(self, move: str, distribution: Distribution, hit_chance: float, hp: int, max_hp: int, uses: int):
+        """Initialize from a hit's damage distribution; KO chances cover 1 to uses uses of the move."""
+        self.move = move
+        self.distribution = distribution
+        self.hit_chance = hit_chance
+        self.hp = hp
+        self.max_hp = max_hp
+        self.ko_chances = list(_ko_chances(distribution, hit_chance, hp, uses)) if hp > 0 else [1.0] * uses
+
+    @property
+    def min_damage(self) -> int:
+        """Lowest damage of a hit."""
+        return self.distribution[0][0]
+
+    @property
+    def max_damage(self) -> int:
+        """Highest damage of a hit."""
+        return self.distribution[-1][0]
+
+    @property
+    def expected_damage(self) -> float:
+        """Mean damage per use, misses included."""
+        return self.hit_chance * sum(damage * probability for damage, probability in self.distribution)
+
+    def ko_chance(self, uses: int = 1) -> float:
+        """Chance the defender has fainted after at most uses uses of the move (1 = OHKO, 2 = 2HKO, ...)."""
+        return self.ko_chances[uses - 1]
+
+    def __str__(self) -> str:
+        """One-line summary with the damage range as a share of max HP."""
+        kos = ", ".join(f"{uses}HKO {chance:.1%}" for uses, chance in enumerate(self.ko_chances, 1))
+        return (f"{self.move}: {self.min_damage}-{self.max_damage} "
+                f"({self.min_damage / self.max_hp:.1%}-{self.max_damage / self.max_hp:.1%}), "
+                f"{self.hit_chance:.0%} to hit, {kos}")
+
+
+def damage_odds(attacker: Pokemon, defender: Pokemon, move_index: int, uses: int = 3,
+                hp: Optional[int] = None) -> Optional[DamageOdds]:
+    """Odds of attacker's move against defender at hp (default its current HP); None for status moves."""
+    move = attacker.moves[move_index]
+    if move.category not in ("physical", "special"):
+        return None
+    if move.category == "physical":
+        attack_stat, defense_stat = attacker.stats["attack"], defender.stats["defense"]
+    else:
+        attack_stat, defense_stat = attacker.stats["special-attack"], defender.stats["special-defense"]
+
+    distribution = roll_distribution(attacker.level, move.power, attack_stat, defense_stat,
+                                     move.type in attacker.types, type_effectiveness(move.type, defender.types))
+    hp = defender.current_hp if hp is None else hp
+    return DamageOdds(move.name, distribution, hit_chance(move.accuracy), hp, defender.stats["hp"], uses)
+
+
+def odds_table(attackers: Sequence[Pokemon], defenders: Sequence[Pokemon],
+               uses: int = 3) -> List[List[List[DamageOdds]]]:
+    """Odds of every damaging move of every attacker against every defender at full HP.
+
+    Indexed [attacker][defender] with one entry per damaging move. Repeated stat
+    lines and KO computations are served from the memoized distributions.
+    """
+    return [[[odds for odds in (damage_odds(attacker, defender, index, uses, defender.stats["hp"])
+                                for index in range(len(attacker.moves))) if odds is not None]
+             for defender in defenders]
+            for attacker in attackers]
+
+
+def main(argv=None):
+    from data.cache import PokeAPICache, DEFAULT_CACHE_PATH
+    from data.pokeapi import PokeAPIClient
+    from data.pokedex import LocalPokedex, LocalPokedexClient
+
+    parser = argparse.ArgumentParser(description="Exact damage ranges and KO chances between Pokemon")
+    parser.add_argument("attackers", help="Comma-separated attacking species")
+    parser.add_argument("defenders", help="Comma-separated defending species")
+    parser.add_argument("--uses", type=int, default=3, help="Show KO chances up to this many uses of a move")
+    parser.add_argument("--pokedex", help="Serve Pokemon data from an imported local Pokedex store")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--offline", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.pokedex:
+        api_client = LocalPokedexClient(LocalPokedex(args.pokedex))
+    else:
+        api_client = PokeAPIClient(cache=PokeAPICache(args.cache), offline=args.offline)
+
+    attacker_names = [name.strip() for name in args.attackers.split(",")]
+    defender_names = [name.strip() for name in args.defenders.split(",")]
+    pokemon = api_client.get_many_pokemon(attacker_names + defender_names)
+    missing = [name for name, member in zip(attacker_names + defender_names, pokemon) if member is None]
+    if missing:
+        parser.error(f"couldn't load {', '.join(missing)}")
+    attackers, defenders = pokemon[:len(attacker_names)], pokemon[len(attacker_names):]
+
+    for attacker, row in zip(attackers, odds_table(attackers, defenders, args.uses)):
+        for defender, moves in zip(defenders, row):
+            print(f"{attacker.name} vs {defender.name} ({defender.stats['hp']} HP)")
+            for odds in moves:
+                print(f"  {odds}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Battle metrics for the Pokemon Battle Simulator
+Opt-in phase timers, counters and cache hit rates for BattleEngine
+"""
+import time
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+# Engine methods timed per phase; ai_decision (the built-in AI) includes the switch decision and move selection
+PHASES = {
+    "ai_decision": "_ai_choose_action",
+    "switch_decision": "_ai_decide_switch",
+    "move_selection": "_ai_select_move",
+    "damage": "_calculate_damage",
+    "turn": "_execute_turn"
+}
+
+
+class BattleMetrics:
+    """Collects timings and counters from the engines it is attached to.
+
+    Attaching wraps the measured methods on that engine instance only, so an
+    engine without metrics runs exactly the same code as before. One BattleMetrics
+    may be attached to many engines to aggregate over a simulation run.
+    """
+
+    def __init__(self, api_client=None, clock: Callable[[], float] = time.perf_counter):
+        """Initialize empty metrics; api_client (PokeAPIClient) adds its cache statistics to snapshots."""
+        self.api_client = api_client
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        """Zero every timer and counter."""
+        self.timers: Dict[str, list] = {phase: [0, 0.0] for phase in list(PHASES) + ["ai_policy"]}
+        self.counters: Dict[str, int] = {
+            "battles": 0, "moves": 0, "misses": 0, "faints": 0, "damage_dealt": 0,
+            "matchup_cache_hits": 0, "matchup_cache_misses": 0
+        }
+
+    def attach(self, engine):
+        """Instrument an engine; a custom AI policy is timed separately as ai_policy."""
+        self.counters["battles"] += 1
+        for phase, name in PHASES.items():
+            setattr(engine, name, self._timed(phase, getattr(engine, name)))
+        if engine.ai_policy is not None:
+            engine.ai_policy = self._timed("ai_policy", engine.ai_policy)
+
+        counters = self.counters
+        roll_hit = engine._roll_hit
+        apply_move = engine._apply_move
+        attack = engine._attack
+        static_matchup_score = engine._static_matchup_score
+
+        @wraps(roll_hit)
+        def counted_roll_hit(move):
+            hit = roll_hit(move)
+            counters["moves"] += 1
+            if not hit:
+                counters["misses"] += 1
+            return hit
+
+        @wraps(apply_move)
+        def counted_apply_move(*args, **kwargs):
+            damage, effectiveness = apply_move(*args, **kwargs)
+            counters["damage_dealt"] += damage
+            return damage, effectiveness
+
+        @wraps(attack)
+        def counted_attack(*args, **kwargs):
+            fainted = attack(*args, **kwargs)
+            if fainted:
+                counters["faints"] += 1
+            return fainted
+
+        @wraps(static_matchup_score)
+        def counted_static_matchup_score(pokemon1, pokemon2):
+            cached = len(engine._matchup_cache)
+            score = static_matchup_score(pokemon1, pokemon2)
+            if len(engine._matchup_cache) == cached:
+                counters["matchup_cache_hits"] += 1
+            else:
+                counters["matchup_cache_misses"] += 1
+            return score
+
+        engine._roll_hit = counted_roll_hit
+        engine._apply_move = counted_apply_move
+        engine._attack = counted_attack
+        engine._static_matchup_score = counted_static_matchup_score
+        engine.metrics = self
+
+    def _timed(self, phase: str, function: Callable) -> Callable:
+        timer = self.timers[phase]
+        clock = self.clock
+
+        @wraps(function)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timer[0] += 1
+                timer[1] += clock() - start
+        return timed
+
+    def snapshot(self) -> Dict:
+        """Current metrics as a plain dictionary (safe to serialize as JSON)."""
+        counters = dict(self.counters, turns=self.timers["turn"][0])
+        snapshot = {
+            "timers": {
+                phase: {"calls": calls, "total_seconds": total, "mean_seconds": total / calls if calls else 0.0}
+                for phase, (calls, total) in self.timers.items()
+            },
+            "counters": counters,
+            "matchup_cache_hit_rate": _rate(counters["matchup_cache_hits"], counters["matchup_cache_misses"])
+        }
+
+        if self.api_client is not None:
+            cache = self.api_client.cache
+            snapshot["api_client"] = {
+                "network_requests": self.api_client.network_requests,
+                "cache_hits": cache.hits if cache is not None else 0,
+                "cache_misses": cache.misses if cache is not None else 0,
+                "cache_hit_rate": _rate(cache.hits, cache.misses) if cache is not None else None
+            }
+        return snapshot
+
+
+def _rate(hits: int, misses: int) -> Optional[float]:
+    total = hits + misses
+    return hits / total if total else None
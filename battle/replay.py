@@ -0,0 +1,254 @@
+"""
+Binary battle replays for the Pokemon Battle Simulator
+Append-only record of seeds, team definitions and per-turn choices that can be re-run exactly
+
+File layout (little-endian): the header b"PBSR" + version byte, then a stream of records:
+    GAME  tag, seed (u64), player team, AI team
+          team = count (u8), then per Pokemon: species id (u16), level (u8), move count (u8), move ids (u16 each)
+    TURN  tag, player action (u8), AI action (u8)
+          action = move index, or SWITCH_FLAG | switch index, or NO_ACTION for a turn without one
+    END   tag, winner (u8: 0 draw, 1 player, 2 AI), turn count (u32), CRC32 of the final HP of every Pokemon (u32)
+"""
+import os
+import random
+import struct
+import zlib
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple
+from battle.battle_engine import Action, BattleEngine
+from models.pokemon import Pokemon
+from models.team import PokemonTeam
+
+MAGIC = b"PBSR"
+VERSION = 1
+
+GAME_TAG = 1
+TURN_TAG = 2
+END_TAG = 3
+
+SWITCH_FLAG = 0x80
+NO_ACTION = 0xFF
+
+WINNER_CODES = {None: 0, "Player": 1, "AI": 2}
+WINNERS = {code: winner for winner, code in WINNER_CODES.items()}
+
+_SEED = struct.Struct("<Q")
+_POKEMON = struct.Struct("<HBB")
+_TURN = struct.Struct("<BBB")
+_END = struct.Struct("<BBII")
+
+# (species id, level, move ids) for one team member
+PokemonDefinition = Tuple[int, int, Tuple[int, ...]]
+
+# Builds a Pokemon from its definition when a replay is re-run
+PokemonFactory = Callable[[int, int, Tuple[int, ...]], Pokemon]
+
+
+class ReplayError(ValueError):
+    """Raised for malformed replay files or replays that don't reproduce."""
+
+
+def encode_action(action: Optional[Action]) -> int:
+    """Pack a (switch_index, move_index) action into one byte."""
+    if action is None:
+        return NO_ACTION
+    switch_index, move_index = action
+    if switch_index is not None:
+        return SWITCH_FLAG | switch_index
+    if move_index is not None:
+        return move_index
+    return NO_ACTION
+
+
+def decode_action(code: int) -> Optional[Action]:
+    """Unpack an action byte written by encode_action."""
+    if code == NO_ACTION:
+        return None
+    if code & SWITCH_FLAG:
+        return code & ~SWITCH_FLAG, None
+    return None, code
+
+
+def state_checksum(engine: BattleEngine) -> int:
+    """CRC32 of the current HP of every Pokemon on both teams."""
+    hp = [pokemon.current_hp for team in (engine.player_team, engine.ai_team) for pokemon in team.pokemon]
+    return zlib.crc32(struct.pack(f"<{len(hp)}i", *hp))
+
+
+def team_definition(team: PokemonTeam) -> List[PokemonDefinition]:
+    """Describe a team by species and move ids."""
+    return [(pokemon.id, pokemon.level, tuple(move.id for move in pokemon.moves)) for pokemon in team.pokemon]
+
+
+class ReplayWriter:
+    """Streams games into a replay file.
+
+    Call begin_game() before the first turn, attach the writer to the engine
+    (BattleEngine.replay_writer) so each turn is recorded, and end_game() once the
+    battle is over. The stream may be any binary file object, e.g. gzip.open(path, "ab").
+    """
+
+    def __init__(self, stream: BinaryIO, write_header: bool = True):
+        """Initialize on an open binary stream, writing the file header unless appending."""
+        self.stream = stream
+        self.in_game = False
+        if write_header:
+            self.stream.write(MAGIC + bytes([VERSION]))
+
+    @classmethod
+    def open(cls, path: str) -> "ReplayWriter":
+        """Open a replay file for appending, creating it with a header if needed."""
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        return cls(open(path, "ab"), write_header=is_new)
+
+    def begin_game(self, seed: int, player_team: PokemonTeam, ai_team: PokemonTeam):
+        """Start a game record; the engine must use random.Random(seed)."""
+        if self.in_game:
+            raise ReplayError("The previous game was not ended")
+
+        parts = [bytes([GAME_TAG]), _SEED.pack(seed)]
+        for team in (player_team, ai_team):
+            members = team_definition(team)
+            parts.append(bytes([len(members)]))
+            for species_id, level, move_ids in members:
+                parts.append(_POKEMON.pack(species_id, level, len(move_ids)))
+                parts.append(struct.pack(f"<{len(move_ids)}H", *move_ids))
+        self.stream.write(b"".join(parts))
+        self.in_game = True
+
+    def record_turn(self, player_action: Optional[Action], ai_action: Optional[Action]):
+        """Record the actions of one turn (None for a turn where a side did nothing)."""
+        self.stream.write(_TURN.pack(TURN_TAG, encode_action(player_action), encode_action(ai_action)))
+
+    def end_game(self, engine: BattleEngine):
+        """Close the current game record with the engine's outcome."""
+        if not self.in_game:
+            return
+        self.stream.write(_END.pack(END_TAG, WINNER_CODES[engine.get_winner()], engine.turn_count,
+                                    state_checksum(engine)))
+        self.in_game = False
+
+    def close(self):
+        """Flush and close the underlying stream."""
+        self.stream.close()
+
+
+class ReplayGame:
+    """A game read back from a replay file."""
+
+    def __init__(self, seed: int, player_team: List[PokemonDefinition], ai_team: List[PokemonDefinition]):
+        """Initialize with the seed and team definitions."""
+        self.seed = seed
+        self.player_team = player_team
+        self.ai_team = ai_team
+        self.turns: List[Tuple[Optional[Action], Optional[Action]]] = []
+        self.winner: Optional[str] = None
+        self.turn_count = 0
+        self.checksum = 0
+
+
+class ReplayReader:
+    """Reads games one at a time from a replay stream."""
+
+    def __init__(self, stream: BinaryIO):
+        """Initialize on an open binary stream positioned at the file header."""
+        self.stream = stream
+        header = stream.read(len(MAGIC) + 1)
+        if header[:len(MAGIC)] != MAGIC:
+            raise ReplayError("Not a battle replay file")
+        if header[len(MAGIC)] != VERSION:
+            raise ReplayError(f"Unsupported replay version {header[len(MAGIC)]}")
+
+    def __iter__(self) -> Iterator[ReplayGame]:
+        """Yield every complete game in the stream."""
+        game = None
+        while True:
+            tag = self.stream.read(1)
+            if not tag:
+                return
+
+            if tag[0] == GAME_TAG:
+                seed = _SEED.unpack(self._read(_SEED.size))[0]
+                game = ReplayGame(seed, self._read_team(), self._read_team())
+            elif tag[0] == TURN_TAG:
+                if game is None:
+                    raise ReplayError("Turn record outside of a game")
+                player_code, ai_code = self._read(2)
+                game.turns.append((decode_action(player_code), decode_action(ai_code)))
+            elif tag[0] == END_TAG:
+                if game is None:
+                    raise ReplayError("End record outside of a game")
+                winner_code, game.turn_count, game.checksum = struct.unpack("<BII", self._read(_END.size - 1))
+                game.winner = WINNERS[winner_code]
+                yield game
+                game = None
+            else:
+                raise ReplayError(f"Unknown record tag {tag[0]}")
+
+    def _read(self, size: int) -> bytes:
+        data = self.stream.read(size)
+        if len(data) != size:
+            raise ReplayError("Truncated replay file")
+        return data
+
+    def _read_team(self) -> List[PokemonDefinition]:
+        team = []
+        for _ in range(self._read(1)[0]):
+            species_id, level, move_count = _POKEMON.unpack(self._read(_POKEMON.size))
+            move_ids = struct.unpack(f"<{move_count}H", self._read(2 * move_count))
+            team.append((species_id, level, move_ids))
+        return team
+
+
+def pokemon_factory_from_teams(teams: List[PokemonTeam]) -> PokemonFactory:
+    """Factory that hands out fresh copies of the Pokemon found in teams."""
+    library = {}
+    for team in teams:
+        for pokemon in team.pokemon:
+            library[(pokemon.id, tuple(move.id for move in pokemon.moves))] = pokemon
+
+    def factory(species_id: int, level: int, move_ids: Tuple[int, ...]) -> Pokemon:
+        source = library.get((species_id, tuple(move_ids)))
+        if source is None:
+            raise ReplayError(f"No Pokemon with species {species_id} and moves {move_ids} available")
+        pokemon = source.clone()
+        pokemon.level = level
+        pokemon.reset()
+        return pokemon
+
+    return factory
+
+
+def build_team(definition: List[PokemonDefinition], factory: PokemonFactory, name: str) -> PokemonTeam:
+    """Rebuild a team from its definition."""
+    team = PokemonTeam(name)
+    for species_id, level, move_ids in definition:
+        team.add_pokemon(factory(species_id, level, move_ids))
+    return team
+
+
+def replay_game(game: ReplayGame, factory: PokemonFactory, verify: bool = True) -> BattleEngine:
+    """Re-run a recorded game and return the finished engine.
+
+    With verify set a ReplayError is raised if the outcome differs from the recording.
+    """
+    engine = BattleEngine(
+        build_team(game.player_team, factory, "Player's Team"),
+        build_team(game.ai_team, factory, "Champion Team"),
+        rng=random.Random(game.seed)
+    )
+
+    for player_action, ai_action in game.turns:
+        if player_action is None and ai_action is None:
+            engine.turn_count += 1
+        else:
+            engine.play_turn(player_action or (None, None), ai_action or (None, None))
+
+    if verify and (engine.get_winner() != game.winner
+                   or engine.turn_count != game.turn_count
+                   or state_checksum(engine) != game.checksum):
+        raise ReplayError(
+            f"Replay diverged: recorded {game.winner} after {game.turn_count} turns "
+            f"(HP checksum {game.checksum:08x}), got {engine.get_winner()} after {engine.turn_count} turns "
+            f"(HP checksum {state_checksum(engine):08x})"
+        )
+    return engine
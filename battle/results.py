@@ -0,0 +1,298 @@
+"""
+Battle results for the Pokemon Battle Simulator
+Streams per-battle outcomes into chunked columnar NPZ files with bounded memory,
+and summarizes win rates and species/move usage over them chunk by chunk
+
+Each chunk-NNNNNN.npz holds one row per battle in these columns, indexed by side
+(player, AI), team slot and move slot; empty slots have id 0:
+
+    winner   int8   (battles,)           0 draw, 1 player, 2 AI (as in battle.replay)
+    turns    int32  (battles,)
+    species  int32  (battles, 2, 6)      species ids
+    hp       int32  (battles, 2, 6)      HP left at the end
+    max_hp   int32  (battles, 2, 6)
+    moves    int32  (battles, 2, 6, 4)   move ids
+    uses     int32  (battles, 2, 6, 4)   times each move was used, hit or miss
+
+plus species_ids/species_names and move_ids/move_names tables for the ids seen in the chunk.
+"""
+import argparse
+import glob
+import os
+from functools import wraps
+from typing import Dict, List, Tuple
+from battle.events import AI, PLAYER
+from battle.replay import WINNER_CODES
+from models.team import PokemonTeam
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed to write or read result files
+    np = None
+
+TEAM_SLOTS = 6
+MOVE_SLOTS = 4
+DEFAULT_CHUNK_SIZE = 65536
+CHUNK_PATTERN = "chunk-{:06d}.npz"
+
+# Column name: (dtype name, shape of one row)
+COLUMNS = {
+    "winner": ("int8", ()),
+    "turns": ("int32", ()),
+    "species": ("int32", (2, TEAM_SLOTS)),
+    "hp": ("int32", (2, TEAM_SLOTS)),
+    "max_hp": ("int32", (2, TEAM_SLOTS)),
+    "moves": ("int32", (2, TEAM_SLOTS, MOVE_SLOTS)),
+    "uses": ("int32", (2, TEAM_SLOTS, MOVE_SLOTS))
+}
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for battle result files")
+
+
+def chunk_paths(directory: str) -> List[str]:
+    """Chunk files in a result directory, in the order they were written."""
+    return sorted(glob.glob(os.path.join(directory, "chunk-*.npz")))
+
+
+class ResultWriter:
+    """Buffers battle records and writes them out as a new chunk every chunk_size battles.
+
+    Memory use is bounded by one chunk of preallocated columns. Writing into a
+    directory that already has chunks appends after them. Use attach() and add()
+    around a BattleEngine battle (run_battle does this when given a writer), or
+    add_batch() for a finished battle.batched.BatchedBattles.
+    """
+
+    def __init__(self, directory: str, chunk_size: int = DEFAULT_CHUNK_SIZE, compress: bool = True):
+        """Open a result directory, creating it if needed."""
+        _require_numpy()
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.compress = compress
+        self.chunk_index = len(chunk_paths(directory))
+        self.battles = 0
+        self.columns = {name: np.zeros((chunk_size,) + shape, dtype=dtype) for name, (dtype, shape) in COLUMNS.items()}
+        self.rows = 0
+        self.species_names: Dict[int, str] = {}
+        self.move_names: Dict[int, str] = {}
+        self._uses = np.zeros((2, TEAM_SLOTS, MOVE_SLOTS), dtype=np.int32)
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def attach(self, engine):
+        """Start recording a battle: counts the moves the engine's Pokemon use from now on."""
+        uses = self._uses
+        uses[...] = 0
+        attack = engine._attack
+
+        @wraps(attack)
+        def counted_attack(side, move_index, events):
+            team = engine.player_team if side == PLAYER else engine.ai_team
+            uses[side, team.active_pokemon_index, move_index] += 1
+            return attack(side, move_index, events)
+
+        engine._attack = counted_attack
+
+    def add(self, engine):
+        """Record the outcome of a finished (or abandoned) battle on an attached engine."""
+        row = self.rows
+        columns = self.columns
+        columns["winner"][row] = WINNER_CODES[engine.get_winner()]
+        columns["turns"][row] = engine.turn_count
+        for side, team in ((PLAYER, engine.player_team), (AI, engine.ai_team)):
+            self._add_team(row, side, team)
+        columns["uses"][row] = self._uses
+        self._uses[...] = 0
+        self._advance(1)
+
+    def _add_team(self, row: int, side: int, team: PokemonTeam):
+        columns = self.columns
+        columns["species"][row, side], columns["moves"][row, side] = self._team_ids(team)
+        members = team.pokemon[:TEAM_SLOTS]
+        padding = [0] * (TEAM_SLOTS - len(members))
+        columns["hp"][row, side] = [pokemon.current_hp for pokemon in members] + padding
+        columns["max_hp"][row, side] = [pokemon.stats["hp"] for pokemon in members] + padding
+
+    def add_batch(self, battles):
+        """Record every battle of a finished battle.batched.BatchedBattles."""
+        team_ids = [self._team_ids(team) for team in battles.teams]
+        real = battles.real_slots
+        columns = {
+            "winner": battles.winners(),
+            "turns": battles.turns,
+            "species": np.array([species for species, _ in team_ids])[battles.team_order],
+            "hp": np.where(real, battles.hp, 0),
+            "max_hp": np.where(real, battles.stats[..., 0], 0),
+            "moves": np.array([moves for _, moves in team_ids])[battles.team_order],
+            "uses": battles.uses
+        }
+        start = 0
+        while start < battles.count:
+            take = min(battles.count - start, self.chunk_size - self.rows)
+            for name, values in columns.items():
+                self.columns[name][self.rows:self.rows + take] = values[start:start + take]
+            self._advance(take)
+            start += take
+
+    def _team_ids(self, team: PokemonTeam) -> Tuple:
+        species = np.zeros(TEAM_SLOTS, dtype=np.int32)
+        moves = np.zeros((TEAM_SLOTS, MOVE_SLOTS), dtype=np.int32)
+        for slot, pokemon in enumerate(team.pokemon[:TEAM_SLOTS]):
+            species[slot] = pokemon.id
+            self.species_names.setdefault(pokemon.id, pokemon.name)
+            for index, move in enumerate(pokemon.moves[:MOVE_SLOTS]):
+                moves[slot, index] = move.id
+                self.move_names.setdefault(move.id, move.name)
+        return species, moves
+
+    def _advance(self, count: int):
+        self.rows += count
+        self.battles += count
+        if self.rows == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered battles as a chunk."""
+        if self.rows == 0:
+            return
+        path = os.path.join(self.directory, CHUNK_PATTERN.format(self.chunk_index))
+        species_ids = np.unique(self.columns["species"][:self.rows])
+        move_ids = np.unique(self.columns["moves"][:self.rows])
+        species_ids = species_ids[species_ids != 0]
+        move_ids = move_ids[move_ids != 0]
+        save = np.savez_compressed if self.compress else np.savez
+        save(
+            path,
+            species_ids=species_ids,
+            species_names=np.array([self.species_names[int(i)] for i in species_ids], dtype=str),
+            move_ids=move_ids,
+            move_names=np.array([self.move_names[int(i)] for i in move_ids], dtype=str),
+            **{name: column[:self.rows] for name, column in self.columns.items()}
+        )
+        self.chunk_index += 1
+        self.rows = 0
+
+    def close(self):
+        """Write any remaining battles."""
+        self.flush()
+
+
+class ResultSummary:
+    """Win rates and species/move usage accumulated over result chunks."""
+
+    def __init__(self):
+        """Initialize an empty summary."""
+        self.games = 0
+        self.wins = {winner: 0 for winner in WINNER_CODES}
+        self.total_turns = 0
+        self.max_turns = 0
+        self.hp_fraction = [0.0, 0.0]
+        self.species_names: Dict[int, str] = {}
+        self.move_names: Dict[int, str] = {}
+        # species id -> [teams it was on, teams it was on that won]
+        self.species: Dict[int, List[int]] = {}
+        self.move_uses: Dict[int, int] = {}
+
+    def add_chunk(self, chunk):
+        """Fold one chunk (a mapping of column arrays, e.g. from np.load) into the summary."""
+        winner = chunk["winner"]
+        turns = chunk["turns"]
+        self.games += len(winner)
+        for name, code in WINNER_CODES.items():
+            self.wins[name] += int((winner == code).sum())
+        self.total_turns += int(turns.sum())
+        self.max_turns = max(self.max_turns, int(turns.max()) if len(turns) else 0)
+
+        max_hp = chunk["max_hp"].sum(axis=2)
+        fractions = chunk["hp"].sum(axis=2) / np.maximum(max_hp, 1)
+        for side in (PLAYER, AI):
+            self.hp_fraction[side] += float(fractions[:, side].sum())
+
+        # Species appearances and wins, one per team a species is on
+        species = chunk["species"]
+        won = np.stack([winner == WINNER_CODES["Player"], winner == WINNER_CODES["AI"]], axis=1)
+        present = species != 0
+        ids, inverse = np.unique(species[present], return_inverse=True)
+        appearances = np.bincount(inverse, minlength=len(ids))
+        victories = np.bincount(inverse, weights=np.broadcast_to(won[:, :, None], species.shape)[present],
+                                minlength=len(ids))
+        for species_id, count, wins in zip(ids.tolist(), appearances.tolist(), victories.tolist()):
+            totals = self.species.setdefault(species_id, [0, 0])
+            totals[0] += count
+            totals[1] += int(wins)
+
+        moves = chunk["moves"]
+        used = moves != 0
+        ids, inverse = np.unique(moves[used], return_inverse=True)
+        uses = np.bincount(inverse, weights=chunk["uses"][used], minlength=len(ids))
+        for move_id, count in zip(ids.tolist(), uses.tolist()):
+            self.move_uses[move_id] = self.move_uses.get(move_id, 0) + int(count)
+
+        self.species_names.update(zip(chunk["species_ids"].tolist(), chunk["species_names"].tolist()))
+        self.move_names.update(zip(chunk["move_ids"].tolist(), chunk["move_names"].tolist()))
+
+    def species_usage(self) -> List[Tuple[str, int, float, float]]:
+        """(species, teams, share of all teams, win rate) rows, most used first."""
+        teams = 2 * self.games
+        rows = [(self.species_names.get(species_id, str(species_id)), count, count / teams if teams else 0.0,
+                 wins / count if count else 0.0)
+                for species_id, (count, wins) in self.species.items()]
+        return sorted(rows, key=lambda row: (-row[1], row[0]))
+
+    def move_usage(self) -> List[Tuple[str, int]]:
+        """(move, uses) rows, most used first."""
+        rows = [(self.move_names.get(move_id, str(move_id)), count) for move_id, count in self.move_uses.items()]
+        return sorted(rows, key=lambda row: (-row[1], row[0]))
+
+    def as_dict(self) -> Dict:
+        """Headline statistics as a dictionary."""
+        games = self.games or 1
+        return {
+            "games": self.games,
+            "player_win_rate": self.wins["Player"] / games,
+            "ai_win_rate": self.wins["AI"] / games,
+            "draw_rate": self.wins[None] / games,
+            "mean_turns": self.total_turns / games,
+            "max_turns": self.max_turns,
+            "mean_player_hp_left": self.hp_fraction[PLAYER] / games,
+            "mean_ai_hp_left": self.hp_fraction[AI] / games
+        }
+
+
+def summarize_results(directory: str) -> ResultSummary:
+    """Summarize every chunk in a result directory, loading one chunk at a time."""
+    _require_numpy()
+    summary = ResultSummary()
+    for path in chunk_paths(directory):
+        with np.load(path) as chunk:
+            summary.add_chunk(chunk)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a directory of battle result chunks")
+    parser.add_argument("directory", help="Directory written by ResultWriter")
+    parser.add_argument("--top", type=int, default=20, help="Species and moves to list")
+    args = parser.parse_args(argv)
+
+    summary = summarize_results(args.directory)
+    for key, value in summary.as_dict().items():
+        print(f"{key}: {value}")
+    print("\nSpecies usage (teams, share, win rate):")
+    for name, count, share, win_rate in summary.species_usage()[:args.top]:
+        print(f"  {name:<20} {count:>10} {share:>7.1%} {win_rate:>7.1%}")
+    print("\nMove usage:")
+    for name, count in summary.move_usage()[:args.top]:
+        print(f"  {name:<20} {count:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Search-based AI for the Pokemon Battle Simulator
+Expectiminimax over move/switch choices with chance nodes for accuracy and damage rolls
+"""
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from battle.battle_engine import Action, BattleEngine, _matchup_key
+from models.team import PokemonTeam
+
+# Value of a won (or, negated, a lost) battle; larger than any HP-based evaluation
+WIN_SCORE = 100.0
+
+
+class _BudgetExceeded(Exception):
+    """Raised inside the search when the time or node budget runs out."""
+
+
+class _ChanceEngine(BattleEngine):
+    """Engine whose accuracy and damage rolls follow a scripted outcome path.
+
+    Every roll with more than one possible outcome is a branch point. Running a
+    turn records the branch points it met; next_path() then walks through every
+    combination of outcomes, and probability holds the chance of the current one.
+    """
+
+    def __init__(self, player_team: PokemonTeam, ai_team: PokemonTeam, rolls: Sequence[float]):
+        """Initialize with cloned teams and the damage rolls to branch over."""
+        super().__init__(player_team, ai_team)
+        self.rolls = tuple(rolls)
+        self.path: List[int] = []
+        self.options: List[int] = []
+        self.position = 0
+        self.probability = 1.0
+
+    def start_path(self, path: List[int]):
+        """Prepare to replay the outcomes in path, choosing the first outcome past its end."""
+        self.path = path
+        self.options = []
+        self.position = 0
+        self.probability = 1.0
+
+    def next_path(self) -> Optional[List[int]]:
+        """The next combination of outcomes after the one just played, or None when done."""
+        for i in range(len(self.options) - 1, -1, -1):
+            if self.path[i] + 1 < self.options[i]:
+                return self.path[:i] + [self.path[i] + 1]
+        return None
+
+    def _branch(self, options: int) -> int:
+        if self.position < len(self.path):
+            choice = self.path[self.position]
+        else:
+            choice = 0
+            self.path.append(0)
+        self.options.append(options)
+        self.position += 1
+        return choice
+
+    def _roll_hit(self, move) -> bool:
+        hit_chance = min(1.0, max(0.0, move.accuracy / 100))
+        if hit_chance >= 1.0 or hit_chance <= 0.0:
+            return hit_chance >= 1.0
+
+        if self._branch(2) == 0:
+            self.probability *= hit_chance
+            return True
+        self.probability *= 1.0 - hit_chance
+        return False
+
+    def _roll_damage_modifier(self) -> float:
+        if len(self.rolls) == 1:
+            return self.rolls[0]
+        self.probability /= len(self.rolls)
+        return self.rolls[self._branch(len(self.rolls))]
+
+
+class SearchAI:
+    """Policy that picks actions by expectiminimax search.
+
+    Each decision runs iterative deepening up to max_depth turns, stopping when
+    time_budget seconds or node_budget simulated turns are used up, and plays the
+    best action of the deepest completed search. The opponent is assumed to pick
+    its worst-case reply to each action; accuracy and the damage rolls listed in
+    rolls are chance nodes. Node budgets make decisions reproducible, time budgets
+    bound interactive latency. Results are cached by battle state and the two teams'
+    species, levels and movesets, so the cache carries over between decisions of
+    a battle without leaking values into battles between other teams.
+    """
+
+    def __init__(self,
+                 time_budget: Optional[float] = 0.5,
+                 node_budget: Optional[int] = None,
+                 max_depth: int = 3,
+                 rolls: Sequence[float] = (0.85, 1.0),
+                 max_cache_entries: int = 200000):
+        """Initialize the search limits (None disables a budget)."""
+        self.time_budget = time_budget
+        self.node_budget = node_budget
+        self.max_depth = max_depth
+        self.rolls = tuple(rolls)
+        self.max_cache_entries = max_cache_entries
+        self._cache: Dict[Tuple, float] = {}
+        self._team_ids: Dict[Tuple, int] = {}
+        self._teams_key = 0
+        self._deadline = None
+        self._nodes = 0
+        self.last_depth = 0
+
+    def __call__(self, engine: BattleEngine, team: PokemonTeam, opponent_team: PokemonTeam) -> Action:
+        """Choose an action for team."""
+        return self.choose_action(engine, team is engine.ai_team)
+
+    def choose_action(self, engine: BattleEngine, ai_side: bool = True) -> Action:
+        """Choose an action for the AI side (or the player side if ai_side is False)."""
+        chance = _ChanceEngine(engine.player_team.clone(), engine.ai_team.clone(), self.rolls)
+        team = chance.ai_team if ai_side else chance.player_team
+        actions = self._legal_actions(team)
+        if len(actions) == 1:
+            return actions[0]
+
+        if len(self._cache) > self.max_cache_entries:
+            self._cache.clear()
+            self._team_ids.clear()
+        # Snapshots only hold battle state, so key cached values by the teams as well
+        # (numbered, so cache lookups don't hash both teams every time)
+        teams = tuple(
+            tuple((_matchup_key(pokemon), pokemon.level) for pokemon in side.pokemon)
+            for side in (chance.player_team, chance.ai_team)
+        )
+        self._teams_key = self._team_ids.setdefault(teams, len(self._team_ids))
+
+        self._deadline = time.perf_counter() + self.time_budget if self.time_budget is not None else None
+        self._nodes = 0
+        self.last_depth = 0
+
+        # Fall back to the built-in heuristic if not even one ply fits in the budget
+        best_action = engine._ai_choose_action(
+            engine.ai_team if ai_side else engine.player_team,
+            engine.player_team if ai_side else engine.ai_team
+        )
+        for depth in range(1, self.max_depth + 1):
+            try:
+                best_action = self._search_root(chance, ai_side, depth, actions)
+            except _BudgetExceeded:
+                break
+            self.last_depth = depth
+        return best_action
+
+    def _search_root(self, engine: _ChanceEngine, ai_side: bool, depth: int, actions: List[Action]) -> Action:
+        best_value = None
+        best_action = actions[0]
+        for action in actions:
+            value = self._action_value(engine, ai_side, depth, action, best_value)
+            if best_value is None or value > best_value:
+                best_value = value
+                best_action = action
+        return best_action
+
+    def _value(self, engine: _ChanceEngine, ai_side: bool, depth: int) -> float:
+        """Value of the current state for the searching side."""
+        if engine.is_battle_over():
+            winner = engine.get_winner()
+            return WIN_SCORE if (winner == "AI") == ai_side else -WIN_SCORE
+        if depth == 0:
+            return self._evaluate(engine, ai_side)
+
+        key = (self._teams_key, engine.snapshot()[1:], ai_side, depth)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        team = engine.ai_team if ai_side else engine.player_team
+        best_value = None
+        for action in self._legal_actions(team):
+            value = self._action_value(engine, ai_side, depth, action, best_value)
+            if best_value is None or value > best_value:
+                best_value = value
+
+        self._cache[key] = best_value
+        return best_value
+
+    def _action_value(self, engine: _ChanceEngine, ai_side: bool, depth: int,
+                      action: Action, cutoff: Optional[float]) -> float:
+        """Worst case over opponent replies of the expected value of action.
+
+        Stops early once the value drops to cutoff, since the caller will not pick it then.
+        """
+        opponent_team = engine.player_team if ai_side else engine.ai_team
+        worst_value = None
+        for reply in self._legal_actions(opponent_team):
+            if ai_side:
+                value = self._expected_value(engine, ai_side, depth, reply, action)
+            else:
+                value = self._expected_value(engine, ai_side, depth, action, reply)
+            if worst_value is None or value < worst_value:
+                worst_value = value
+            if cutoff is not None and worst_value <= cutoff:
+                break
+        return worst_value
+
+    def _expected_value(self, engine: _ChanceEngine, ai_side: bool, depth: int,
+                        player_action: Action, ai_action: Action) -> float:
+        """Average the values of every accuracy/damage outcome of a turn."""
+        snapshot = engine.snapshot()
+        expected = 0.0
+        path = []
+        while path is not None:
+            self._count_node()
+            engine.start_path(path)
+            engine.play_turn(player_action, ai_action)
+            probability = engine.probability
+            path = engine.next_path()
+            expected += probability * self._value(engine, ai_side, depth - 1)
+            engine.restore(snapshot)
+        return expected
+
+    def _count_node(self):
+        self._nodes += 1
+        if self.node_budget is not None and self._nodes > self.node_budget:
+            raise _BudgetExceeded()
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise _BudgetExceeded()
+
+    @staticmethod
+    def _legal_actions(team: PokemonTeam) -> List[Action]:
+        """Moves with PP left plus switches; only switches if the active Pokemon fainted."""
+        active = team.get_active_pokemon()
+        switches = [(i, None) for i, pokemon in enumerate(team.pokemon)
+                    if i != team.active_pokemon_index and not pokemon.is_fainted()]
+        if active.is_fainted():
+            return switches
+
+        moves = [(None, i) for i, move in enumerate(active.moves) if move.current_pp > 0]
+        if not moves:
+            # Like the built-in AI, keep using the first move once PP runs out
+            moves = [(None, 0)]
+        return moves + switches
+
+    @staticmethod
+    def _evaluate(engine: BattleEngine, ai_side: bool) -> float:
+        """Remaining HP fractions of the searching side minus the opponent's."""
+        score = 0.0
+        for pokemon in engine.ai_team.pokemon:
+            score += pokemon.current_hp / pokemon.stats["hp"]
+        for pokemon in engine.player_team.pokemon:
+            score -= pokemon.current_hp / pokemon.stats["hp"]
+        return score if ai_side else -score
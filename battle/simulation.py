@@ -0,0 +1,416 @@
+"""
+Headless battle simulation for the Pokemon Battle Simulator
+Plays policy-vs-policy battles to completion without I/O and aggregates the results
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from typing import Callable, Dict, List, Optional, Tuple
+from battle.battle_engine import Action, BattleEngine
+from battle.metrics import BattleMetrics
+from models.battle_state import TeamState
+from models.team import PokemonTeam
+
+# A policy picks an action for its team: policy(engine, team, opponent_team) -> (switch_index, move_index)
+Policy = Callable[[BattleEngine, PokemonTeam, PokemonTeam], Action]
+
+# Battles that run this long are stalled (e.g. two status-only Pokemon) and count as draws
+DEFAULT_MAX_TURNS = 500
+
+
+def derive_seed(master_seed: int, game_index: int) -> int:
+    """Derive the seed of one game from the master seed, independently of how games are sharded."""
+    digest = hashlib.blake2b(f"{master_seed}:{game_index}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def heuristic_policy(engine: BattleEngine, team: PokemonTeam, opponent_team: PokemonTeam) -> Action:
+    """Play like the built-in AI opponent."""
+    return engine._ai_choose_action(team, opponent_team)
+
+
+def remaining_hp_fraction(team: PokemonTeam) -> float:
+    """Fraction of the team's total max HP that is left."""
+    max_hp = sum(pokemon.stats["hp"] for pokemon in team.pokemon)
+    return sum(pokemon.current_hp for pokemon in team.pokemon) / max_hp if max_hp else 0.0
+
+
+class BattleResult:
+    """Outcome of a single simulated battle."""
+
+    __slots__ = ("winner", "turns", "player_hp", "ai_hp")
+
+    def __init__(self, winner: Optional[str], turns: int, player_hp: float, ai_hp: float):
+        """Initialize with the winner ("Player", "AI" or None for a draw) and the HP left per side."""
+        self.winner = winner
+        self.turns = turns
+        self.player_hp = player_hp
+        self.ai_hp = ai_hp
+
+
+class SimulationSummary:
+    """Aggregated statistics over many simulated battles."""
+
+    def __init__(self):
+        """Initialize an empty summary."""
+        self.games = 0
+        self.wins = {"Player": 0, "AI": 0, None: 0}
+        self.turns: List[int] = []
+        self.player_hp: List[float] = []
+        self.ai_hp: List[float] = []
+
+    def add(self, result: BattleResult):
+        """Record one battle."""
+        self.games += 1
+        self.wins[result.winner] += 1
+        self.turns.append(result.turns)
+        self.player_hp.append(result.player_hp)
+        self.ai_hp.append(result.ai_hp)
+
+    def win_rate(self, side: str = "Player") -> float:
+        """Fraction of games won by side ("Player" or "AI")."""
+        return self.wins[side] / self.games if self.games else 0.0
+
+    @property
+    def draws(self) -> int:
+        """Number of games stopped at the turn limit."""
+        return self.wins[None]
+
+    @property
+    def mean_turns(self) -> float:
+        """Average battle length in turns."""
+        return sum(self.turns) / self.games if self.games else 0.0
+
+    def hp_histogram(self, side: str = "Player", bins: int = 10) -> List[int]:
+        """Distribution of the HP fraction a side had left, bucketed into equal-width bins."""
+        values = self.player_hp if side == "Player" else self.ai_hp
+        histogram = [0] * bins
+        for value in values:
+            histogram[min(bins - 1, int(value * bins))] += 1
+        return histogram
+
+    def merge(self, other: "SimulationSummary"):
+        """Append the games of another summary after this one's."""
+        self.games += other.games
+        for side, count in other.wins.items():
+            self.wins[side] += count
+        self.turns.extend(other.turns)
+        self.player_hp.extend(other.player_hp)
+        self.ai_hp.extend(other.ai_hp)
+
+    def as_dict(self) -> Dict:
+        """Get the headline numbers as a plain dictionary."""
+        return {
+            "games": self.games,
+            "player_wins": self.wins["Player"],
+            "ai_wins": self.wins["AI"],
+            "draws": self.draws,
+            "player_win_rate": self.win_rate("Player"),
+            "mean_turns": self.mean_turns,
+            "player_hp_histogram": self.hp_histogram("Player"),
+            "ai_hp_histogram": self.hp_histogram("AI")
+        }
+
+
+def run_battle(player_team: PokemonTeam,
+               ai_team: PokemonTeam,
+               player_policy: Policy = heuristic_policy,
+               ai_policy: Policy = heuristic_policy,
+               max_turns: int = DEFAULT_MAX_TURNS,
+               rng: Optional[random.Random] = None,
+               replay_writer=None,
+               metrics=None,
+               result_writer=None) -> BattleResult:
+    """Play one battle to completion. Both teams are reset first and mutated in place.
+
+    A replay_writer must already have begun the game; it is ended here.
+    metrics (battle.metrics.BattleMetrics) is attached to the battle's engine.
+    result_writer (battle.results.ResultWriter) records the battle's outcome and move usage.
+    """
+    player_team.reset()
+    ai_team.reset()
+    engine = BattleEngine(player_team, ai_team, rng, replay_writer=replay_writer, metrics=metrics)
+    if result_writer is not None:
+        result_writer.attach(engine)
+
+    while engine.turn_count < max_turns and not engine.is_battle_over():
+        player_action = player_policy(engine, player_team, ai_team)
+        ai_action = ai_policy(engine, ai_team, player_team)
+        engine.play_turn(player_action, ai_action)
+
+    if replay_writer is not None:
+        replay_writer.end_game(engine)
+    if result_writer is not None:
+        result_writer.add(engine)
+
+    return BattleResult(
+        engine.get_winner(),
+        engine.turn_count,
+        remaining_hp_fraction(player_team),
+        remaining_hp_fraction(ai_team)
+    )
+
+
+def simulate_matchup(player_team: PokemonTeam,
+                     ai_team: PokemonTeam,
+                     games: int,
+                     seed: Optional[int] = None,
+                     player_policy: Policy = heuristic_policy,
+                     ai_policy: Policy = heuristic_policy,
+                     max_turns: int = DEFAULT_MAX_TURNS,
+                     replay_writer=None,
+                     metrics=None,
+                     result_writer=None) -> SimulationSummary:
+    """Play games battles between two teams and summarize them.
+
+    With a seed, game i runs on its own random stream derived from (seed, i),
+    so the results are repeatable; without one the global random module is used.
+    Passing a battle.replay.ReplayWriter (which needs a seed) records every game,
+    and a battle.metrics.BattleMetrics collects metrics over all of them.
+    A battle.results.ResultWriter stores every game's outcome and move usage.
+    """
+    if replay_writer is not None and seed is None:
+        raise ValueError("Recording replays needs a seed")
+    return _simulate_range(player_team, ai_team, 0, games, seed, player_policy, ai_policy, max_turns,
+                           replay_writer, metrics, result_writer)
+
+
+def simulate_matchup_parallel(player_team: PokemonTeam,
+                              ai_team: PokemonTeam,
+                              games: int,
+                              seed: Optional[int] = None,
+                              player_policy: Policy = heuristic_policy,
+                              ai_policy: Policy = heuristic_policy,
+                              max_turns: int = DEFAULT_MAX_TURNS,
+                              workers: Optional[int] = None) -> SimulationSummary:
+    """Shard games across a process pool.
+
+    Every game is seeded from (seed, game index) and shards are merged in order,
+    so a given seed yields the same summary as simulate_matchup for any worker count.
+    Policies must be picklable (module-level functions or objects).
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 63)
+    workers = workers or os.cpu_count() or 1
+
+    # A few shards per worker keeps the pool busy when games differ in length
+    shard_count = max(1, min(games, workers * 4))
+    bounds = [games * i // shard_count for i in range(shard_count + 1)]
+
+    summary = SimulationSummary()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_simulate_range, player_team, ai_team, start, stop, seed,
+                            player_policy, ai_policy, max_turns)
+            for start, stop in zip(bounds, bounds[1:])
+        ]
+        for future in futures:
+            summary.merge(future.result())
+    return summary
+
+
+def _simulate_range(player_team: PokemonTeam,
+                    ai_team: PokemonTeam,
+                    start: int,
+                    stop: int,
+                    seed: Optional[int],
+                    player_policy: Policy,
+                    ai_policy: Policy,
+                    max_turns: int,
+                    replay_writer=None,
+                    metrics=None,
+                    result_writer=None) -> SimulationSummary:
+    """Play games start..stop-1 of a run on compact copies of the teams."""
+    player_state = TeamState(player_team)
+    ai_state = TeamState(ai_team)
+
+    summary = SimulationSummary()
+    for game_index in range(start, stop):
+        rng = None
+        if seed is not None:
+            game_seed = derive_seed(seed, game_index)
+            rng = random.Random(game_seed)
+            if replay_writer is not None:
+                replay_writer.begin_game(game_seed, player_state, ai_state)
+        summary.add(run_battle(player_state, ai_state, player_policy, ai_policy, max_turns, rng, replay_writer,
+                               metrics, result_writer))
+    return summary
+
+
+def wilson_interval(wins: int, games: int, confidence: float = 0.95) -> Tuple[float, float]:
+    """Wilson score interval for a win rate; stays sensible near 0 and 1, unlike the normal approximation."""
+    if games == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    rate = wins / games
+    denominator = 1 + z * z / games
+    center = (rate + z * z / (2 * games)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / games + z * z / (4 * games * games)) / denominator
+    low = 0.0 if wins == 0 else max(0.0, center - margin)
+    high = 1.0 if wins == games else min(1.0, center + margin)
+    return low, high
+
+
+class WinRateEstimate:
+    """Player win rate with its confidence interval, from a run that may have stopped early."""
+
+    def __init__(self, summary: SimulationSummary, low: float, high: float, confidence: float, stopped_early: bool):
+        """Initialize with the games played and the interval at the point the run stopped."""
+        self.summary = summary
+        self.low = low
+        self.high = high
+        self.confidence = confidence
+        self.stopped_early = stopped_early
+
+    @property
+    def win_rate(self) -> float:
+        """Observed player win rate (draws count as losses)."""
+        return self.summary.win_rate("Player")
+
+    @property
+    def half_width(self) -> float:
+        """Half the width of the confidence interval."""
+        return (self.high - self.low) / 2
+
+    def as_dict(self) -> Dict:
+        """Get the estimate as a plain dictionary."""
+        return {
+            "games": self.summary.games,
+            "player_win_rate": self.win_rate,
+            "ci_low": self.low,
+            "ci_high": self.high,
+            "confidence": self.confidence,
+            "stopped_early": self.stopped_early
+        }
+
+
+def estimate_win_rate(player_team: PokemonTeam,
+                      ai_team: PokemonTeam,
+                      precision: float = 0.02,
+                      confidence: float = 0.95,
+                      threshold: Optional[float] = None,
+                      batch_size: int = 100,
+                      max_games: int = 100000,
+                      seed: Optional[int] = None,
+                      player_policy: Policy = heuristic_policy,
+                      ai_policy: Policy = heuristic_policy,
+                      max_turns: int = DEFAULT_MAX_TURNS,
+                      workers: int = 1) -> WinRateEstimate:
+    """Play battles in batches until the player's win rate is known well enough.
+
+    After each batch the Wilson interval is checked: the run stops once its half
+    width is at most precision, or, with a threshold (e.g. 0.5), as soon as the
+    interval lies entirely on one side of it. Lopsided matchups settle within a
+    batch or two. Since the interval is checked repeatedly its coverage is
+    somewhat below the nominal confidence; tighten confidence if that matters.
+    Games are seeded exactly as in simulate_matchup, so for a given seed the
+    games played are a prefix of that run whatever the worker count.
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 63)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    summary = SimulationSummary()
+    low, high = 0.0, 1.0
+    stopped_early = False
+    try:
+        while summary.games < max_games:
+            start, stop = summary.games, min(max_games, summary.games + batch_size)
+            if executor is None:
+                summary.merge(_simulate_range(player_team, ai_team, start, stop, seed,
+                                              player_policy, ai_policy, max_turns))
+            else:
+                bounds = [start + (stop - start) * i // workers for i in range(workers + 1)]
+                futures = [
+                    executor.submit(_simulate_range, player_team, ai_team, shard_start, shard_stop, seed,
+                                    player_policy, ai_policy, max_turns)
+                    for shard_start, shard_stop in zip(bounds, bounds[1:]) if shard_stop > shard_start
+                ]
+                for future in futures:
+                    summary.merge(future.result())
+
+            low, high = wilson_interval(summary.wins["Player"], summary.games, confidence)
+            decided = threshold is not None and (low > threshold or high < threshold)
+            if (high - low) / 2 <= precision or decided:
+                stopped_early = summary.games < max_games
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return WinRateEstimate(summary, low, high, confidence, stopped_early)
+
+
+def main(argv=None):
+    from data.cache import PokeAPICache, DEFAULT_CACHE_PATH
+    from data.championship_teams import ChampionshipTeams
+    from data.pokeapi import PokeAPIClient
+
+    parser = argparse.ArgumentParser(description="Simulate battles between championship teams")
+    parser.add_argument("team_a", type=int, help="Index of the first championship team")
+    parser.add_argument("team_b", type=int, help="Index of the second championship team")
+    parser.add_argument("--games", type=int, default=1000, help="Games to play (the cap with --precision)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (0 uses every core)")
+    parser.add_argument("--replay", help="Append every game to this replay file (needs --seed, one worker)")
+    parser.add_argument("--precision", type=float, default=None,
+                        help="Stop once the win-rate confidence interval is this tight (half width)")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Confidence level of the interval")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="With --precision, also stop once the interval excludes this win rate")
+    parser.add_argument("--metrics", action="store_true", help="Print engine metrics as JSON (one worker)")
+    parser.add_argument("--results", help="Store every game in columnar chunks in this directory (one worker)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--offline", action="store_true")
+    args = parser.parse_args(argv)
+
+    api_client = PokeAPIClient(cache=PokeAPICache(args.cache), offline=args.offline)
+    teams_data = ChampionshipTeams(api_client)
+    teams_data.load_teams()
+    team_a = teams_data.teams[args.team_a]
+    team_b = teams_data.teams[args.team_b]
+    metrics = BattleMetrics(api_client) if args.metrics else None
+    if args.precision is not None:
+        estimate = estimate_win_rate(team_a, team_b, args.precision, args.confidence, args.threshold,
+                                     max_games=args.games, seed=args.seed, workers=args.workers or os.cpu_count())
+        for key, value in estimate.as_dict().items():
+            print(f"{key}: {value}")
+        return
+
+    result_writer = None
+    if args.results:
+        from battle.results import ResultWriter
+        result_writer = ResultWriter(args.results)
+
+    try:
+        if args.replay:
+            from battle.replay import ReplayWriter
+            writer = ReplayWriter.open(args.replay)
+            try:
+                summary = simulate_matchup(team_a, team_b, args.games, args.seed, replay_writer=writer,
+                                           metrics=metrics, result_writer=result_writer)
+            finally:
+                writer.close()
+        elif args.workers == 1 or metrics is not None or result_writer is not None:
+            summary = simulate_matchup(team_a, team_b, args.games, args.seed, metrics=metrics,
+                                       result_writer=result_writer)
+        else:
+            summary = simulate_matchup_parallel(team_a, team_b, args.games, args.seed,
+                                                workers=args.workers or None)
+    finally:
+        if result_writer is not None:
+            result_writer.close()
+
+    for key, value in summary.as_dict().items():
+        print(f"{key}: {value}")
+    if metrics is not None:
+        print(json.dumps(metrics.snapshot(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Team builder for the Pokemon Battle Simulator
+Searches species and movesets from a local Pokedex for the roster that does best
+against a pool of opponent teams, such as the championship teams
+"""
+import argparse
+import os
+import random
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from battle import batched
+from battle.battle_engine import BattleEngine
+from battle.simulation import DEFAULT_MAX_TURNS, derive_seed, simulate_matchup
+from data.pokeapi import PokeAPIClient
+from models.battle_state import TeamState
+from models.team import PokemonTeam
+
+TEAM_SIZE = 6
+MOVES_PER_POKEMON = 4
+
+# A roster: (species name, move names) per member, lead first
+Member = Tuple[str, Tuple[str, ...]]
+Genome = Tuple[Member, ...]
+
+
+class Evaluation:
+    """How a roster did against the opponent pool."""
+
+    __slots__ = ("genome", "win_rate", "matchup", "games")
+
+    def __init__(self, genome: Genome, win_rate: float, matchup: float, games: int):
+        """Initialize with the win rate over all simulated games and the mean static matchup score."""
+        self.genome = genome
+        self.win_rate = win_rate
+        self.matchup = matchup
+        self.games = games
+
+    @property
+    def score(self) -> Tuple[float, float]:
+        """Ranking key: win rate first, matchup score to break ties."""
+        return self.win_rate, self.matchup
+
+
+def evaluate_team(team: PokemonTeam, opponents: Sequence[PokemonTeam], games: int, seed: int,
+                  max_turns: int = DEFAULT_MAX_TURNS, matchup_cache: Optional[Dict] = None) -> Tuple[float, float]:
+    """Win rate of team (as the player) over games battles against each opponent, and its mean matchup score.
+
+    The matchup score averages, over every opposing Pokemon, the best static matchup
+    score (type and speed, as the AI sees it) of any member of team. Games are
+    seeded from seed alone, so different rosters are compared on the same random
+    streams. With NumPy every game runs in one batch on the batched engine.
+    """
+    engine = BattleEngine(team, opponents[0], rng=random.Random(0), log_turns=False)
+    if matchup_cache is not None:
+        engine._matchup_cache = matchup_cache
+
+    best_scores = []
+    for opponent in opponents:
+        matrix = engine.get_matchup_matrix(team, opponent, include_hp=False)
+        best_scores.extend(max(column) for column in zip(*matrix))
+
+    if batched.np is not None:
+        # Every game against every opponent in one lockstep batch
+        teams = [team.clone()] + [opponent.clone() for opponent in opponents]
+        for member in teams:
+            member.reset()
+        battles = batched.BatchedBattles([(teams[0], opponent) for opponent in teams[1:] for _ in range(games)], seed)
+        battles.run(max_turns)
+        wins = int((battles.winners() == batched.PLAYER_WINS).sum())
+    else:
+        wins = 0
+        for index, opponent in enumerate(opponents):
+            summary = simulate_matchup(team, opponent, games, seed=derive_seed(seed, index), max_turns=max_turns)
+            wins += summary.wins["Player"]
+
+    return wins / (games * len(opponents)), sum(best_scores) / len(best_scores)
+
+
+# Opponents and settings of the current search, set once per worker process
+_worker_opponents: List[TeamState] = []
+_worker_settings: Tuple = ()
+_worker_matchup_cache: Dict = {}
+
+
+def _init_worker(opponents: List[PokemonTeam], games: int, seed: int, max_turns: int):
+    global _worker_opponents, _worker_settings
+    _worker_opponents = [TeamState(team) for team in opponents]
+    _worker_settings = (games, seed, max_turns)
+
+
+def _evaluate_worker(team: PokemonTeam) -> Tuple[float, float]:
+    return evaluate_team(team, _worker_opponents, *_worker_settings, matchup_cache=_worker_matchup_cache)
+
+
+class TeamBuilder:
+    """Genetic search over rosters, followed by a local search around the best one.
+
+    Candidates draw their species from the pool and their moves from each species'
+    learnset in the Pokedex (LocalPokedex, ColumnarPokedex or anything with the same
+    get_species_record/get_move_record lookups). Every roster is evaluated once: results
+    are cached by roster, and new rosters of a generation are evaluated in parallel
+    across a process pool. The search is repeatable for a given seed and any worker count.
+    """
+
+    def __init__(self,
+                 pokedex,
+                 opponents: Sequence[PokemonTeam],
+                 species: Optional[Sequence[str]] = None,
+                 games: int = 100,
+                 seed: Optional[int] = None,
+                 max_turns: int = DEFAULT_MAX_TURNS,
+                 team_size: int = TEAM_SIZE,
+                 workers: Optional[int] = None):
+        """Initialize with the Pokedex, the opponent pool and the species to choose from (default all)."""
+        if not opponents:
+            raise ValueError("The team builder needs at least one opponent team")
+        self.pokedex = pokedex
+        self.opponents = list(opponents)
+        self.games = games
+        self.seed = seed if seed is not None else random.randrange(2 ** 63)
+        self.max_turns = max_turns
+        self.team_size = team_size
+        self.workers = workers or os.cpu_count() or 1
+        self.rng = random.Random(self.seed)
+        self.cache: Dict[Genome, Evaluation] = {}
+        self._matchup_cache: Dict = {}
+        self._executor: Optional[Executor] = None
+        self._opponent_states: Optional[List[TeamState]] = None
+
+        if species is None:
+            species = pokedex.species_names() if hasattr(pokedex, "species_names") else list(pokedex.species)
+        self.learnsets: Dict[str, List[str]] = {}
+        for name in species:
+            record = pokedex.get_species_record(name)
+            if record is None:
+                raise LookupError(f"Unknown species '{name}'")
+            moves = [move for move in record["moves"] if pokedex.get_move_record(move) is not None]
+            if moves:
+                self.learnsets[record["name"]] = moves
+        self.species = list(self.learnsets)
+        if len(self.species) < team_size:
+            raise ValueError(f"Need at least {team_size} species with known moves, got {len(self.species)}")
+
+    def __enter__(self) -> "TeamBuilder":
+        """Start the worker pool, which then serves every search run inside the with block."""
+        if self.workers > 1:
+            self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                                 initargs=(self.opponents, self.games, self.seed, self.max_turns))
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def build_team(self, genome: Genome, name: str = "Team Builder") -> PokemonTeam:
+        """Turn a roster into a PokemonTeam."""
+        team = PokemonTeam(name)
+        for species, move_names in genome:
+            moves = [PokeAPIClient.build_move(self.pokedex.get_move_record(move)) for move in move_names]
+            team.add_pokemon(PokeAPIClient.build_pokemon(self.pokedex.get_species_record(species), moves))
+        return team
+
+    def random_member(self, species: Optional[str] = None) -> Member:
+        """A species from the pool (or the given one) with a random moveset from its learnset."""
+        species = species if species is not None else self.rng.choice(self.species)
+        learnset = self.learnsets[species]
+        moves = self.rng.sample(learnset, min(MOVES_PER_POKEMON, len(learnset)))
+        return species, tuple(sorted(moves))
+
+    def random_genome(self) -> Genome:
+        """A roster of distinct random species."""
+        return tuple(self.random_member(species) for species in self.rng.sample(self.species, self.team_size))
+
+    def mutate(self, genome: Genome) -> Genome:
+        """Replace a member, change one move, or bring a different member to the lead."""
+        members = list(genome)
+        slot = self.rng.randrange(len(members))
+        kind = self.rng.random()
+        if kind < 0.4:
+            taken = {species for species, _ in members}
+            choices = [species for species in self.species if species not in taken]
+            if choices:
+                members[slot] = self.random_member(self.rng.choice(choices))
+        elif kind < 0.8:
+            species, moves = members[slot]
+            unused = [move for move in self.learnsets[species] if move not in moves]
+            if unused:
+                moves = list(moves)
+                moves[self.rng.randrange(len(moves))] = self.rng.choice(unused)
+                members[slot] = species, tuple(sorted(moves))
+        else:
+            members[0], members[slot] = members[slot], members[0]
+        return tuple(members)
+
+    def crossover(self, first: Genome, second: Genome) -> Genome:
+        """Members taken from either parent at random, keeping species distinct; the lead comes from first."""
+        members = [first[0]]
+        taken = {first[0][0]}
+        pool = list(first[1:]) + list(second)
+        self.rng.shuffle(pool)
+        for member in pool:
+            if len(members) == self.team_size:
+                break
+            if member[0] not in taken:
+                members.append(member)
+                taken.add(member[0])
+        while len(members) < self.team_size:
+            member = self.random_member(self.rng.choice([s for s in self.species if s not in taken]))
+            members.append(member)
+            taken.add(member[0])
+        return tuple(members)
+
+    def evaluate(self, genomes: Sequence[Genome]) -> List[Evaluation]:
+        """Evaluations of the given rosters; only rosters not seen before are simulated."""
+        pending = list(dict.fromkeys(genome for genome in genomes if genome not in self.cache))
+        if pending:
+            teams = [self.build_team(genome) for genome in pending]
+            if self._executor is not None:
+                results = list(self._executor.map(_evaluate_worker, teams))
+            else:
+                if self._opponent_states is None:
+                    self._opponent_states = [TeamState(team) for team in self.opponents]
+                results = [evaluate_team(team, self._opponent_states, self.games, self.seed, self.max_turns,
+                                         self._matchup_cache) for team in teams]
+            for genome, (win_rate, matchup) in zip(pending, results):
+                self.cache[genome] = Evaluation(genome, win_rate, matchup, self.games * len(self.opponents))
+        return [self.cache[genome] for genome in genomes]
+
+    def _tournament_select(self, ranked: List[Evaluation], size: int = 3) -> Genome:
+        return max(self.rng.sample(ranked, min(size, len(ranked))), key=lambda evaluation: evaluation.score).genome
+
+    def genetic_search(self, generations: int = 20, population: int = 24, elite: int = 4,
+                       mutation_rate: float = 0.5) -> List[Evaluation]:
+        """Evolve a population of rosters; returns the final population, best first."""
+        if self._executor is None and self.workers > 1:
+            with self:
+                return self.genetic_search(generations, population, elite, mutation_rate)
+
+        genomes = [self.random_genome() for _ in range(population)]
+        ranked = sorted(self.evaluate(genomes), key=lambda evaluation: evaluation.score, reverse=True)
+        for _ in range(generations):
+            children = [evaluation.genome for evaluation in ranked[:elite]]
+            while len(children) < population:
+                child = self.crossover(self._tournament_select(ranked), self._tournament_select(ranked))
+                if self.rng.random() < mutation_rate:
+                    child = self.mutate(child)
+                children.append(child)
+            ranked = sorted(self.evaluate(children), key=lambda evaluation: evaluation.score, reverse=True)
+        return ranked
+
+    def local_search(self, genome: Genome, neighbours: int = 16, patience: int = 3) -> Evaluation:
+        """Hill-climb from genome, evaluating a batch of mutations per step, until patience steps bring nothing."""
+        if self._executor is None and self.workers > 1:
+            with self:
+                return self.local_search(genome, neighbours, patience)
+
+        best = self.evaluate([genome])[0]
+        stale = 0
+        while stale < patience:
+            candidates = self.evaluate([self.mutate(best.genome) for _ in range(neighbours)])
+            challenger = max(candidates, key=lambda evaluation: evaluation.score)
+            if challenger.score > best.score:
+                best = challenger
+                stale = 0
+            else:
+                stale += 1
+        return best
+
+    def search(self, generations: int = 20, population: int = 24, neighbours: int = 16) -> Evaluation:
+        """Genetic search, then a local search around its best roster."""
+        with self:
+            ranked = self.genetic_search(generations, population)
+            return self.local_search(ranked[0].genome, neighbours)
+
+
+def format_genome(genome: Genome) -> str:
+    """Render a roster one member per line."""
+    return "\n".join(f"{species}: {', '.join(moves)}" for species, moves in genome)
+
+
+def main(argv=None):
+    from data.championship_teams import ChampionshipTeams
+    from data.columnar import ColumnarPokedex
+    from data.pokedex import DEFAULT_POKEDEX_PATH, LocalPokedex, LocalPokedexClient
+
+    parser = argparse.ArgumentParser(description="Search for a team that beats the championship teams")
+    parser.add_argument("--pokedex", default=DEFAULT_POKEDEX_PATH, help="Imported local Pokedex store")
+    parser.add_argument("--columnar", help="Use a columnar Pokedex file instead of the store")
+    parser.add_argument("--species", help="Comma-separated species to choose from (default all)")
+    parser.add_argument("--generations", type=int, default=20)
+    parser.add_argument("--population", type=int, default=24)
+    parser.add_argument("--games", type=int, default=100, help="Games per opponent when evaluating a roster")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (0 uses every core)")
+    args = parser.parse_args(argv)
+
+    pokedex = ColumnarPokedex(args.columnar) if args.columnar else LocalPokedex(args.pokedex)
+    teams_data = ChampionshipTeams(LocalPokedexClient(pokedex))
+    teams_data.load_teams()
+    species = [name.strip() for name in args.species.split(",")] if args.species else None
+
+    builder = TeamBuilder(pokedex, teams_data.teams, species, args.games, args.seed, workers=args.workers or None)
+    best = builder.search(args.generations, args.population)
+    print(format_genome(best.genome))
+    print(f"Win rate {best.win_rate:.1%} over {best.games} games, matchup score {best.matchup:.1f}")
+    print(f"Rosters evaluated: {len(builder.cache)}, seed: {builder.seed}")
+
+
+if __name__ == "__main__":
+    main()
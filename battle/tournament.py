@@ -0,0 +1,441 @@
+"""
+Tournaments for the Pokemon Battle Simulator
+Round-robin, Swiss and single-elimination brackets over a pool of teams, with
+best-of-N matches played across a process pool and Elo/Glicko ratings
+"""
+import argparse
+import math
+import os
+import random
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from battle.simulation import DEFAULT_MAX_TURNS, derive_seed, run_battle
+from data.team_files import TeamLoader, is_team_file, record_source
+from models.battle_state import TeamState
+from models.team import PokemonTeam
+
+ELO_K = 32.0
+INITIAL_RATING = 1500.0
+INITIAL_DEVIATION = 350.0
+MIN_DEVIATION = 30.0
+
+_GLICKO_Q = math.log(10) / 400
+
+# (index of entry A, index of entry B, match number); B is None for a bye
+Pairing = Tuple[int, Optional[int], int]
+
+
+class Entry:
+    """A team taking part in a tournament, with its record and ratings."""
+
+    def __init__(self, name: str, team: PokemonTeam):
+        """Initialize with a display name and the team."""
+        self.name = name
+        self.team = team
+        self.wins = 0
+        self.losses = 0
+        self.draws = 0
+        self.byes = 0
+        self.elo = INITIAL_RATING
+        self.glicko = INITIAL_RATING
+        self.deviation = INITIAL_DEVIATION
+        self.opponents: List[int] = []
+
+    @property
+    def points(self) -> float:
+        """Match points: 1 per win or Swiss bye, 0.5 per draw."""
+        return self.wins + self.byes + 0.5 * self.draws
+
+
+class MatchResult:
+    """Outcome of a best-of-N match between two entries."""
+
+    __slots__ = ("entry_a", "entry_b", "wins_a", "wins_b", "draws", "hp_a", "hp_b")
+
+    def __init__(self, entry_a: int, entry_b: int, wins_a: int, wins_b: int, draws: int, hp_a: float, hp_b: float):
+        """Initialize with the game counts and the HP fraction each side had left, summed over games."""
+        self.entry_a = entry_a
+        self.entry_b = entry_b
+        self.wins_a = wins_a
+        self.wins_b = wins_b
+        self.draws = draws
+        self.hp_a = hp_a
+        self.hp_b = hp_b
+
+    @property
+    def score_a(self) -> float:
+        """1 if A won the match, 0 if B did, 0.5 for a tied series."""
+        if self.wins_a == self.wins_b:
+            return 0.5
+        return 1.0 if self.wins_a > self.wins_b else 0.0
+
+
+# Teams of the current tournament, set once per worker process
+_worker_teams: List[TeamState] = []
+
+
+def _init_worker(teams: List[PokemonTeam]):
+    global _worker_teams
+    _worker_teams = [TeamState(team) for team in teams]
+
+
+def _play_worker_match(entry_a: int, entry_b: int, best_of: int, seed: int, max_turns: int) -> MatchResult:
+    return play_match(_worker_teams, entry_a, entry_b, best_of, seed, max_turns)
+
+
+def play_match(teams: Sequence[PokemonTeam], entry_a: int, entry_b: int, best_of: int, seed: int,
+               max_turns: int = DEFAULT_MAX_TURNS) -> MatchResult:
+    """Play games until one side has won a majority of best_of; sides alternate every game."""
+    team_a, team_b = teams[entry_a], teams[entry_b]
+    needed = best_of // 2 + 1
+    wins_a = wins_b = draws = 0
+    hp_a = hp_b = 0.0
+
+    for game in range(best_of):
+        rng = random.Random(derive_seed(seed, game))
+        if game % 2 == 0:
+            result = run_battle(team_a, team_b, max_turns=max_turns, rng=rng)
+            winner_a, winner_b = "Player", "AI"
+            hp_a += result.player_hp
+            hp_b += result.ai_hp
+        else:
+            result = run_battle(team_b, team_a, max_turns=max_turns, rng=rng)
+            winner_a, winner_b = "AI", "Player"
+            hp_a += result.ai_hp
+            hp_b += result.player_hp
+
+        if result.winner == winner_a:
+            wins_a += 1
+        elif result.winner == winner_b:
+            wins_b += 1
+        else:
+            draws += 1
+        if wins_a >= needed or wins_b >= needed:
+            break
+
+    return MatchResult(entry_a, entry_b, wins_a, wins_b, draws, hp_a, hp_b)
+
+
+def _glicko_g(deviation: float) -> float:
+    return 1 / math.sqrt(1 + 3 * (_GLICKO_Q * deviation) ** 2 / math.pi ** 2)
+
+
+def _expected(rating: float, opponent: float, g: float = 1.0) -> float:
+    return 1 / (1 + 10 ** (-g * (rating - opponent) / 400))
+
+
+class Tournament:
+    """Runs brackets over a list of entries.
+
+    Every match seed comes from (seed, match number) and ratings are updated
+    round by round in schedule order, so results don't depend on the worker count.
+    """
+
+    def __init__(self,
+                 entries: Sequence[Entry],
+                 best_of: int = 1,
+                 seed: Optional[int] = None,
+                 max_turns: int = DEFAULT_MAX_TURNS,
+                 workers: Optional[int] = None):
+        """Initialize with the entries; workers=1 plays every match in this process."""
+        if best_of < 1 or best_of % 2 == 0:
+            raise ValueError("best_of must be a positive odd number")
+        self.entries = list(entries)
+        self.best_of = best_of
+        self.seed = seed if seed is not None else random.randrange(2 ** 63)
+        self.max_turns = max_turns
+        self.workers = workers or os.cpu_count() or 1
+        self.matches: List[MatchResult] = []
+        self._match_count = 0
+        self._executor: Optional[Executor] = None
+        self._teams: Optional[List[TeamState]] = None
+
+    def __enter__(self) -> "Tournament":
+        """Start the worker pool, which then serves every bracket run inside the with block."""
+        if self.workers > 1:
+            self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                                 initargs=([entry.team for entry in self.entries],))
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _pair(self, entry_a: int, entry_b: Optional[int]) -> Pairing:
+        self._match_count += 1
+        return entry_a, entry_b, self._match_count
+
+    def _play_rounds(self, rounds: List[List[Pairing]], award_byes: bool = False) -> List[List[MatchResult]]:
+        """Play every match of the given rounds (all submitted at once) and record them round by round.
+
+        Byes only count (as a bye and a point) when award_byes is set, as in Swiss pairings;
+        round-robin and elimination byes are just rounds an entry sits out.
+        """
+        if self._executor is None and self.workers > 1:
+            with self:
+                return self._play_rounds(rounds, award_byes)
+
+        played = []
+        for pairings in rounds:
+            matches = []
+            for entry_a, entry_b, number in pairings:
+                if entry_b is None:
+                    continue
+                args = (entry_a, entry_b, self.best_of, derive_seed(self.seed, number), self.max_turns)
+                if self._executor is not None:
+                    matches.append(self._executor.submit(_play_worker_match, *args))
+                else:
+                    if self._teams is None:
+                        self._teams = [TeamState(entry.team) for entry in self.entries]
+                    matches.append(play_match(self._teams, *args))
+            played.append((pairings, matches))
+
+        results = []
+        for pairings, matches in played:
+            round_results = [match.result() if self._executor is not None else match for match in matches]
+            if award_byes:
+                for entry_a, entry_b, _ in pairings:
+                    if entry_b is None:
+                        self.entries[entry_a].byes += 1
+            self._record_round(round_results)
+            results.append(round_results)
+        return results
+
+    def _record_round(self, results: List[MatchResult]):
+        """Update records and both rating systems; each round is one rating period."""
+        elo_changes = [0.0] * len(self.entries)
+        glicko_games: Dict[int, List[Tuple[int, float]]] = {}
+
+        for match in results:
+            a, b = self.entries[match.entry_a], self.entries[match.entry_b]
+            a.opponents.append(match.entry_b)
+            b.opponents.append(match.entry_a)
+            score = match.score_a
+            if score == 1.0:
+                a.wins += 1
+                b.losses += 1
+            elif score == 0.0:
+                a.losses += 1
+                b.wins += 1
+            else:
+                a.draws += 1
+                b.draws += 1
+
+            expected = _expected(a.elo, b.elo)
+            elo_changes[match.entry_a] += ELO_K * (score - expected)
+            elo_changes[match.entry_b] -= ELO_K * (score - expected)
+            glicko_games.setdefault(match.entry_a, []).append((match.entry_b, score))
+            glicko_games.setdefault(match.entry_b, []).append((match.entry_a, 1 - score))
+
+        # Glicko-1: ratings move from the values at the start of the period
+        updates = {}
+        for index, games in glicko_games.items():
+            entry = self.entries[index]
+            variance_inverse = 0.0
+            improvement = 0.0
+            for opponent_index, score in games:
+                opponent = self.entries[opponent_index]
+                g = _glicko_g(opponent.deviation)
+                expected = _expected(entry.glicko, opponent.glicko, g)
+                variance_inverse += _GLICKO_Q ** 2 * g ** 2 * expected * (1 - expected)
+                improvement += g * (score - expected)
+            precision = 1 / entry.deviation ** 2 + variance_inverse
+            updates[index] = (entry.glicko + _GLICKO_Q / precision * improvement,
+                              max(MIN_DEVIATION, math.sqrt(1 / precision)))
+
+        for index, change in enumerate(elo_changes):
+            self.entries[index].elo += change
+        for index, (rating, deviation) in updates.items():
+            self.entries[index].glicko = rating
+            self.entries[index].deviation = deviation
+        self.matches.extend(results)
+
+    def round_robin(self) -> List[Entry]:
+        """Every entry plays every other once; rounds follow the circle method."""
+        indices: List[Optional[int]] = list(range(len(self.entries)))
+        if len(indices) % 2:
+            indices.append(None)
+
+        rounds = []
+        for _ in range(len(indices) - 1):
+            pairings = []
+            for i in range(len(indices) // 2):
+                a, b = indices[i], indices[-1 - i]
+                if a is None:
+                    a, b = b, a
+                pairings.append(self._pair(a, b))
+            rounds.append(pairings)
+            indices = [indices[0], indices[-1]] + indices[1:-1]
+
+        self._play_rounds(rounds)
+        return self.standings()
+
+    def swiss(self, rounds: Optional[int] = None) -> List[Entry]:
+        """Pair entries with equal points each round, avoiding rematches where possible.
+
+        Defaults to ceil(log2(entries)) rounds; with an odd field the lowest-ranked
+        entry without a bye sits out each round and scores a win.
+        """
+        rounds = rounds or max(1, math.ceil(math.log2(max(2, len(self.entries)))))
+        for _ in range(rounds):
+            order = sorted(range(len(self.entries)), key=self._rank_key)
+            pairings = []
+            if len(order) % 2:
+                bye = next((index for index in reversed(order) if self.entries[index].byes == 0), order[-1])
+                order.remove(bye)
+                pairings.append(self._pair(bye, None))
+
+            while order:
+                a = order.pop(0)
+                opponent = next((b for b in order if b not in self.entries[a].opponents), order[0])
+                order.remove(opponent)
+                pairings.append(self._pair(a, opponent))
+            self._play_rounds([pairings], award_byes=True)
+        return self.standings()
+
+    def single_elimination(self) -> List[Entry]:
+        """Knockout bracket seeded in entry order (top seeds get the byes).
+
+        A tied series goes to the side with more HP left over its games, then to the higher seed.
+        Returns the standings with the champion first.
+        """
+        size = 1 << max(0, (len(self.entries) - 1).bit_length())
+        seeds = _bracket_order(size)
+        alive: List[Optional[int]] = [index if index < len(self.entries) else None for index in seeds]
+        eliminated: List[int] = []
+
+        while len(alive) > 1:
+            pairings = []
+            for a, b in zip(alive[0::2], alive[1::2]):
+                if a is None:
+                    a, b = b, a
+                if a is not None:
+                    pairings.append(self._pair(a, b))
+
+            results = {(match.entry_a, match.entry_b): match for match in self._play_rounds([pairings])[0]}
+            advancing: List[Optional[int]] = []
+            round_losers = []
+            for a, b, _ in pairings:
+                if b is None:
+                    advancing.append(a)
+                    continue
+                match = results[(a, b)]
+                a_wins = match.score_a > 0.5 or (match.score_a == 0.5 and (match.hp_a, -a) > (match.hp_b, -b))
+                advancing.append(a if a_wins else b)
+                round_losers.append(b if a_wins else a)
+            eliminated.extend(sorted(round_losers, key=self._rank_key, reverse=True))
+            alive = advancing
+
+        order = [index for index in alive if index is not None] + eliminated[::-1]
+        return [self.entries[index] for index in order]
+
+    def _rank_key(self, index: int) -> Tuple:
+        entry = self.entries[index]
+        return -entry.points, -entry.glicko, index
+
+    def standings(self) -> List[Entry]:
+        """Entries ordered by points, then Glicko rating."""
+        return [self.entries[index] for index in sorted(range(len(self.entries)), key=self._rank_key)]
+
+
+def _bracket_order(size: int) -> List[int]:
+    """Seed positions for a bracket of size slots, so seeds 0 and 1 can only meet in the final."""
+    order = [0]
+    while len(order) < size:
+        order = [seed for position in order for seed in (position, 2 * len(order) - 1 - position)]
+    return order
+
+
+def load_team_file(path: str, api_client) -> List[Entry]:
+    """Read teams from a Showdown or JSON team file (see data.team_files), or one team per line.
+
+    In the line format each line lists species names separated by commas; blank
+    lines and # comments are skipped.
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if is_team_file(path, text):
+        teams = TeamLoader(record_source(api_client)).load_file(path)
+        return [Entry(f"{os.path.basename(path)}: {team.name}", team) for team in teams]
+
+    rosters = []
+    for line_number, line in enumerate(text.splitlines(), 1):
+        line = line.split("#", 1)[0].strip()
+        if line:
+            rosters.append((f"{os.path.basename(path)}:{line_number}", [name.strip() for name in line.split(",")]))
+
+    all_pokemon = api_client.get_many_pokemon(name for _, names in rosters for name in names)
+    entries = []
+    position = 0
+    for label, names in rosters:
+        members = all_pokemon[position:position + len(names)]
+        position += len(names)
+        missing = [name for name, pokemon in zip(names, members) if pokemon is None]
+        if missing:
+            raise ValueError(f"{label}: couldn't load {', '.join(missing)}")
+        team = PokemonTeam(label)
+        for pokemon in members:
+            team.add_pokemon(pokemon)
+        entries.append(Entry(label, team))
+    return entries
+
+
+def format_standings(standings: List[Entry]) -> str:
+    """Render standings as a text table."""
+    lines = [f"{'#':>3} {'Team':<24} {'W':>4} {'L':>4} {'D':>4} {'Pts':>6} {'Elo':>7} {'Glicko':>7} {'RD':>5}"]
+    for rank, entry in enumerate(standings, 1):
+        lines.append(f"{rank:>3} {entry.name[:24]:<24} {entry.wins:>4} {entry.losses:>4} {entry.draws:>4} "
+                     f"{entry.points:>6.1f} {entry.elo:>7.1f} {entry.glicko:>7.1f} {entry.deviation:>5.0f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    from data.cache import PokeAPICache, DEFAULT_CACHE_PATH
+    from data.championship_teams import ChampionshipTeams
+    from data.pokeapi import PokeAPIClient
+    from data.pokedex import LocalPokedex, LocalPokedexClient
+
+    parser = argparse.ArgumentParser(description="Run a tournament between championship and user teams")
+    parser.add_argument("format", choices=["round-robin", "swiss", "elimination"])
+    parser.add_argument("--teams", action="append", default=[],
+                        help="Team file: Showdown export, JSON, or one team per line (repeatable)")
+    parser.add_argument("--no-championship", action="store_true", help="Leave out the built-in championship teams")
+    parser.add_argument("--best-of", type=int, default=1, help="Games per match (odd)")
+    parser.add_argument("--rounds", type=int, default=None, help="Swiss rounds (default log2 of the field)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (0 uses every core)")
+    parser.add_argument("--pokedex", help="Serve Pokemon data from an imported local Pokedex store")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--offline", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.pokedex:
+        api_client = LocalPokedexClient(LocalPokedex(args.pokedex))
+    else:
+        api_client = PokeAPIClient(cache=PokeAPICache(args.cache), offline=args.offline)
+
+    entries = []
+    if not args.no_championship:
+        teams_data = ChampionshipTeams(api_client)
+        teams_data.load_teams()
+        entries.extend(Entry(f"Champion {number}", team) for number, team in enumerate(teams_data.teams, 1))
+    for path in args.teams:
+        entries.extend(load_team_file(path, api_client))
+    if len(entries) < 2:
+        parser.error("a tournament needs at least two teams")
+
+    with Tournament(entries, args.best_of, args.seed, workers=args.workers or None) as tournament:
+        if args.format == "round-robin":
+            standings = tournament.round_robin()
+        elif args.format == "swiss":
+            standings = tournament.swiss(args.rounds)
+        else:
+            standings = tournament.single_elimination()
+
+    print(format_standings(standings))
+    print(f"Seed: {tournament.seed}")
+
+
+if __name__ == "__main__":
+    main()
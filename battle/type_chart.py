@@ -1,6 +1,8 @@
 """
 Type effectiveness chart for Pokemon battles.
 """
+from array import array
+from typing import Sequence
 
 # Type effectiveness chart (attacking type -> defending type -> effectiveness)
 TYPE_CHART = {
@@ -172,4 +174,57 @@ def normalize_type_chart():
                 TYPE_CHART[attacking_type][defending_type] = 1.0
 
 # Call this to normalize the chart when module is imported
-normalize_type_chart()
\ No newline at end of file
+normalize_type_chart()
+
+# Integer ids for every type, in chart order; NO_TYPE fills the second slot of single-typed Pokemon
+TYPES = tuple(TYPE_CHART.keys())
+TYPE_IDS = {name: index for index, name in enumerate(TYPES)}
+NO_TYPE = len(TYPES)
+
+# Defending type pairs are indexed as first_id * TYPE_SLOTS + second_id
+TYPE_SLOTS = len(TYPES) + 1
+PAIR_COUNT = TYPE_SLOTS * TYPE_SLOTS
+
+def build_effectiveness_table() -> array:
+    """Precompute attacking type x defending type pair multipliers as a flat array.
+
+    Entries are multiplied in the same order as a per-type loop would, so lookups
+    give exactly the same floats as walking TYPE_CHART.
+    """
+    table = array("d", [1.0]) * (len(TYPES) * PAIR_COUNT)
+    for attacking_type in TYPES:
+        row = TYPE_CHART[attacking_type]
+        base = TYPE_IDS[attacking_type] * PAIR_COUNT
+        for first in range(TYPE_SLOTS):
+            first_multiplier = 1.0 if first == NO_TYPE else row[TYPES[first]]
+            for second in range(TYPE_SLOTS):
+                multiplier = 1.0 * first_multiplier
+                if second != NO_TYPE:
+                    multiplier *= row[TYPES[second]]
+                table[base + first * TYPE_SLOTS + second] = multiplier
+    return table
+
+EFFECTIVENESS = build_effectiveness_table()
+
+def defending_key(types: Sequence[str]) -> int:
+    """Index of a defending type combination (up to two types; unknown types count as no type)."""
+    if len(types) == 1:
+        return TYPE_IDS.get(types[0], NO_TYPE) * TYPE_SLOTS + NO_TYPE
+    if len(types) == 2:
+        return TYPE_IDS.get(types[0], NO_TYPE) * TYPE_SLOTS + TYPE_IDS.get(types[1], NO_TYPE)
+    if not types:
+        return NO_TYPE * TYPE_SLOTS + NO_TYPE
+    raise ValueError(f"A Pokemon can't have more than two types: {types}")
+
+def type_effectiveness(move_type: str, defender_types: Sequence[str]) -> float:
+    """Effectiveness multiplier of a move type against a defender's types."""
+    attack_id = TYPE_IDS.get(move_type)
+    if attack_id is None:
+        return 1.0
+    if len(defender_types) > 2:
+        multiplier = 1.0
+        for def_type in defender_types:
+            if def_type in TYPE_IDS:
+                multiplier *= TYPE_CHART[move_type][def_type]
+        return multiplier
+    return EFFECTIVENESS[attack_id * PAIR_COUNT + defending_key(defender_types)]
@@ -0,0 +1,43 @@
+"""
+Offline team fixtures for the Pokemon Battle Simulator benchmarks
+Serves the championship rosters from fixtures.json so runs never touch the network
+"""
+import json
+import os
+from typing import Dict, List, Optional
+from data.cache import normalize_name
+from data.championship_teams import ChampionshipTeams
+from data.pokedex import LocalPokedexClient
+from models.team import PokemonTeam
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures.json")
+
+
+class FixturePokedex:
+    """In-memory species and move records read from a fixture file.
+
+    The records use the compact PokeAPIClient format; each species lists exactly
+    the four moves it battles with, so the fixture never changes between runs.
+    """
+
+    def __init__(self, path: str = FIXTURE_PATH):
+        """Load the fixture file."""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.species = {record["name"]: record for record in data["pokemon"]}
+        self.moves = {record["name"]: record for record in data["moves"]}
+
+    def get_species_record(self, name) -> Optional[Dict]:
+        """Species record by name."""
+        return self.species.get(normalize_name(name))
+
+    def get_move_record(self, name) -> Optional[Dict]:
+        """Move record by name."""
+        return self.moves.get(normalize_name(name))
+
+
+def load_fixture_teams(path: str = FIXTURE_PATH) -> List[PokemonTeam]:
+    """Build ChampionshipTeams.ROSTERS from the fixture file."""
+    teams_data = ChampionshipTeams(LocalPokedexClient(FixturePokedex(path)))
+    teams_data.load_teams()
+    return teams_data.teams
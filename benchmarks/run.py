@@ -0,0 +1,252 @@
+"""
+Benchmark suite for the Pokemon Battle Simulator
+Times the engine hot paths on the offline championship fixtures, reports ops/sec and
+memory, and stores results as JSON so runs of different versions can be compared
+
+    python -m benchmarks.run --save before.json
+    python -m benchmarks.run --compare before.json
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+from battle.battle_engine import BattleEngine
+from battle.simulation import run_battle
+from benchmarks.fixtures import FIXTURE_PATH, FixturePokedex, load_fixture_teams
+from data.team_files import TeamLoader, TeamSpec, format_json, parse_json, team_spec
+from models.team import PokemonTeam
+
+# Each benchmark builds a callable from the fixture teams and says how many operations one call performs
+Benchmark = Callable[[List[PokemonTeam]], Tuple[Callable[[], None], int]]
+
+DEFAULT_THRESHOLD = 0.10
+
+
+def _engine(teams: List[PokemonTeam], player: int = 0, ai: int = 1) -> BattleEngine:
+    return BattleEngine(teams[player].clone(), teams[ai].clone(), rng=random.Random(0), log_turns=False)
+
+
+def bench_type_effectiveness(teams: List[PokemonTeam]):
+    engine = _engine(teams)
+    pairs = [(move.type, defender.types)
+             for team in teams for attacker in team.pokemon for move in attacker.moves
+             for defender in teams[0].pokemon]
+
+    def run():
+        for move_type, defender_types in pairs:
+            engine._calculate_type_effectiveness(move_type, defender_types)
+    return run, len(pairs)
+
+
+def bench_calculate_damage(teams: List[PokemonTeam]):
+    engine = _engine(teams)
+    triples = [(attacker, defender, index)
+               for attacker in teams[0].pokemon for defender in teams[1].pokemon
+               for index in range(len(attacker.moves))]
+
+    def run():
+        for attacker, defender, index in triples:
+            engine._calculate_damage(attacker, defender, index)
+    return run, len(triples)
+
+
+def bench_ai_select_move(teams: List[PokemonTeam]):
+    engine = _engine(teams)
+    pairs = [(attacker, defender) for team in teams for attacker in team.pokemon for defender in teams[0].pokemon]
+
+    def run():
+        for attacker, defender in pairs:
+            engine._ai_select_move(attacker, defender)
+    return run, len(pairs)
+
+
+def bench_ai_decide_switch(teams: List[PokemonTeam]):
+    engines = []
+    for ai in range(1, len(teams)):
+        engine = _engine(teams, 0, ai)
+        # Below 30% HP the AI scores every teammate against the opponent
+        active = engine.ai_team.get_active_pokemon()
+        active.current_hp = max(1, int(active.stats["hp"] * 0.2))
+        engines.append(engine)
+
+    def run():
+        for engine in engines:
+            engine._ai_decide_switch()
+    return run, len(engines)
+
+
+def bench_process_turn(teams: List[PokemonTeam]):
+    engine = _engine(teams)
+    start = engine.snapshot()
+    choices = [str(index + 1) for index in range(len(engine.player_team.get_active_pokemon().moves))]
+
+    # Every turn starts from the same position; restoring it is part of the measured work
+    def run():
+        for choice in choices:
+            engine.restore(start)
+            engine.process_turn(choice)
+    return run, len(choices)
+
+
+def bench_full_battle(teams: List[PokemonTeam]):
+    matchups = [(teams[i].clone(), teams[j].clone()) for i in range(len(teams)) for j in range(len(teams)) if i != j]
+    rng = random.Random(0)
+
+    def run():
+        rng.seed(0)
+        for player_team, ai_team in matchups:
+            run_battle(player_team, ai_team, rng=rng)
+    return run, len(matchups)
+
+
+def bench_team_loader(teams: List[PokemonTeam], count: int = 1000):
+    specs = [team_spec(team) for team in teams]
+    members = [member for spec in specs for member in spec.pokemon]
+    # Distinct six-member teams drawn from the fixture Pokemon, as in a large ladder export
+    rng = random.Random(0)
+    text = format_json(TeamSpec(f"Team {number}", rng.sample(members, 6)) for number in range(count))
+    pokedex = FixturePokedex()
+
+    # Parsing, name resolution, validation and building with a cold loader every call
+    def run():
+        TeamLoader(pokedex).load(parse_json(text)[0])
+    return run, count
+
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    "type_effectiveness": bench_type_effectiveness,
+    "calculate_damage": bench_calculate_damage,
+    "ai_select_move": bench_ai_select_move,
+    "ai_decide_switch": bench_ai_decide_switch,
+    "process_turn": bench_process_turn,
+    "full_battle": bench_full_battle,
+    "team_loader": bench_team_loader
+}
+
+
+def _autorange(function: Callable[[], None], min_time: float) -> int:
+    """Smallest call count in the 1, 2, 5, 10, 20, ... sequence whose run takes at least min_time seconds."""
+    base = 1
+    while True:
+        for number in (base, base * 2, base * 5):
+            start = time.perf_counter()
+            for _ in range(number):
+                function()
+            if time.perf_counter() - start >= min_time:
+                return number
+        base *= 10
+
+
+def measure(function: Callable[[], None], ops_per_call: int, repeat: int = 5, min_time: float = 0.2) -> Dict:
+    """Time function (best of repeat runs) and then measure its memory use with tracemalloc.
+
+    peak_bytes is the most memory in use above the starting point during one call;
+    retained_bytes is what is still allocated after 10 further calls, which flags leaks and unbounded caches.
+    """
+    function()
+    number = _autorange(function, min_time)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        function()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        for _ in range(10):
+            function()
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ops_per_sec": ops_per_call * number / best,
+        "ops_per_call": ops_per_call,
+        "calls": number,
+        "peak_bytes": peak,
+        "retained_bytes": retained
+    }
+
+
+def run_benchmarks(names: Optional[List[str]] = None, repeat: int = 5, min_time: float = 0.2,
+                   fixture_path: str = FIXTURE_PATH) -> Dict:
+    """Run the selected benchmarks (all by default) and return a results document."""
+    teams = load_fixture_teams(fixture_path)
+    results = {}
+    for name in names or BENCHMARKS:
+        function, ops_per_call = BENCHMARKS[name](teams)
+        results[name] = measure(function, ops_per_call, repeat, min_time)
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Names of benchmarks whose ops/sec dropped by more than threshold against baseline."""
+    regressions = []
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is not None and result["ops_per_sec"] < previous["ops_per_sec"] * (1 - threshold):
+            regressions.append(name)
+    return regressions
+
+
+def _format_row(name: str, result: Dict, previous: Optional[Dict]) -> str:
+    row = f"{name:<20} {result['ops_per_sec']:>14,.0f} ops/s {result['peak_bytes'] / 1024:>10.1f} KiB peak"
+    row += f" {result['retained_bytes'] / 1024:>10.1f} KiB retained"
+    if previous is not None:
+        change = result["ops_per_sec"] / previous["ops_per_sec"] - 1
+        row += f" {change:>+8.1%}"
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the battle engine on offline championship teams")
+    parser.add_argument("benchmarks", nargs="*", help=f"Benchmarks to run (default all): {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark; the best one counts")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per timed run")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Compare against results saved by an earlier run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Slowdown (fraction of ops/sec) reported as a regression")
+    parser.add_argument("--fixtures", default=FIXTURE_PATH, help="Team fixture file")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    current = run_benchmarks(args.benchmarks or None, args.repeat, args.min_time, args.fixtures)
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name) if baseline is not None else None
+        print(_format_row(name, result, previous))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+
+    if baseline is not None:
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"Regressions over {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Persistent cache for the Pokemon Battle Simulator
+Stores compact PokeAPI records on disk so sessions can start without the network
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "pokemon_battle_simulator", "pokeapi.sqlite3")
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a species or move name the way PokeAPI expects it."""
+    return str(name).strip().lower().replace(" ", "-")
+
+
+class PokeAPICache:
+    """SQLite-backed store of PokeAPI records keyed by resource kind and normalized name."""
+
+    def __init__(self,
+                 path: str = DEFAULT_CACHE_PATH,
+                 ttl: Optional[float] = 30 * 24 * 60 * 60,
+                 max_entries: int = 5000):
+        """Open (or create) the cache database.
+
+        ttl is the number of seconds a record stays fresh (None keeps records forever)
+        and max_entries bounds the store; the least recently used records are evicted first.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            " kind TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (kind, name))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS records_accessed ON records (accessed_at)")
+        self._conn.commit()
+
+    def get(self, kind: str, name: str, allow_stale: bool = False) -> Optional[Dict]:
+        """Return the cached record, or None if it is missing or expired."""
+        key = normalize_name(name)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, stored_at FROM records WHERE kind = ? AND name = ?", (kind, key)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            payload, stored_at = row
+            if not allow_stale and self.ttl is not None and now - stored_at > self.ttl:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+
+            self._conn.execute(
+                "UPDATE records SET accessed_at = ? WHERE kind = ? AND name = ?", (now, kind, key)
+            )
+            self._conn.commit()
+        return json.loads(payload)
+
+    def put(self, kind: str, name: str, record: Dict):
+        """Store a record, evicting the least recently used ones if the cache is full."""
+        key = normalize_name(name)
+        now = time.time()
+        payload = json.dumps(record, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO records (kind, name, payload, stored_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (kind, key, payload, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop the least recently used records beyond max_entries."""
+        count = self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM records WHERE rowid IN"
+                " (SELECT rowid FROM records ORDER BY accessed_at LIMIT ?)",
+                (excess,)
+            )
+
+    def clear(self):
+        """Remove every record from the cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM records")
+            self._conn.commit()
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self):
+        """Get the number of cached records."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
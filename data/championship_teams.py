@@ -2,39 +2,51 @@
 Championship teams for the Pokemon Battle Simulator
 """
 import random
+from typing import Optional
 from models.team import PokemonTeam
 from data.pokeapi import PokeAPIClient
+from data.team_files import TeamLoader, record_source
 
 class ChampionshipTeams:
     """Collection of pre-made teams for the AI to use."""
 
-    def __init__(self, api_client: PokeAPIClient):
-        """Initialize with an API client."""
+    # This would be expanded with actual championship teams
+    ROSTERS = [
+        ["Landorus-Therian", "amoonguss", "politoed", "aegislash-blade", "thundurus-Incarnate", "gardevoir"],
+        ["gardevoir", "amoonguss", "heatran", "scrafty", "thundurus-Incarnate", "Landorus-Therian"],
+        ["rotom-wash", "Landorus-Therian", "amoonguss", "salamence", "tyranitar", "aegislash-blade"],
+        ["charizard", "conkeldurr", "sylveon", "aegislash-blade", "Landorus-Therian", "thundurus-Incarnate"],
+        ["kangaskhan", "heatran", "Landorus-Therian", "thundurus-Incarnate", "amoonguss", "milotic"],
+        ["excadrill", "gastrodon", "cresselia", "salamence", "rotom-heat", "tyranitar"],
+        ["magikarp", "reshiram", "lugia", "rayquaza", "mewtwo", "arceus"]
+    ]
+
+    def __init__(self, api_client: PokeAPIClient, team_file: Optional[str] = None):
+        """Initialize with an API client, and optionally a team file to use instead of the built-in rosters."""
         self.api_client = api_client
+        self.team_file = team_file
         self.teams = []
 
     def load_teams(self):
         """Load championship teams."""
-        # This would be expanded with actual championship teams
-        team_names = [
-            ["Landorus-Therian", "amoonguss", "politoed", "aegislash-blade", "thundurus-Incarnate", "gardevoir"],
-            ["gardevoir", "amoonguss", "heatran", "scrafty", "thundurus-Incarnate", "Landorus-Therian"],
-            ["rotom-wash", "Landorus-Therian", "amoonguss", "salamence", "tyranitar", "aegislash-blade"],
-            ["charizard", "conkeldurr", "sylveon", "aegislash-blade", "Landorus-Therian", "thundurus-Incarnate"],
-            ["kangaskhan", "heatran", "Landorus-Therian", "thundurus-Incarnate", "amoonguss", "milotic"],
-            ["excadrill", "gastrodon", "cresselia", "salamence", "rotom-heat", "tyranitar"],
-            ["magikarp", "reshiram", "lugia", "rayquaza", "mewtwo", "arceus"]
-        ]
+        if self.team_file is not None:
+            self.teams.extend(TeamLoader(record_source(self.api_client)).load_file(self.team_file))
+            return
+
+        # Fetch every roster in one batch so shared species are requested once
+        all_pokemon = self.api_client.get_many_pokemon(name for names in self.ROSTERS for name in names)
 
-        for names in team_names:
+        position = 0
+        for names in self.ROSTERS:
             team = PokemonTeam("Champion Team")
-            for name in names:
-                pokemon = self.api_client.get_pokemon(name)
+            for pokemon in all_pokemon[position:position + len(names)]:
                 team.add_pokemon(pokemon)
+            position += len(names)
             self.teams.append(team)
 
-    def get_random_team(self) -> PokemonTeam:
-        """Get a random championship team."""
+    def get_random_team(self, rng: Optional[random.Random] = None) -> PokemonTeam:
+        """Get a fresh copy of a random championship team, drawn from rng if one is given."""
         if not self.teams:
             self.load_teams()
-        return random.choice(self.teams)
\ No newline at end of file
+        # Hand out clones so the loaded teams stay at full HP and PP for the next battle
+        return (rng if rng is not None else random).choice(self.teams).clone()
\ No newline at end of file
@@ -0,0 +1,272 @@
+"""
+Memory-mapped columnar Pokedex for the Pokemon Battle Simulator
+Read-only species/move tables that are paged in lazily and shared between forked workers
+
+File layout: b"PBSD", format version (u32), metadata length (u32), JSON metadata, then
+8-byte aligned column sections. The metadata lists every section as
+(array typecode, offset, length) plus the type, category and stat names.
+Columns are written in the native byte order of the machine that built the file.
+"""
+import argparse
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+from data.cache import normalize_name
+from data.pokedex import DEFAULT_POKEDEX_PATH, STAT_NAMES, LocalPokedex, make_pokemon
+from models.pokemon import Pokemon
+
+MAGIC = b"PBSD"
+VERSION = 1
+NO_TYPE = 255
+
+_HEADER = struct.Struct("<4sII")
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def build_columnar_database(species_records: Iterable[Dict], move_records: Iterable[Dict], path: str) -> int:
+    """Write species and move records (the compact dicts used by PokeAPIClient) to a columnar file.
+
+    Returns the number of species written.
+    """
+    moves = sorted(move_records, key=lambda record: record["id"])
+    species = sorted(species_records, key=lambda record: record["id"])
+
+    type_names = sorted({record["type"] for record in moves} | {t for record in species for t in record["types"]})
+    categories = sorted({record["category"] for record in moves})
+    type_ids = {name: index for index, name in enumerate(type_names)}
+    category_ids = {name: index for index, name in enumerate(categories)}
+    move_rows = {record["name"]: row for row, record in enumerate(moves)}
+
+    # Each string column is an end-offset array plus a blob of UTF-8 bytes
+    blobs = {"move_names": bytearray(), "species_names": bytearray(), "species_sprites": bytearray()}
+
+    def add_string(column: str, value: Optional[str]):
+        blobs[column].extend((value or "").encode("utf-8"))
+        columns[column].append(len(blobs[column]))
+
+    columns = {
+        "move_ids": array("i"), "move_types": array("B"), "move_categories": array("B"),
+        "move_power": array("h"), "move_accuracy": array("h"), "move_pp": array("h"),
+        "move_names": array("I", [0]),
+        "species_ids": array("i"), "species_stats": array("h"), "species_types": array("B"),
+        "species_names": array("I", [0]), "species_sprites": array("I", [0]),
+        "learnset_offsets": array("I", [0]), "learnsets": array("i")
+    }
+
+    for record in moves:
+        columns["move_ids"].append(record["id"])
+        columns["move_types"].append(type_ids[record["type"]])
+        columns["move_categories"].append(category_ids[record["category"]])
+        columns["move_power"].append(record["power"] or 0)
+        columns["move_accuracy"].append(record["accuracy"] or 100)
+        columns["move_pp"].append(record["pp"] or 0)
+        add_string("move_names", record["name"])
+
+    for record in species:
+        columns["species_ids"].append(record["id"])
+        columns["species_stats"].extend(record["stats"][stat] for stat in STAT_NAMES)
+        pokemon_types = [type_ids[t] for t in record["types"][:2]]
+        columns["species_types"].extend(pokemon_types + [NO_TYPE] * (2 - len(pokemon_types)))
+        add_string("species_names", record["name"])
+        add_string("species_sprites", record.get("sprite_url"))
+        columns["learnsets"].extend(move_rows[name] for name in record["moves"] if name in move_rows)
+        columns["learnset_offsets"].append(len(columns["learnsets"]))
+
+    # Row orders for binary search by name (as UTF-8 bytes) and by id
+    columns["moves_by_name"] = array("i", sorted(range(len(moves)),
+                                                 key=lambda row: moves[row]["name"].encode("utf-8")))
+    columns["species_by_name"] = array("i", sorted(range(len(species)),
+                                                   key=lambda row: species[row]["name"].encode("utf-8")))
+    for name, blob in blobs.items():
+        columns[f"{name}_strings"] = array("B", bytes(blob))
+
+    # Lay out the sections after the metadata block, repeating until its size settles
+    sections = {}
+    metadata = b""
+    while True:
+        offset = _align(_HEADER.size + len(metadata))
+        for name, column in columns.items():
+            sections[name] = (column.typecode, offset, len(column))
+            offset = _align(offset + len(column) * column.itemsize)
+        updated = json.dumps({
+            "byteorder": sys.byteorder,
+            "sections": sections,
+            "types": type_names,
+            "categories": categories,
+            "stats": STAT_NAMES
+        }).encode("utf-8")
+        if len(updated) == len(metadata):
+            metadata = updated
+            break
+        metadata = updated
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(metadata)))
+        f.write(metadata)
+        for name, column in columns.items():
+            f.seek(sections[name][1])
+            f.write(column.tobytes())
+
+    return len(species)
+
+
+class ColumnarPokedex:
+    """Read-only species/move lookups over a memory-mapped columnar file.
+
+    Opening only parses the small metadata block; column pages are read by the OS
+    on first use, and Pokemon/Move objects are built only when requested. Since the
+    mapping is file-backed and read-only, workers forked after opening share its pages.
+    Offers the same lookups as LocalPokedex, so it plugs into LocalPokedexClient.
+    """
+
+    def __init__(self, path: str):
+        """Map a columnar Pokedex file."""
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, metadata_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a columnar Pokedex file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported columnar Pokedex version {version}")
+
+        metadata = json.loads(bytes(self._mmap[_HEADER.size:_HEADER.size + metadata_length]))
+        if metadata["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was built on a {metadata['byteorder']}-endian machine")
+
+        self.type_names: List[str] = metadata["types"]
+        self.categories: List[str] = metadata["categories"]
+        self.stat_names: List[str] = metadata["stats"]
+
+        self._view = memoryview(self._mmap)
+        self._columns = {}
+        for name, (typecode, offset, length) in metadata["sections"].items():
+            itemsize = array(typecode).itemsize
+            self._columns[name] = self._view[offset:offset + length * itemsize].cast(typecode)
+
+        self.species_count = len(self._columns["species_ids"])
+        self.move_count = len(self._columns["move_ids"])
+
+    def _string(self, column: str, row: int) -> str:
+        offsets = self._columns[column]
+        return bytes(self._columns[f"{column}_strings"][offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+    def _find_by_name(self, order: memoryview, column: str, name: str) -> int:
+        """Binary search a name-sorted row order; returns the row or -1."""
+        target = name.encode("utf-8")
+        offsets = self._columns[column]
+        strings = self._columns[f"{column}_strings"]
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            row = order[middle]
+            candidate = bytes(strings[offsets[row]:offsets[row + 1]])
+            if candidate < target:
+                low = middle + 1
+            elif candidate > target:
+                high = middle
+            else:
+                return row
+        return -1
+
+    @staticmethod
+    def _find_by_id(ids: memoryview, wanted: int) -> int:
+        """Binary search the id column (rows are stored in id order); returns the row or -1."""
+        low, high = 0, len(ids)
+        while low < high:
+            middle = (low + high) // 2
+            if ids[middle] < wanted:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < len(ids) and ids[low] == wanted else -1
+
+    def _species_row(self, name) -> int:
+        key = normalize_name(name)
+        if key.isdigit():
+            return self._find_by_id(self._columns["species_ids"], int(key))
+        return self._find_by_name(self._columns["species_by_name"], "species_names", key)
+
+    def _move_row(self, name) -> int:
+        key = normalize_name(name)
+        if key.isdigit():
+            return self._find_by_id(self._columns["move_ids"], int(key))
+        return self._find_by_name(self._columns["moves_by_name"], "move_names", key)
+
+    def _move_record(self, row: int) -> Dict:
+        columns = self._columns
+        return {
+            "id": columns["move_ids"][row],
+            "name": self._string("move_names", row),
+            "type": self.type_names[columns["move_types"][row]],
+            "category": self.categories[columns["move_categories"][row]],
+            "power": columns["move_power"][row],
+            "accuracy": columns["move_accuracy"][row],
+            "pp": columns["move_pp"][row]
+        }
+
+    def _species_record(self, row: int) -> Dict:
+        columns = self._columns
+        stats = columns["species_stats"][row * len(self.stat_names):(row + 1) * len(self.stat_names)]
+        types = columns["species_types"][row * 2:row * 2 + 2]
+        learnset = columns["learnsets"][columns["learnset_offsets"][row]:columns["learnset_offsets"][row + 1]]
+        return {
+            "id": columns["species_ids"][row],
+            "name": self._string("species_names", row),
+            "types": [self.type_names[t] for t in types if t != NO_TYPE],
+            "stats": dict(zip(self.stat_names, stats.tolist())),
+            "moves": [self._string("move_names", move_row) for move_row in learnset],
+            "sprite_url": self._string("species_sprites", row) or None
+        }
+
+    def get_species_record(self, name) -> Optional[Dict]:
+        """Species record by name or id."""
+        row = self._species_row(name)
+        return self._species_record(row) if row >= 0 else None
+
+    def get_move_record(self, name) -> Optional[Dict]:
+        """Move record by name or id."""
+        row = self._move_row(name)
+        return self._move_record(row) if row >= 0 else None
+
+    def make_pokemon(self, species_id: int, level: int, move_ids: Tuple[int, ...]) -> Pokemon:
+        """Build a Pokemon with a given moveset, e.g. as a replay factory."""
+        return make_pokemon(self, species_id, level, move_ids)
+
+    def species_names(self) -> List[str]:
+        """Names of every species, in id order."""
+        return [self._string("species_names", row) for row in range(self.species_count)]
+
+    def close(self):
+        """Release the mapping; records already built stay valid."""
+        for column in self._columns.values():
+            column.release()
+        self._columns = {}
+        self._view.release()
+        self._mmap.close()
+
+    def __len__(self):
+        """Get the number of species."""
+        return self.species_count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a memory-mapped Pokedex from the local Pokedex store")
+    parser.add_argument("output", help="Path of the columnar file to write")
+    parser.add_argument("--db", default=DEFAULT_POKEDEX_PATH, help="Path of the imported Pokedex store")
+    args = parser.parse_args(argv)
+
+    pokedex = LocalPokedex(args.db)
+    count = build_columnar_database(pokedex.species.values(), pokedex.moves.values(), args.output)
+    print(f"Wrote {count} Pokemon to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
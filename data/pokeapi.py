@@ -1,20 +1,37 @@
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
 import requests
+from requests.adapters import HTTPAdapter
 from models.pokemon import Pokemon
 from models.move import Move
+from data.cache import PokeAPICache, normalize_name
 
 class PokeAPIClient:
     BASE_URL = "https://pokeapi.co/api/v2/"
 
+    def __init__(self, cache: Optional[PokeAPICache] = None, offline: bool = False, max_workers: int = 16):
+        if offline and cache is None:
+            raise ValueError("Offline mode needs a cache to serve data from")
+        self.cache = cache
+        self.offline = offline
+        self.max_workers = max_workers
+        self.network_requests = 0
+        # get_many_pokemon fetches from worker threads, and += on an attribute isn't atomic
+        self._requests_lock = threading.Lock()
+
+        # Una sola sesion con keep-alive, dimensionada para el pool de hilos
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
     def get_pokemon(self, name: str) -> Optional[Pokemon]:
         try:
-            response = requests.get(f"{self.BASE_URL}pokemon/{name.lower()}", timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            record = self._get_record("pokemon", name, timeout=10)
 
             moves = []
-            for move_data in data["moves"][:4]:  # Limitar a 4 movimientos
-                move_name = move_data["move"]["name"]
+            for move_name in record["moves"][:4]:  # Limitar a 4 movimientos
                 move = self.get_move(move_name)
                 if move:
                     moves.append(move)
@@ -22,33 +39,135 @@ class PokeAPIClient:
             if not moves:
                 return None
 
-            return Pokemon(
-                id=data["id"],
-                name=data["name"],
-                types=[t["type"]["name"] for t in data["types"]],
-                stats={s["stat"]["name"]: s["base_stat"] for s in data["stats"]},
-                moves=moves,
-                sprite_url=data["sprites"]["front_default"]
-            )
+            return self.build_pokemon(record, moves)
         except Exception as e:
             print(f"Error getting Pokemon {name}: {str(e)}")
             return None
 
     def get_move(self, name: str) -> Optional[Move]:
         try:
-            response = requests.get(f"{self.BASE_URL}move/{name.lower()}", timeout=5)
-            response.raise_for_status()
-            data = response.json()
-
-            return Move(
-                id=data["id"],
-                name=data["name"],
-                type_=data["type"]["name"],
-                category=data["damage_class"]["name"],
-                power=data["power"] if data["power"] else 0,
-                accuracy=data["accuracy"] if data["accuracy"] else 100,
-                pp=data["pp"]
-            )
+            record = self._get_record("move", name, timeout=5)
+            return self.build_move(record)
         except Exception as e:
             print(f"Error getting move {name}: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+    def get_many_pokemon(self, names: Iterable[str]) -> List[Optional[Pokemon]]:
+        """Fetch several Pokemon concurrently.
+
+        Species and moves are each requested once no matter how often they
+        appear; the result is aligned with names and every entry is a fresh
+        Pokemon with its own Move objects (None if it couldn't be loaded).
+        """
+        names = list(names)
+        keys = [normalize_name(name) for name in names]
+        unique_keys = list(dict.fromkeys(keys))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            species = dict(zip(unique_keys, executor.map(
+                lambda key: self.get_record("pokemon", key, timeout=10), unique_keys)))
+
+            move_names = []
+            for record in species.values():
+                if record is not None:
+                    move_names.extend(record["moves"][:4])
+            move_names = list(dict.fromkeys(move_names))
+
+            moves = dict(zip(move_names, executor.map(
+                lambda move_name: self.get_record("move", move_name, timeout=5), move_names)))
+
+        team = []
+        for key in keys:
+            record = species[key]
+            if record is None:
+                team.append(None)
+                continue
+
+            pokemon_moves = [self.build_move(moves[move_name])
+                             for move_name in record["moves"][:4] if moves[move_name] is not None]
+            team.append(self.build_pokemon(record, pokemon_moves) if pokemon_moves else None)
+        return team
+
+    def get_record(self, kind: str, name: str, timeout: float) -> Optional[Dict]:
+        """Compact "pokemon" or "move" record by name, or None (after printing why) if it can't be loaded."""
+        try:
+            return self._get_record(kind, name, timeout)
+        except Exception as e:
+            print(f"Error getting {kind} {name}: {str(e)}")
+            return None
+
+    def _get_record(self, kind: str, name: str, timeout: float) -> Dict:
+        """Get a compact record from the cache, falling back to the network."""
+        key = normalize_name(name)
+        if self.cache is not None:
+            record = self.cache.get(kind, key, allow_stale=self.offline)
+            if record is not None:
+                return record
+
+        if self.offline:
+            raise LookupError(f"{kind} '{key}' is not available offline")
+
+        with self._requests_lock:
+            self.network_requests += 1
+        response = self.session.get(f"{self.BASE_URL}{kind}/{key}", timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+
+        if kind == "pokemon":
+            record = self.compact_pokemon(data)
+        else:
+            record = self.compact_move(data)
+
+        if self.cache is not None:
+            self.cache.put(kind, key, record)
+        return record
+
+    @staticmethod
+    def compact_pokemon(data: Dict) -> Dict:
+        """Keep only the species fields the simulator uses."""
+        return {
+            "id": data["id"],
+            "name": data["name"],
+            "types": [t["type"]["name"] for t in data["types"]],
+            "stats": {s["stat"]["name"]: s["base_stat"] for s in data["stats"]},
+            "moves": [m["move"]["name"] for m in data["moves"]],
+            "sprite_url": data["sprites"]["front_default"]
+        }
+
+    @staticmethod
+    def compact_move(data: Dict) -> Dict:
+        """Keep only the move fields the simulator uses."""
+        return {
+            "id": data["id"],
+            "name": data["name"],
+            "type": data["type"]["name"],
+            "category": data["damage_class"]["name"],
+            "power": data["power"] if data["power"] else 0,
+            "accuracy": data["accuracy"] if data["accuracy"] else 100,
+            "pp": data["pp"]
+        }
+
+    @staticmethod
+    def build_pokemon(record: Dict, moves) -> Pokemon:
+        """Build a Pokemon from a compact species record and its Move objects."""
+        return Pokemon(
+            id=record["id"],
+            name=record["name"],
+            types=record["types"],
+            stats=dict(record["stats"]),
+            moves=moves,
+            sprite_url=record["sprite_url"]
+        )
+
+    @staticmethod
+    def build_move(record: Dict) -> Move:
+        """Build a Move from a compact move record."""
+        return Move(
+            id=record["id"],
+            name=record["name"],
+            type_=record["type"],
+            category=record["category"],
+            power=record["power"],
+            accuracy=record["accuracy"],
+            pp=record["pp"]
+        )
@@ -0,0 +1,273 @@
+"""
+Local Pokedex for the Pokemon Battle Simulator
+Imports a PokeAPI data dump (CSV or JSON) into an indexed SQLite store and serves it offline
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+from data.cache import normalize_name
+from data.pokeapi import PokeAPIClient
+from models.pokemon import Pokemon
+
+DEFAULT_POKEDEX_PATH = os.path.join(os.path.expanduser("~"), ".cache", "pokemon_battle_simulator", "pokedex.sqlite3")
+
+SPRITE_URL = "https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/{}.png"
+
+STAT_NAMES = ["hp", "attack", "defense", "special-attack", "special-defense", "speed"]
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS species ("
+    " id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, types TEXT NOT NULL,"
+    " hp INTEGER, attack INTEGER, defense INTEGER, special_attack INTEGER, special_defense INTEGER, speed INTEGER,"
+    " sprite_url TEXT, move_ids TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS moves ("
+    " id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, type TEXT NOT NULL, category TEXT NOT NULL,"
+    " power INTEGER, accuracy INTEGER, pp INTEGER)"
+]
+
+
+def make_pokemon(pokedex, species_id: int, level: int, move_ids: Tuple[int, ...]) -> Pokemon:
+    """Build a Pokemon with a given moveset from any Pokedex with get_species_record/get_move_record by id."""
+    record = pokedex.get_species_record(species_id)
+    if record is None:
+        raise LookupError(f"Unknown species id {species_id}")
+    moves = []
+    for move_id in move_ids:
+        move_record = pokedex.get_move_record(move_id)
+        if move_record is None:
+            raise LookupError(f"Unknown move id {move_id}")
+        moves.append(PokeAPIClient.build_move(move_record))
+    pokemon = PokeAPIClient.build_pokemon(record, moves)
+    pokemon.level = level
+    return pokemon
+
+
+class LocalPokedex:
+    """Indexed species and move tables read from a local SQLite store.
+
+    Both tables are read in one bulk load when the store is opened; lookups are
+    then dictionary hits on normalized names or ids.
+    """
+
+    def __init__(self, path: str = DEFAULT_POKEDEX_PATH):
+        """Open an imported Pokedex store."""
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No Pokedex store at {path}; import a data dump first")
+        self.path = path
+        self.species: Dict[str, Dict] = {}
+        self.moves: Dict[str, Dict] = {}
+        self.species_by_id: Dict[int, Dict] = {}
+        self.moves_by_id: Dict[int, Dict] = {}
+
+        conn = sqlite3.connect(path)
+        try:
+            for row in conn.execute("SELECT id, name, type, category, power, accuracy, pp FROM moves"):
+                record = {
+                    "id": row[0],
+                    "name": row[1],
+                    "type": row[2],
+                    "category": row[3],
+                    "power": row[4] if row[4] else 0,
+                    "accuracy": row[5] if row[5] else 100,
+                    "pp": row[6]
+                }
+                self.moves[record["name"]] = record
+                self.moves_by_id[record["id"]] = record
+
+            for row in conn.execute(
+                    "SELECT id, name, types, hp, attack, defense, special_attack, special_defense, speed,"
+                    " sprite_url, move_ids FROM species"):
+                move_ids = [int(move_id) for move_id in row[10].split(",") if move_id]
+                record = {
+                    "id": row[0],
+                    "name": row[1],
+                    "types": row[2].split(","),
+                    "stats": dict(zip(STAT_NAMES, row[3:9])),
+                    "moves": [self.moves_by_id[move_id]["name"] for move_id in move_ids
+                              if move_id in self.moves_by_id],
+                    "sprite_url": row[9]
+                }
+                self.species[record["name"]] = record
+                self.species_by_id[record["id"]] = record
+        finally:
+            conn.close()
+
+    def get_species_record(self, name) -> Optional[Dict]:
+        """Species record by name or id."""
+        key = normalize_name(name)
+        if key.isdigit():
+            return self.species_by_id.get(int(key))
+        return self.species.get(key)
+
+    def get_move_record(self, name) -> Optional[Dict]:
+        """Move record by name or id."""
+        key = normalize_name(name)
+        if key.isdigit():
+            return self.moves_by_id.get(int(key))
+        return self.moves.get(key)
+
+    def make_pokemon(self, species_id: int, level: int, move_ids: Tuple[int, ...]) -> Pokemon:
+        """Build a Pokemon with a given moveset, e.g. as a replay factory."""
+        return make_pokemon(self, species_id, level, move_ids)
+
+    def __len__(self):
+        """Get the number of species."""
+        return len(self.species)
+
+
+class LocalPokedexClient(PokeAPIClient):
+    """PokeAPIClient that serves every species and move from a LocalPokedex, never the network."""
+
+    def __init__(self, pokedex: LocalPokedex):
+        """Initialize with an opened Pokedex."""
+        super().__init__(max_workers=1)
+        self.pokedex = pokedex
+
+    def _get_record(self, kind: str, name: str, timeout: float) -> Dict:
+        if kind == "pokemon":
+            record = self.pokedex.get_species_record(name)
+        else:
+            record = self.pokedex.get_move_record(name)
+        if record is None:
+            raise LookupError(f"{kind} '{normalize_name(name)}' is not in the local Pokedex")
+        return record
+
+
+def _write_store(path: str, species: Iterable[Tuple], moves: Iterable[Tuple]):
+    """Replace the contents of the store at path with the given rows."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path)
+    try:
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        conn.execute("DELETE FROM species")
+        conn.execute("DELETE FROM moves")
+        conn.executemany("INSERT INTO moves VALUES (?, ?, ?, ?, ?, ?, ?)", moves)
+        conn.executemany("INSERT INTO species VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", species)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _read_csv(directory: str, name: str) -> List[Dict[str, str]]:
+    with open(os.path.join(directory, name), newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def import_csv_dump(csv_dir: str, path: str = DEFAULT_POKEDEX_PATH) -> int:
+    """Build the store from the CSV files of the PokeAPI repository (data/v2/csv).
+
+    Each species keeps its learnable moves in the order they first appear in
+    pokemon_moves.csv. Returns the number of species imported.
+    """
+    type_names = {row["id"]: row["identifier"] for row in _read_csv(csv_dir, "types.csv")}
+    stat_names = {row["id"]: row["identifier"] for row in _read_csv(csv_dir, "stats.csv")}
+    damage_classes = {row["id"]: row["identifier"] for row in _read_csv(csv_dir, "move_damage_classes.csv")}
+
+    moves = []
+    move_ids = set()
+    for row in _read_csv(csv_dir, "moves.csv"):
+        if not row["damage_class_id"] or row["type_id"] not in type_names:
+            continue
+        move_ids.add(int(row["id"]))
+        moves.append((
+            int(row["id"]),
+            row["identifier"],
+            type_names[row["type_id"]],
+            damage_classes[row["damage_class_id"]],
+            int(row["power"]) if row["power"] else 0,
+            int(row["accuracy"]) if row["accuracy"] else 100,
+            int(row["pp"]) if row["pp"] else 0
+        ))
+
+    types: Dict[str, List[Tuple[int, str]]] = {}
+    for row in _read_csv(csv_dir, "pokemon_types.csv"):
+        types.setdefault(row["pokemon_id"], []).append((int(row["slot"]), type_names[row["type_id"]]))
+
+    stats: Dict[str, Dict[str, int]] = {}
+    for row in _read_csv(csv_dir, "pokemon_stats.csv"):
+        stats.setdefault(row["pokemon_id"], {})[stat_names[row["stat_id"]]] = int(row["base_stat"])
+
+    learnsets: Dict[str, Dict[int, None]] = {}
+    with open(os.path.join(csv_dir, "pokemon_moves.csv"), newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            move_id = int(row["move_id"])
+            if move_id in move_ids:
+                learnsets.setdefault(row["pokemon_id"], {})[move_id] = None
+
+    species = []
+    for row in _read_csv(csv_dir, "pokemon.csv"):
+        pokemon_id = row["id"]
+        pokemon_stats = stats.get(pokemon_id, {})
+        if pokemon_id not in types or any(stat not in pokemon_stats for stat in STAT_NAMES):
+            continue
+        species.append((
+            int(pokemon_id),
+            row["identifier"],
+            ",".join(name for _, name in sorted(types[pokemon_id])),
+            *[pokemon_stats[stat] for stat in STAT_NAMES],
+            SPRITE_URL.format(pokemon_id),
+            ",".join(str(move_id) for move_id in learnsets.get(pokemon_id, {}))
+        ))
+
+    _write_store(path, species, moves)
+    return len(species)
+
+
+def import_json_dump(json_dir: str, path: str = DEFAULT_POKEDEX_PATH) -> int:
+    """Build the store from a dump of PokeAPI JSON responses (api/v2/pokemon/<id>/index.json etc.).
+
+    Returns the number of species imported.
+    """
+    moves = []
+    move_ids_by_name = {}
+    for filename in glob.glob(os.path.join(json_dir, "move", "*", "index.json")):
+        with open(filename, encoding="utf-8") as f:
+            data = json.load(f)
+        if not data.get("damage_class"):
+            continue
+        record = PokeAPIClient.compact_move(data)
+        move_ids_by_name[record["name"]] = record["id"]
+        moves.append((record["id"], record["name"], record["type"], record["category"],
+                      record["power"], record["accuracy"], record["pp"]))
+
+    species = []
+    for filename in glob.glob(os.path.join(json_dir, "pokemon", "*", "index.json")):
+        with open(filename, encoding="utf-8") as f:
+            record = PokeAPIClient.compact_pokemon(json.load(f))
+        move_ids = [move_ids_by_name[name] for name in record["moves"] if name in move_ids_by_name]
+        species.append((
+            record["id"],
+            record["name"],
+            ",".join(record["types"]),
+            *[record["stats"].get(stat, 1) for stat in STAT_NAMES],
+            record["sprite_url"],
+            ",".join(str(move_id) for move_id in move_ids)
+        ))
+
+    _write_store(path, species, moves)
+    return len(species)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import a PokeAPI data dump into the local Pokedex")
+    parser.add_argument("format", choices=["csv", "json"], help="Dump format")
+    parser.add_argument("source", help="Directory of the dump (data/v2/csv or api/v2)")
+    parser.add_argument("--db", default=DEFAULT_POKEDEX_PATH, help="Path of the Pokedex store")
+    args = parser.parse_args(argv)
+
+    if args.format == "csv":
+        count = import_csv_dump(args.source, args.db)
+    else:
+        count = import_json_dump(args.source, args.db)
+    print(f"Imported {count} Pokemon into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
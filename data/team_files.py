@@ -0,0 +1,520 @@
+"""
+Team files for the Pokemon Battle Simulator
+Reads and writes teams as Showdown-style text exports or compact JSON, and builds
+them in bulk against local species and move data
+
+Showdown text: Pokemon blocks separated by blank lines; "=== [format] Name ===" starts
+a new team, so one file can hold many. Only the species, ability, level and moves
+are used (items, EVs, natures and the like are skipped); a missing Level means 100,
+as in Showdown.
+
+Compact JSON:
+
+    {"format": "pbs-teams", "version": 1,
+     "rules": {"max_level": 50, "species_clause": true},
+     "teams": [{"name": "Sun", "pokemon": [["charizard", 50, "solar-power", ["heat-wave", "air-slash"]]]}]}
+
+where each member is [species, level, ability, moves] (an object with those keys also works).
+"""
+import argparse
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+from data.pokeapi import PokeAPIClient
+from models.pokemon import Pokemon
+from models.team import PokemonTeam
+
+JSON_FORMAT = "pbs-teams"
+JSON_VERSION = 1
+DEFAULT_LEVEL = 50
+SHOWDOWN_DEFAULT_LEVEL = 100
+
+_HEADER = re.compile(r"^===\s*(?:\[[^\]]*\]\s*)?(.*?)\s*===$")
+_GENDER = re.compile(r"\s+\((?:M|F)\)$")
+_NICKNAME = re.compile(r"^(.*?)\s+\(([^()]+)\)$")
+_HIDDEN_POWER = re.compile(r"^hidden power\s*\[.*\]$", re.IGNORECASE)
+
+
+class TeamFileError(ValueError):
+    """A team file can't be read, or its teams don't pass validation."""
+
+
+class PokemonSpec:
+    """One team member as written in a team file."""
+
+    __slots__ = ("species", "level", "ability", "moves", "nickname")
+
+    def __init__(self, species: str, level: int = DEFAULT_LEVEL, ability: str = "",
+                 moves: Optional[List[str]] = None, nickname: str = ""):
+        """Initialize with names as written; they are resolved when the team is loaded."""
+        self.species = species
+        self.level = level
+        self.ability = ability
+        self.moves = list(moves or [])
+        self.nickname = nickname
+
+
+class TeamSpec:
+    """A team as written in a team file."""
+
+    __slots__ = ("name", "pokemon", "source")
+
+    def __init__(self, name: str, pokemon: Optional[List[PokemonSpec]] = None, source: str = ""):
+        """Initialize with the team name and members; source says where it was read (for errors)."""
+        self.name = name
+        self.pokemon = list(pokemon or [])
+        self.source = source
+
+
+class Ruleset:
+    """Limits a loaded team must respect."""
+
+    __slots__ = ("min_team_size", "max_team_size", "min_level", "max_level", "max_moves",
+                 "species_clause", "banned_species", "banned_moves")
+
+    def __init__(self,
+                 min_team_size: int = 1,
+                 max_team_size: int = 6,
+                 min_level: int = 1,
+                 max_level: int = 100,
+                 max_moves: int = 4,
+                 species_clause: bool = False,
+                 banned_species: Iterable[str] = (),
+                 banned_moves: Iterable[str] = ()):
+        """Initialize the limits; banned names are matched after normalization."""
+        self.min_team_size = min_team_size
+        self.max_team_size = max_team_size
+        self.min_level = min_level
+        self.max_level = max_level
+        self.max_moves = max_moves
+        self.species_clause = species_clause
+        self.banned_species = {_slug(name) for name in banned_species}
+        self.banned_moves = {_slug(name) for name in banned_moves}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Ruleset":
+        """Build from the "rules" object of a JSON team file."""
+        if not isinstance(data, dict):
+            raise TeamFileError(f"Rules must be an object, got {data!r}")
+        unknown = set(data) - set(cls.__slots__)
+        if unknown:
+            raise TeamFileError(f"Unknown rules: {', '.join(sorted(unknown))}")
+        for name, value in data.items():
+            if name == "species_clause":
+                valid = isinstance(value, bool)
+            elif name.startswith("banned_"):
+                valid = isinstance(value, list) and all(isinstance(item, str) for item in value)
+            else:
+                valid = isinstance(value, int) and not isinstance(value, bool)
+            if not valid:
+                raise TeamFileError(f"Bad value for rule {name}: {value!r}")
+        return cls(**data)
+
+    def as_dict(self) -> Dict:
+        """The rules as a JSON-friendly dictionary."""
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["banned_species"] = sorted(self.banned_species)
+        data["banned_moves"] = sorted(self.banned_moves)
+        return data
+
+
+DEFAULT_RULESET = Ruleset()
+
+
+def _slug(name: str) -> str:
+    """PokeAPI-style name for a display name: "King's Shield" -> "kings-shield", "Mr. Mime" -> "mr-mime"."""
+    name = str(name).strip().lower().replace("♀", "-f").replace("♂", "-m")
+    name = re.sub(r"['’.:%]", "", name)
+    return re.sub(r"[\s_-]+", "-", name).strip("-")
+
+
+def parse_showdown(text: str, source: str = "<text>") -> List[TeamSpec]:
+    """Parse a Showdown text export holding one or more teams."""
+    teams: List[TeamSpec] = []
+    team: Optional[TeamSpec] = None
+    member: Optional[PokemonSpec] = None
+
+    for line_number, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        header = _HEADER.match(line)
+        if header:
+            team = TeamSpec(header.group(1) or f"Team {len(teams) + 1}", source=f"{source}:{line_number}")
+            teams.append(team)
+            member = None
+            continue
+        if not line:
+            member = None
+            continue
+
+        if member is None:
+            if team is None:
+                team = TeamSpec(os.path.splitext(os.path.basename(source))[0], source=f"{source}:{line_number}")
+                teams.append(team)
+            member = _parse_showdown_name(line)
+            team.pokemon.append(member)
+        elif line.startswith("-"):
+            move = line[1:].strip()
+            member.moves.append("hidden-power" if _HIDDEN_POWER.match(move) else move)
+        elif line.startswith("Ability:"):
+            member.ability = line.split(":", 1)[1].strip()
+        elif line.startswith("Level:"):
+            try:
+                member.level = int(line.split(":", 1)[1])
+            except ValueError:
+                raise TeamFileError(f"{source}:{line_number}: bad level '{line}'") from None
+        # Items, EVs, IVs, natures, Tera types and so on don't affect these battles
+    return teams
+
+
+def _parse_showdown_name(line: str) -> PokemonSpec:
+    """First line of a block: "Nickname (Species) (M) @ Item" with every part but the species optional."""
+    line = line.split(" @ ", 1)[0].strip()
+    line = _GENDER.sub("", line)
+    nickname = ""
+    match = _NICKNAME.match(line)
+    if match:
+        nickname, line = match.group(1), match.group(2)
+    return PokemonSpec(line.strip(), SHOWDOWN_DEFAULT_LEVEL, nickname=nickname)
+
+
+def format_showdown(teams: Iterable[TeamSpec]) -> str:
+    """Write teams as a Showdown text export (one "=== Name ===" section per team)."""
+    blocks = []
+    for team in teams:
+        lines = [f"=== {team.name} ===", ""]
+        for member in team.pokemon:
+            lines.append(f"{member.nickname} ({member.species})" if member.nickname else member.species)
+            if member.ability:
+                lines.append(f"Ability: {member.ability}")
+            if member.level != SHOWDOWN_DEFAULT_LEVEL:
+                lines.append(f"Level: {member.level}")
+            lines.extend(f"- {move}" for move in member.moves)
+            lines.append("")
+        blocks.append("\n".join(lines))
+    return "\n".join(blocks)
+
+
+def parse_json(text: str, source: str = "<json>") -> Tuple[List[TeamSpec], Optional[Ruleset]]:
+    """Parse a compact JSON team file; returns its teams and its rules, if it has any."""
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise TeamFileError(f"{source}: {e}") from None
+    if not isinstance(data, dict) or data.get("format") != JSON_FORMAT:
+        raise TeamFileError(f"{source}: not a {JSON_FORMAT} file")
+    version = data.get("version", JSON_VERSION)
+    if not isinstance(version, int) or isinstance(version, bool):
+        raise TeamFileError(f"{source}: bad version {version!r}")
+    if version > JSON_VERSION:
+        raise TeamFileError(f"{source}: version {version} is newer than this reader")
+    entries = data.get("teams", [])
+    if not isinstance(entries, list):
+        raise TeamFileError(f"{source}: \"teams\" must be a list")
+
+    teams = []
+    for index, entry in enumerate(entries):
+        label = f"{source}: team {index + 1}"
+        if not isinstance(entry, dict):
+            raise TeamFileError(f"{label}: expected an object, got {entry!r}")
+        name = entry.get("name")
+        if name is not None and not isinstance(name, str):
+            raise TeamFileError(f"{label}: bad name {name!r}")
+        pokemon = entry.get("pokemon", [])
+        if not isinstance(pokemon, list):
+            raise TeamFileError(f"{label}: \"pokemon\" must be a list")
+        members = [_parse_json_member(member, label) for member in pokemon]
+        teams.append(TeamSpec(name or f"Team {index + 1}", members, label))
+
+    rules = data.get("rules")
+    if rules is None:
+        return teams, None
+    try:
+        return teams, Ruleset.from_dict(rules)
+    except TeamFileError as e:
+        raise TeamFileError(f"{source}: {e}") from None
+
+
+def _parse_json_member(member, label: str) -> PokemonSpec:
+    """One [species, level, ability, moves] row (or object with those keys) of a JSON team."""
+    if isinstance(member, dict):
+        member = [member.get("species"), member.get("level"), member.get("ability"), member.get("moves")]
+    if not isinstance(member, list) or not 1 <= len(member) <= 4 or not isinstance(member[0], str):
+        raise TeamFileError(f"{label}: bad team member {member!r}")
+    species, level, ability, moves = (member + [None] * 3)[:4]
+    if level is not None and (not isinstance(level, int) or isinstance(level, bool)):
+        raise TeamFileError(f"{label}: {species} has a bad level {level!r}")
+    if ability is not None and not isinstance(ability, str):
+        raise TeamFileError(f"{label}: {species} has a bad ability {ability!r}")
+    if moves is not None and (not isinstance(moves, list) or not all(isinstance(move, str) for move in moves)):
+        raise TeamFileError(f"{label}: {species} moves must be a list of names, got {moves!r}")
+    return PokemonSpec(species, level if level is not None else DEFAULT_LEVEL, ability or "", moves or [])
+
+
+def format_json(teams: Iterable[TeamSpec], ruleset: Optional[Ruleset] = None) -> str:
+    """Write teams (and optionally rules) as a compact JSON team file."""
+    data = {"format": JSON_FORMAT, "version": JSON_VERSION}
+    if ruleset is not None:
+        data["rules"] = ruleset.as_dict()
+    data["teams"] = [
+        {"name": team.name,
+         "pokemon": [[member.species, member.level, member.ability, member.moves] for member in team.pokemon]}
+        for team in teams
+    ]
+    return json.dumps(data, separators=(",", ":"))
+
+
+def is_team_file(path: str, text: Optional[str] = None) -> bool:
+    """Whether path is a JSON or Showdown team file (rather than, say, a list of species names)."""
+    if path.lower().endswith(".json"):
+        return True
+    if text is None:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+    return any(_HEADER.match(line.strip()) or line.startswith(("- ", "Ability:", "Level:"))
+               for line in text.splitlines())
+
+
+def read_team_file(path: str) -> Tuple[List[TeamSpec], Optional[Ruleset]]:
+    """Read a team file, JSON if it ends in .json and Showdown text otherwise."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if path.lower().endswith(".json"):
+        return parse_json(text, path)
+    return parse_showdown(text, path), None
+
+
+def write_team_file(path: str, teams: Iterable[TeamSpec], ruleset: Optional[Ruleset] = None):
+    """Write a team file, JSON if path ends in .json and Showdown text otherwise (which has no rules)."""
+    with open(path, "w", encoding="utf-8") as f:
+        if path.lower().endswith(".json"):
+            f.write(format_json(teams, ruleset))
+        else:
+            f.write(format_showdown(teams))
+
+
+def team_spec(team: PokemonTeam) -> TeamSpec:
+    """Describe a built team so it can be written to a team file."""
+    return TeamSpec(team.name, [
+        PokemonSpec(_slug(pokemon.name), pokemon.level, pokemon.ability, [move.name for move in pokemon.moves])
+        for pokemon in team.pokemon
+    ])
+
+
+class ClientRecords:
+    """get_species_record/get_move_record lookups served by a PokeAPIClient (through its cache)."""
+
+    def __init__(self, api_client: PokeAPIClient):
+        """Initialize with the client."""
+        self.api_client = api_client
+
+    def get_species_record(self, name) -> Optional[Dict]:
+        """Species record by name, or None."""
+        return self.api_client.get_record("pokemon", name, timeout=10)
+
+    def get_move_record(self, name) -> Optional[Dict]:
+        """Move record by name, or None."""
+        return self.api_client.get_record("move", name, timeout=5)
+
+
+def record_source(api_client: PokeAPIClient):
+    """The local Pokedex behind a client if it has one, otherwise lookups through the client."""
+    pokedex = getattr(api_client, "pokedex", None)
+    return pokedex if pokedex is not None else ClientRecords(api_client)
+
+
+class TeamLoader:
+    """Validates team specs and builds PokemonTeams from local species and move data.
+
+    pokedex is anything with get_species_record/get_move_record (LocalPokedex,
+    ColumnarPokedex, ClientRecords). Each distinct name is resolved once, through
+    an index of normalized names that also maps a base name such as "thundurus"
+    to the species' first (default) form when the Pokedex can list its species.
+    Each distinct team member is checked and built once, and every team that uses
+    it shares that Pokemon, so loaded teams are templates: clone() one (as
+    ChampionshipTeams.get_random_team does) or wrap it in a TeamState (as the
+    simulators and tournaments do) before battling it. The per-battle copies are
+    then only made for the teams that actually play.
+    Abilities are kept but not checked, since the species data has none.
+    """
+
+    def __init__(self, pokedex, ruleset: Ruleset = DEFAULT_RULESET):
+        """Initialize with the data to validate against and the rules to apply."""
+        self.pokedex = pokedex
+        self.ruleset = ruleset
+        # Name as written -> record (or None), filled on first use
+        self._species: Dict[str, Optional[Dict]] = {}
+        self._moves: Dict[str, Optional[Dict]] = {}
+        self._base_forms: Optional[Dict[str, str]] = None
+        # (species, level, ability, moves) as written -> (species record, problems) for the current rules
+        self._checked: Dict[Tuple, Tuple[Optional[Dict], List[str]]] = {}
+        self._members: Dict[Tuple, Pokemon] = {}
+
+    @property
+    def ruleset(self) -> Ruleset:
+        """Rules teams are checked against."""
+        return self._ruleset
+
+    @ruleset.setter
+    def ruleset(self, ruleset: Ruleset):
+        self._ruleset = ruleset
+        self._checked = {}
+
+    def _base_form(self, name: str) -> Optional[str]:
+        if self._base_forms is None:
+            self._base_forms = {}
+            if hasattr(self.pokedex, "species_names"):
+                names = self.pokedex.species_names()
+            else:
+                names = [record["name"] for record in sorted(getattr(self.pokedex, "species", {}).values(),
+                                                             key=lambda record: record["id"])]
+            for full_name in names:
+                parts = full_name.split("-")
+                for end in range(1, len(parts)):
+                    self._base_forms.setdefault("-".join(parts[:end]), full_name)
+        return self._base_forms.get(name)
+
+    def species_record(self, name: str) -> Optional[Dict]:
+        """Species record for a display or PokeAPI name, or None."""
+        try:
+            return self._species[name]
+        except KeyError:
+            pass
+        key = _slug(name)
+        record = self.pokedex.get_species_record(key)
+        if record is None:
+            base_form = self._base_form(key)
+            record = self.pokedex.get_species_record(base_form) if base_form is not None else None
+        self._species[name] = record
+        return record
+
+    def move_record(self, name: str) -> Optional[Dict]:
+        """Move record for a display or PokeAPI name, or None."""
+        try:
+            return self._moves[name]
+        except KeyError:
+            record = self._moves[name] = self.pokedex.get_move_record(_slug(name))
+            return record
+
+    def _check_member(self, member: PokemonSpec) -> Tuple[Optional[Dict], List[str]]:
+        key = (member.species, member.level, member.ability, tuple(member.moves))
+        checked = self._checked.get(key)
+        if checked is not None:
+            return checked
+
+        rules = self.ruleset
+        record = self.species_record(member.species)
+        if record is None:
+            checked = self._checked[key] = (None, [f"unknown species '{member.species}'"])
+            return checked
+        name = record["name"]
+        problems = []
+        if name in rules.banned_species:
+            problems.append(f"{name} is banned")
+        if not isinstance(member.level, int) or not rules.min_level <= member.level <= rules.max_level:
+            problems.append(f"{name} has level {member.level}, allowed {rules.min_level}-{rules.max_level}")
+        if not 1 <= len(member.moves) <= rules.max_moves:
+            problems.append(f"{name} has {len(member.moves)} moves, allowed 1-{rules.max_moves}")
+        learnset = record["moves"]
+        for move_name in member.moves:
+            move = self.move_record(move_name)
+            if move is None:
+                problems.append(f"unknown move '{move_name}'")
+            elif move["name"] in rules.banned_moves:
+                problems.append(f"{move['name']} is banned")
+            elif learnset and move["name"] not in learnset:
+                problems.append(f"{name} can't learn {move['name']}")
+        checked = self._checked[key] = (record, problems)
+        return checked
+
+    def validate(self, team: TeamSpec) -> List[str]:
+        """Problems with a team, empty if it can be loaded."""
+        rules = self.ruleset
+        label = f"{team.source} ({team.name})" if team.source else team.name
+        problems = []
+        if not rules.min_team_size <= len(team.pokemon) <= rules.max_team_size:
+            problems.append(f"{label}: {len(team.pokemon)} Pokemon, allowed {rules.min_team_size}-{rules.max_team_size}")
+
+        seen = set()
+        for member in team.pokemon:
+            record, member_problems = self._check_member(member)
+            problems.extend(f"{label}: {problem}" for problem in member_problems)
+            if record is not None and rules.species_clause:
+                if record["name"] in seen:
+                    problems.append(f"{label}: {record['name']} appears more than once")
+                seen.add(record["name"])
+        return problems
+
+    def _member(self, member: PokemonSpec) -> Pokemon:
+        key = (member.species, member.level, member.ability, tuple(member.moves))
+        pokemon = self._members.get(key)
+        if pokemon is None:
+            pokemon = PokeAPIClient.build_pokemon(
+                self.species_record(member.species),
+                [PokeAPIClient.build_move(self.move_record(move)) for move in member.moves])
+            pokemon.level = member.level
+            pokemon.ability = member.ability
+            self._members[key] = pokemon
+        return pokemon
+
+    def load(self, teams: Iterable[TeamSpec]) -> List[PokemonTeam]:
+        """Validate and build template teams that share their Pokemon (see the class docstring).
+
+        Every problem in every team is reported in one TeamFileError.
+        """
+        teams = list(teams)
+        problems = [problem for team in teams for problem in self.validate(team)]
+        if problems:
+            shown = problems[:20]
+            if len(problems) > len(shown):
+                shown.append(f"... and {len(problems) - len(shown)} more")
+            raise TeamFileError("Invalid teams:\n" + "\n".join(shown))
+
+        built = []
+        for team in teams:
+            pokemon_team = PokemonTeam(team.name)
+            for member in team.pokemon:
+                pokemon_team.add_pokemon(self._member(member))
+            built.append(pokemon_team)
+        return built
+
+    def load_file(self, path: str) -> List[PokemonTeam]:
+        """Read, validate and build every team in a team file, applying the file's rules if it has any."""
+        teams, ruleset = read_team_file(path)
+        if ruleset is None:
+            return self.load(teams)
+        previous, self.ruleset = self.ruleset, ruleset
+        try:
+            return self.load(teams)
+        finally:
+            self.ruleset = previous
+
+
+def main(argv=None):
+    from data.columnar import ColumnarPokedex
+    from data.pokedex import DEFAULT_POKEDEX_PATH, LocalPokedex
+
+    parser = argparse.ArgumentParser(description="Validate team files and convert between Showdown text and JSON")
+    parser.add_argument("files", nargs="+", help="Team files to check")
+    parser.add_argument("--db", default=DEFAULT_POKEDEX_PATH, help="Path of the imported Pokedex store")
+    parser.add_argument("--columnar", help="Validate against a memory-mapped columnar Pokedex file instead")
+    parser.add_argument("--output", help="Write every team to this file (.json for JSON, otherwise Showdown text)")
+    args = parser.parse_args(argv)
+
+    pokedex = ColumnarPokedex(args.columnar) if args.columnar else LocalPokedex(args.db)
+    loader = TeamLoader(pokedex)
+    specs = []
+    for path in args.files:
+        try:
+            teams = loader.load_file(path)
+        except (OSError, TeamFileError) as e:
+            parser.exit(1, f"{e}\n")
+        print(f"{path}: {len(teams)} teams OK")
+        specs.extend(read_team_file(path)[0])
+    if args.output:
+        write_team_file(args.output, specs)
+        print(f"Wrote {len(specs)} teams to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,66 @@
+import argparse
+import random
 import sys
 from ui.terminal_ui import TerminalUI
 from models.team import PokemonTeam
 from battle.battle_engine import BattleEngine
+from battle.replay import ReplayWriter
+from battle.search import SearchAI
 from data.pokeapi import PokeAPIClient
+from data.cache import PokeAPICache, DEFAULT_CACHE_PATH
+from data.pokedex import LocalPokedex, LocalPokedexClient
+from data.columnar import ColumnarPokedex
 from data.championship_teams import ChampionshipTeams
+from ui.battle_server import run_server
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pokemon Battle Simulator")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="Path of the PokeAPI cache database")
+    parser.add_argument("--no-cache", action="store_true", help="Always fetch data from PokeAPI")
+    parser.add_argument("--offline", action="store_true", help="Serve Pokemon data only from the cache")
+    parser.add_argument("--pokedex", help="Serve Pokemon data from an imported local Pokedex store")
+    parser.add_argument("--columnar", help="Serve Pokemon data from a memory-mapped columnar Pokedex file")
+    parser.add_argument("--team-file", help="Draw AI teams from this Showdown or JSON team file")
+    parser.add_argument("--ai", choices=["heuristic", "search"], default="heuristic", help="Opponent AI")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Seconds the search AI may use per decision")
+    parser.add_argument("--replay", help="Append every battle to this replay file")
+    parser.add_argument("--server", action="store_true", help="Host battles for many players over TCP instead")
+    parser.add_argument("--host", default="127.0.0.1", help="Address the battle server listens on")
+    parser.add_argument("--port", type=int, default=8765, help="Port the battle server listens on")
+    parser.add_argument("--idle-timeout", type=float, default=300.0,
+                        help="Seconds before the battle server drops an idle player")
+    return parser.parse_args(argv)
 
 def main():
+    args = parse_args()
+
     print("====================================")
     print("    POKEMON BATTLE SIMULATOR")
     print("====================================")
     print("Loading PokeAPI data...")
 
-    api_client = PokeAPIClient()
-    teams_data = ChampionshipTeams(api_client)
+    if args.no_cache and args.offline:
+        print("Offline mode needs the cache; drop --no-cache.")
+        sys.exit(1)
+    if args.columnar:
+        api_client = LocalPokedexClient(ColumnarPokedex(args.columnar))
+    elif args.pokedex:
+        api_client = LocalPokedexClient(LocalPokedex(args.pokedex))
+    else:
+        cache = None if args.no_cache else PokeAPICache(args.cache)
+        api_client = PokeAPIClient(cache=cache, offline=args.offline)
+    if args.server:
+        if args.ai == "search":
+            ai_factory = lambda: SearchAI(time_budget=args.think_time)
+        else:
+            ai_factory = lambda: None
+        run_server(api_client, args.host, args.port, ai_factory, args.idle_timeout, args.replay,
+                   args.team_file)
+        return
+
+    teams_data = ChampionshipTeams(api_client, args.team_file)
     ui = TerminalUI()
+    ai_policy = SearchAI(time_budget=args.think_time) if args.ai == "search" else None
 
     while True:
         choice = ui.show_main_menu()
@@ -21,8 +68,15 @@ def main():
         if choice == '1':
             player_team = create_player_team(ui, api_client)
             ai_team = teams_data.get_random_team()
-            battle = BattleEngine(player_team, ai_team)
+            seed = random.randrange(2 ** 63)
+            battle = BattleEngine(player_team, ai_team, rng=random.Random(seed), ai_policy=ai_policy)
+            if args.replay:
+                battle.replay_writer = ReplayWriter.open(args.replay)
+                battle.replay_writer.begin_game(seed, player_team, ai_team)
             ui.start_battle(battle)
+            if battle.replay_writer is not None:
+                battle.replay_writer.end_game(battle)
+                battle.replay_writer.close()
         elif choice == '2':
             ui.show_instructions()
         elif choice == '3':
@@ -0,0 +1,196 @@
+"""
+Compact battle state for the Pokemon Battle Simulator
+Slotted stand-ins for Move, Pokemon and PokemonTeam that BattleEngine can run on
+"""
+from typing import List
+from models.move import Move
+from models.pokemon import Pokemon
+from models.team import PokemonTeam
+
+
+class MoveSlot:
+    """A move as used in one battle: shared move data plus its own PP."""
+
+    __slots__ = ("move", "id", "name", "type", "category", "power", "accuracy", "max_pp", "current_pp")
+
+    def __init__(self, move: Move):
+        """Initialize from a Move, copying its current PP."""
+        self.move = move
+        self.id = move.id
+        self.name = move.name
+        self.type = move.type
+        self.category = move.category
+        self.power = move.power
+        self.accuracy = move.accuracy
+        self.max_pp = move.max_pp
+        self.current_pp = move.current_pp
+
+    def use(self):
+        """Reduce PP by 1 when the move is used."""
+        if self.current_pp > 0:
+            self.current_pp -= 1
+
+    def restore_pp(self):
+        """Restore PP to max."""
+        self.current_pp = self.max_pp
+
+    def clone(self) -> "MoveSlot":
+        """Copy the slot, sharing the move data."""
+        clone = MoveSlot.__new__(MoveSlot)
+        clone.move = self.move
+        clone.id = self.id
+        clone.name = self.name
+        clone.type = self.type
+        clone.category = self.category
+        clone.power = self.power
+        clone.accuracy = self.accuracy
+        clone.max_pp = self.max_pp
+        clone.current_pp = self.current_pp
+        return clone
+
+
+class CombatantState:
+    """A Pokemon as used in one battle: shared species data plus HP, PP and status."""
+
+    __slots__ = ("pokemon", "id", "name", "types", "stats", "level", "ability", "moves",
+                 "current_hp", "status", "confused", "flinched")
+
+    def __init__(self, pokemon: Pokemon):
+        """Initialize from a Pokemon, sharing its types and stats and copying its battle state."""
+        self.pokemon = pokemon
+        self.id = pokemon.id
+        self.name = pokemon.name
+        self.types = pokemon.types
+        self.stats = pokemon.stats
+        self.level = pokemon.level
+        self.ability = pokemon.ability
+        self.moves = [MoveSlot(move) for move in pokemon.moves]
+        self.current_hp = pokemon.current_hp
+        self.status = pokemon.status
+        self.confused = pokemon.confused
+        self.flinched = pokemon.flinched
+
+    def is_fainted(self) -> bool:
+        """Check if the Pokemon has fainted."""
+        return self.current_hp <= 0
+
+    def heal(self, amount: int) -> int:
+        """Heal the Pokemon by the given amount."""
+        old_hp = self.current_hp
+        self.current_hp = min(self.stats["hp"], self.current_hp + amount)
+        return self.current_hp - old_hp
+
+    def restore_moves(self):
+        """Restore PP to all moves."""
+        for move in self.moves:
+            move.restore_pp()
+
+    def reset(self):
+        """Restore full HP and PP and clear status conditions."""
+        self.current_hp = self.stats["hp"]
+        self.restore_moves()
+        self.status = None
+        self.confused = False
+        self.flinched = False
+
+    def clone(self) -> "CombatantState":
+        """Copy HP, PP and status, sharing the species data."""
+        clone = CombatantState.__new__(CombatantState)
+        clone.pokemon = self.pokemon
+        clone.id = self.id
+        clone.name = self.name
+        clone.types = self.types
+        clone.stats = self.stats
+        clone.level = self.level
+        clone.ability = self.ability
+        clone.moves = [move.clone() for move in self.moves]
+        clone.current_hp = self.current_hp
+        clone.status = self.status
+        clone.confused = self.confused
+        clone.flinched = self.flinched
+        return clone
+
+    def apply_to(self, pokemon: Pokemon):
+        """Copy HP, PP and status onto a Pokemon with the same moveset."""
+        pokemon.current_hp = self.current_hp
+        pokemon.status = self.status
+        pokemon.confused = self.confused
+        pokemon.flinched = self.flinched
+        for slot, move in zip(self.moves, pokemon.moves):
+            move.current_pp = slot.current_pp
+
+    def __str__(self) -> str:
+        """String representation of the Pokemon."""
+        type_str = "/".join([t.capitalize() for t in self.types])
+        return f"{self.name} (Lv.{self.level}) - {type_str} - HP: {self.current_hp}/{self.stats['hp']}"
+
+
+class TeamState:
+    """A team as used in one battle, interchangeable with PokemonTeam inside BattleEngine."""
+
+    __slots__ = ("team", "name", "pokemon", "active_pokemon_index")
+
+    def __init__(self, team: PokemonTeam):
+        """Initialize from a PokemonTeam, copying its battle state."""
+        self.team = team
+        self.name = team.name
+        self.pokemon: List[CombatantState] = [CombatantState(pokemon) for pokemon in team.pokemon]
+        self.active_pokemon_index = team.active_pokemon_index
+
+    def get_active_pokemon(self) -> CombatantState:
+        """Get the currently active Pokemon."""
+        return self.pokemon[self.active_pokemon_index]
+
+    def switch_pokemon(self, index: int) -> bool:
+        """Switch to another Pokemon in the team."""
+        if index < 0 or index >= len(self.pokemon):
+            return False
+        if self.pokemon[index].is_fainted():
+            return False
+        self.active_pokemon_index = index
+        return True
+
+    def get_first_non_fainted(self) -> int:
+        """Get the index of the first non-fainted Pokemon."""
+        for i, pokemon in enumerate(self.pokemon):
+            if not pokemon.is_fainted():
+                return i
+        return -1
+
+    def is_defeated(self) -> bool:
+        """Check if all Pokemon in the team have fainted."""
+        return all(pokemon.is_fainted() for pokemon in self.pokemon)
+
+    def reset(self):
+        """Heal every Pokemon and send out the first one again."""
+        for pokemon in self.pokemon:
+            pokemon.reset()
+        self.active_pokemon_index = 0
+
+    def clone(self) -> "TeamState":
+        """Copy the team's battle state, sharing the species data."""
+        clone = TeamState.__new__(TeamState)
+        clone.team = self.team
+        clone.name = self.name
+        clone.pokemon = [pokemon.clone() for pokemon in self.pokemon]
+        clone.active_pokemon_index = self.active_pokemon_index
+        return clone
+
+    def apply_to(self, team: PokemonTeam):
+        """Copy the battle state back onto a PokemonTeam with the same members."""
+        for state, pokemon in zip(self.pokemon, team.pokemon):
+            state.apply_to(pokemon)
+        team.active_pokemon_index = self.active_pokemon_index
+
+    def to_team(self) -> PokemonTeam:
+        """Write the battle state back onto the team this state was created from."""
+        self.apply_to(self.team)
+        return self.team
+
+    def __len__(self):
+        """Get the number of Pokemon in the team."""
+        return len(self.pokemon)
+
+    def __str__(self):
+        """String representation of the team."""
+        return f"{self.name}: {', '.join(p.name for p in self.pokemon)}"
@@ -20,5 +20,12 @@ class Move:
         """Restore PP to max."""
         self.current_pp = self.max_pp
 
+    def clone(self) -> "Move":
+        """Copy the move, including its current PP."""
+        # A plain attribute copy; copy.copy's generic protocol is several times slower
+        clone = Move.__new__(Move)
+        clone.__dict__.update(self.__dict__)
+        return clone
+
     def __str__(self):
         return f"{self.name} (Type: {self.type}, Category: {self.category}, Power: {self.power}, Accuracy: {self.accuracy}, PP: {self.current_pp}/{self.max_pp})"
\ No newline at end of file
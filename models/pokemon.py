@@ -49,6 +49,21 @@ class Pokemon:
         for move in self.moves:
             move.restore_pp()
 
+    def reset(self):
+        """Restore full HP and PP and clear status conditions."""
+        self.current_hp = self.stats["hp"]
+        self.restore_moves()
+        self.status = None
+        self.confused = False
+        self.flinched = False
+
+    def clone(self) -> "Pokemon":
+        """Copy the battle state (HP, PP, status) while sharing stats and types."""
+        clone = Pokemon.__new__(Pokemon)
+        clone.__dict__.update(self.__dict__)
+        clone.moves = [move.clone() for move in self.moves]
+        return clone
+
     def __str__(self) -> str:
         """String representation of the Pokemon."""
         type_str = "/".join([t.capitalize() for t in self.types])
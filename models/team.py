@@ -44,6 +44,19 @@ class PokemonTeam:
         """Check if all Pokemon in the team have fainted."""
         return all(pokemon.is_fainted() for pokemon in self.pokemon)
 
+    def reset(self):
+        """Heal every Pokemon and send out the first one again."""
+        for pokemon in self.pokemon:
+            pokemon.reset()
+        self.active_pokemon_index = 0
+
+    def clone(self) -> "PokemonTeam":
+        """Copy the team's battle state while sharing species and move data."""
+        clone = PokemonTeam(self.name)
+        clone.pokemon = [pokemon.clone() for pokemon in self.pokemon]
+        clone.active_pokemon_index = self.active_pokemon_index
+        return clone
+
     def __len__(self):
         """Get the number of Pokemon in the team."""
         return len(self.pokemon)
@@ -0,0 +1,305 @@
+"""
+Battle server for the Pokemon Battle Simulator
+Hosts many concurrent battles in one process over a line-based TCP protocol
+
+Clients send one command per line:
+    team NAME [NAME ...]   build a team of up to 6 Pokemon
+    start                  battle a random championship team
+    N / switch X           use move N (1-4) or switch to Pokemon X, as in the terminal UI
+    status                 show the current battle
+    forfeit                give up the current battle
+    quit                   close the connection
+
+The server answers with one JSON object per line, each with an "event" field:
+welcome, team, status, turn, end, error and timeout.
+
+With a replay path, every battle (finished, forfeited or abandoned) is appended to
+that battle.replay file as one game record once it ends.
+"""
+import argparse
+import asyncio
+import io
+import json
+import random
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from battle.battle_engine import Action, BattleEngine
+from battle.replay import ReplayWriter
+from data.championship_teams import ChampionshipTeams
+from data.pokeapi import PokeAPIClient
+from models.team import PokemonTeam
+
+MAX_TEAM_SIZE = 6
+
+# Builds the AI opponent for one session; policies such as SearchAI keep per-search state
+PolicyFactory = Callable[[], Optional[Callable[[BattleEngine, PokemonTeam, PokemonTeam], Action]]]
+
+
+def _pokemon_status(pokemon) -> Dict:
+    return {"name": pokemon.name, "hp": pokemon.current_hp, "max_hp": pokemon.stats["hp"]}
+
+
+def battle_status(battle: BattleEngine) -> Dict:
+    """JSON-friendly view of get_battle_status()."""
+    status = battle.get_battle_status()
+    player = status["player_pokemon"]
+    return {
+        "event": "status",
+        "turn": status["turn"],
+        "player_pokemon": dict(_pokemon_status(player), moves=[
+            {"name": move.name, "pp": move.current_pp, "max_pp": move.max_pp} for move in player.moves
+        ]),
+        "ai_pokemon": _pokemon_status(status["ai_pokemon"]),
+        "player_team": status["player_team_status"]
+    }
+
+
+class BattleSession:
+    """One connected player: their team and current battle."""
+
+    def __init__(self, server: "BattleServer", reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Initialize for an accepted connection."""
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.team: Optional[PokemonTeam] = None
+        self.battle: Optional[BattleEngine] = None
+
+    async def send(self, message: Dict):
+        """Write one JSON line to the client."""
+        self.writer.write(json.dumps(message).encode("utf-8") + b"\n")
+        await self.writer.drain()
+
+    async def error(self, message: str):
+        await self.send({"event": "error", "message": message})
+
+    async def run(self):
+        """Serve commands until the client quits, disconnects or stays idle too long."""
+        await self.send({"event": "welcome", "commands": ["team", "start", "status", "switch", "forfeit", "quit"]})
+        while True:
+            try:
+                line = await asyncio.wait_for(self.reader.readline(), self.server.idle_timeout)
+            except asyncio.TimeoutError:
+                await self.send({"event": "timeout"})
+                return
+            if not line:
+                return
+
+            command = line.decode("utf-8", errors="replace").strip()
+            if not command:
+                continue
+            if command.lower() == "quit":
+                return
+            await self.handle(command)
+
+    async def handle(self, command: str):
+        """Run a single command."""
+        verb, _, argument = command.partition(" ")
+        verb = verb.lower()
+
+        if verb == "team":
+            await self._build_team(argument)
+        elif verb == "start":
+            await self._start_battle()
+        elif verb == "status":
+            if self.battle is None:
+                await self.error("No battle in progress")
+            else:
+                await self.send(battle_status(self.battle))
+        elif verb == "forfeit":
+            if self.battle is None:
+                await self.error("No battle in progress")
+            else:
+                self.end_battle()
+                await self.send({"event": "end", "winner": "AI", "forfeit": True})
+        elif verb == "switch" or verb.isdigit():
+            await self._play_turn(command.lower())
+        else:
+            await self.error(f"Unknown command: {verb}")
+
+    async def _build_team(self, argument: str):
+        if self.battle is not None:
+            await self.error("Can't change teams during a battle")
+            return
+        names = argument.replace(",", " ").split()
+        if not names or len(names) > MAX_TEAM_SIZE:
+            await self.error(f"A team needs 1-{MAX_TEAM_SIZE} Pokemon")
+            return
+
+        # Lookups may hit the network, so keep them off the event loop
+        pokemon = await self.server.run_blocking(self.server.api_client.get_many_pokemon, names)
+        missing = [name for name, member in zip(names, pokemon) if member is None]
+        if missing:
+            await self.error(f"Couldn't load: {', '.join(missing)}")
+            return
+
+        self.team = PokemonTeam("Player's Team")
+        for member in pokemon:
+            self.team.add_pokemon(member)
+        await self.send({"event": "team", "pokemon": [member.name for member in pokemon]})
+
+    async def _start_battle(self):
+        if self.team is None:
+            await self.error("Build a team first")
+            return
+        if self.battle is not None:
+            await self.error("A battle is already in progress")
+            return
+
+        seed = random.randrange(2 ** 63)
+        rng = random.Random(seed)
+        ai_team = self.server.teams.get_random_team(rng)
+        self.team.reset()
+        replay_writer = None
+        if self.server.replay_writer is not None:
+            # Sessions play concurrently, so each game is buffered and appended whole when it ends
+            replay_writer = ReplayWriter(io.BytesIO(), write_header=False)
+            replay_writer.begin_game(seed, self.team, ai_team)
+        self.battle = BattleEngine(self.team, ai_team, rng=random.Random(seed), ai_policy=self.server.ai_factory(),
+                                   replay_writer=replay_writer, log_turns=False)
+        await self.send(battle_status(self.battle))
+
+    def end_battle(self):
+        """Drop the current battle, saving its replay if the server records them."""
+        if self.battle is None:
+            return
+        if self.battle.replay_writer is not None:
+            self.battle.replay_writer.end_game(self.battle)
+            self.server.save_replay(self.battle.replay_writer.stream.getvalue())
+        self.battle = None
+
+    async def _play_turn(self, choice: str):
+        if self.battle is None:
+            await self.error("No battle in progress")
+            return
+
+        # The AI decision runs inside process_turn, so the whole turn goes to the executor
+        messages = await self.server.run_blocking(self.battle.process_turn, choice)
+        await self.send({"event": "turn", "messages": messages})
+
+        if self.battle.is_battle_over():
+            await self.send({"event": "end", "winner": self.battle.get_winner(), "forfeit": False})
+            self.end_battle()
+        else:
+            await self.send(battle_status(self.battle))
+
+
+class BattleServer:
+    """Asyncio TCP server running one BattleEngine per connected player.
+
+    The event loop only does I/O; team lookups and turns (including AI decisions)
+    run in the executor, so a slow search AI never stalls the other sessions.
+    Each session is dropped after idle_timeout seconds without a command, and
+    backlog should cover the connections expected to arrive at once. Battles are
+    appended to the replay file at replay_path if one is given. AI teams come from
+    team_file (see data.team_files) if one is given, otherwise the built-in rosters.
+    """
+
+    def __init__(self,
+                 api_client: PokeAPIClient,
+                 ai_factory: PolicyFactory = lambda: None,
+                 idle_timeout: float = 300.0,
+                 max_sessions: int = 10000,
+                 backlog: int = 1024,
+                 executor: Optional[Executor] = None,
+                 replay_path: Optional[str] = None,
+                 team_file: Optional[str] = None):
+        """Initialize with the data source for teams and a factory for each session's AI policy."""
+        self.api_client = api_client
+        self.teams = ChampionshipTeams(api_client, team_file)
+        self.ai_factory = ai_factory
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.backlog = backlog
+        self.executor = executor if executor is not None else ThreadPoolExecutor()
+        self.sessions: List[BattleSession] = []
+        self.replay_writer = ReplayWriter.open(replay_path) if replay_path is not None else None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def run_blocking(self, function, *args):
+        """Run a blocking call in the executor."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def save_replay(self, game: bytes):
+        """Append one complete game record to the replay file."""
+        self.replay_writer.stream.write(game)
+        self.replay_writer.stream.flush()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        """Load the championship teams and start listening."""
+        if not self.teams.teams:
+            await self.run_blocking(self.teams.load_teams)
+        self._server = await asyncio.start_server(self._accept, host, port, backlog=self.backlog)
+        return self._server
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 8765):
+        """Start the server and serve until cancelled."""
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def close(self):
+        """Stop accepting connections and wait for the listener to close."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self.replay_writer is not None:
+            self.replay_writer.close()
+
+    async def _accept(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = BattleSession(self, reader, writer)
+        if len(self.sessions) >= self.max_sessions:
+            await session.error("Server is full")
+            writer.close()
+            return
+
+        self.sessions.append(session)
+        try:
+            await session.run()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.sessions.remove(session)
+            session.end_battle()
+            writer.close()
+
+
+def main(argv=None):
+    from battle.search import SearchAI
+    from data.cache import DEFAULT_CACHE_PATH, PokeAPICache
+
+    parser = argparse.ArgumentParser(description="Serve Pokemon battles over TCP")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="Path of the PokeAPI cache database")
+    parser.add_argument("--offline", action="store_true", help="Serve Pokemon data only from the cache")
+    parser.add_argument("--ai", choices=["heuristic", "search"], default="heuristic", help="Opponent AI")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Seconds the search AI may use per decision")
+    parser.add_argument("--idle-timeout", type=float, default=300.0, help="Seconds before an idle session is dropped")
+    parser.add_argument("--replay", help="Append every battle to this replay file")
+    parser.add_argument("--team-file", help="Draw AI teams from this Showdown or JSON team file")
+    args = parser.parse_args(argv)
+
+    api_client = PokeAPIClient(cache=PokeAPICache(args.cache), offline=args.offline)
+    if args.ai == "search":
+        ai_factory = lambda: SearchAI(time_budget=args.think_time)
+    else:
+        ai_factory = lambda: None
+    run_server(api_client, args.host, args.port, ai_factory, args.idle_timeout, args.replay, args.team_file)
+
+
+def run_server(api_client: PokeAPIClient, host: str, port: int,
+               ai_factory: PolicyFactory = lambda: None, idle_timeout: float = 300.0,
+               replay_path: Optional[str] = None, team_file: Optional[str] = None):
+    """Run a BattleServer until interrupted."""
+    server = BattleServer(api_client, ai_factory=ai_factory, idle_timeout=idle_timeout,
+                          replay_path=replay_path, team_file=team_file)
+    print(f"Serving battles on {host}:{port}")
+    try:
+        asyncio.run(server.serve_forever(host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()